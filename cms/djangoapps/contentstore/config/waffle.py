@@ -10,6 +10,7 @@ WAFFLE_NAMESPACE = u'studio'
 # Switches
 ENABLE_ACCESSIBILITY_POLICY_PAGE = u'enable_policy_page'
 ENABLE_ASSETS_SEARCH = u'enable_assets_search'
+ENABLE_INCREMENTAL_COURSEWARE_INDEX = u'enable_incremental_courseware_index'
 
 
 def waffle():
@@ -1,12 +1,14 @@
 """ Code to allow module store to interface with courseware index """
 from __future__ import absolute_import
 
+import itertools
 import logging
 import re
 from abc import ABCMeta, abstractmethod
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import resolve
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy
@@ -20,6 +22,7 @@ from openedx.core.lib.courses import course_image_url
 from xmodule.annotator_mixin import html_to_text
 from xmodule.library_tools import normalize_key_for_search
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.exceptions import ItemNotFoundError
 
 # REINDEX_AGE is the default amount of time that we look back for changes
 # that might have happened. If we are provided with a time at which the
@@ -28,6 +31,10 @@ from xmodule.modulestore import ModuleStoreEnum
 # how far back from the trigger point to look back in order to index
 REINDEX_AGE = timedelta(0, 60)  # 60 seconds
 
+# INDEX_BATCH_SIZE is the maximum number of items sent to the search engine
+# in a single bulk request, while indexing or removing items
+INDEX_BATCH_SIZE = 500
+
 log = logging.getLogger('edx.modulestore')
 
 
@@ -58,6 +65,137 @@ class SearchIndexingError(Exception):
         self.error_list = error_list
 
 
+def _get_item_location(item):
+    """
+    Gets the version agnostic item location
+    """
+    return item.location.version_agnostic().replace(branch=None)
+
+
+def _add_split_test_groups_usage(split_test, groups_usage_info):
+    """
+    Adds the experiment group of each of the children of the split_test, and of their own
+    children, to groups_usage_info
+    """
+    split_partition = split_test.get_selected_partition()
+    if not split_partition:
+        return
+    for split_test_child in split_test.get_children():
+        for group in split_partition.groups:
+            group_id = unicode(group.id)
+            child_location = split_test.group_id_to_child.get(group_id, None)
+            if child_location == split_test_child.location:
+                groups_usage_info.update({
+                    unicode(_get_item_location(split_test_child)): [group_id],
+                })
+                for component in split_test_child.get_children():
+                    groups_usage_info.update({
+                        unicode(_get_item_location(component)): [group_id]
+                    })
+
+
+def _get_split_modulestore(modulestore, course_key):
+    """
+    Returns the split modulestore the course is in, or None if it is in another modulestore
+    """
+    store = modulestore
+    if hasattr(modulestore, '_get_modulestore_for_courselike'):
+        store = modulestore._get_modulestore_for_courselike(course_key)  # pylint: disable=protected-access
+    if store.get_modulestore_type() != ModuleStoreEnum.Type.split:
+        return None
+    return store
+
+
+def get_published_version(modulestore, course_key):
+    """
+    Returns the version of the published structure of the course in split, or None if it has none
+    """
+    store = _get_split_modulestore(modulestore, course_key)
+    if store is None:
+        return None
+    index_entry = store.get_course_index(course_key)
+    if index_entry is None:
+        return None
+    return index_entry['versions'].get(ModuleStoreEnum.BranchName.published)
+
+
+def get_published_structure(modulestore, course_key, version):
+    """
+    Returns the published structure of the course in split with the given version, or None if there is none
+    """
+    store = _get_split_modulestore(modulestore, course_key)
+    if store is None:
+        return None
+    return store.get_structure(course_key.for_branch(ModuleStoreEnum.BranchName.published), version)
+
+
+def _get_block_parents(structure):
+    """
+    Returns a dictionary of the key of each block in the course tree of the split structure to the set
+    of the keys of its parents
+    """
+    blocks = structure['blocks']
+    parents = {structure['root']: set()}
+    stack = [structure['root']]
+    while stack:
+        block_key = stack.pop()
+        for child_key in blocks[block_key].fields.get('children', []):
+            if child_key not in blocks:
+                continue
+            if child_key not in parents:
+                parents[child_key] = set()
+                stack.append(child_key)
+            parents[child_key].add(block_key)
+    return parents
+
+
+def get_published_structure_changes(previous_structure, structure):
+    """
+    Compares two published split structures of a course, and returns the keys of the blocks in the
+    course tree of `structure` whose index may have changed since `previous_structure`, and the keys
+    of the blocks that were removed from the course tree since.
+
+    A block has changed if its update version or its parents changed. The index of a block may have
+    changed if the block, one of its ancestors or one of its descendants changed: the index includes
+    the names, start date and experiment groups of the ancestors of the block, and the content groups
+    of a container depend on those of its descendants.
+    """
+    previous_parents = _get_block_parents(previous_structure)
+    parents = _get_block_parents(structure)
+    blocks = structure['blocks']
+
+    changed_blocks = set()
+    for block_key, block_parents in parents.iteritems():
+        if (  # pylint: disable=bad-continuation
+            block_key not in previous_parents or
+            previous_parents[block_key] != block_parents or
+            previous_structure['blocks'][block_key].edit_info.update_version !=
+            blocks[block_key].edit_info.update_version
+        ):
+            changed_blocks.add(block_key)
+
+    blocks_to_index = set()
+    stack = list(changed_blocks)
+    while stack:
+        block_key = stack.pop()
+        if block_key not in blocks_to_index:
+            blocks_to_index.add(block_key)
+            stack.extend(
+                child_key for child_key in blocks[block_key].fields.get('children', []) if child_key in parents
+            )
+    stack = list(changed_blocks)
+    while stack:
+        block_key = stack.pop()
+        for parent_key in parents[block_key]:
+            if parent_key not in blocks_to_index:
+                blocks_to_index.add(parent_key)
+                stack.append(parent_key)
+
+    # The course itself is not indexed
+    blocks_to_index.discard(structure['root'])
+    return blocks_to_index, set(previous_parents) - set(parents)
+
+
 @add_metaclass(ABCMeta)
 class SearchIndexerBase(object):
     """
@@ -69,6 +207,9 @@ class SearchIndexerBase(object):
     DOCUMENT_TYPE = None
     ENABLE_INDEXING_KEY = None
 
+    # Whether the index can be updated with only the changes between published structures, see `index_changes`
+    SUPPORTS_INCREMENTAL_INDEX = False
+
     INDEX_EVENT = {
         'name': None,
         'category': None
@@ -88,7 +229,7 @@ class SearchIndexerBase(object):
 
     @classmethod
     @abstractmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
 
     @classmethod
@@ -154,17 +295,11 @@ class SearchIndexerBase(object):
         # list - those are ready to be destroyed
         indexed_items = set()
 
-        # items_index is a list of all the items index dictionaries.
-        # it is used to collect all indexes and index them using bulk API,
+        # items_index is a list of the items index dictionaries.
+        # it is used to collect indexes and index them in batches using bulk API,
         # instead of per item index API call.
         items_index = []
 
-        def get_item_location(item):
-            """
-            Gets the version agnostic item location
-            """
-            return item.location.version_agnostic().replace(branch=None)
-
         def prepare_item_index(item, skip_index=False, groups_usage_info=None):
             """
             Add this item to the items_index and indexed_items list
@@ -189,23 +324,10 @@ class SearchIndexerBase(object):
             item_content_groups = None
 
             if item.category == "split_test":
-                split_partition = item.get_selected_partition()
-                for split_test_child in item.get_children():
-                    if split_partition:
-                        for group in split_partition.groups:
-                            group_id = unicode(group.id)
-                            child_location = item.group_id_to_child.get(group_id, None)
-                            if child_location == split_test_child.location:
-                                groups_usage_info.update({
-                                    unicode(get_item_location(split_test_child)): [group_id],
-                                })
-                                for component in split_test_child.get_children():
-                                    groups_usage_info.update({
-                                        unicode(get_item_location(component)): [group_id]
-                                    })
+                _add_split_test_groups_usage(item, groups_usage_info)
 
             if groups_usage_info:
-                item_location = get_item_location(item)
+                item_location = _get_item_location(item)
                 item_content_groups = groups_usage_info.get(unicode(item_location), None)
 
             item_id = unicode(cls._id_modifier(item.scope_ids.usage_id))
@@ -230,25 +352,31 @@ class SearchIndexerBase(object):
             if skip_index or not item_index_dictionary:
                 return
 
-            item_index = {}
             # if it has something to add to the index, then add it
             try:
-                item_index.update(location_info)
-                item_index.update(item_index_dictionary)
-                item_index['id'] = item_id
-                if item.start:
-                    item_index['start_date'] = item.start
-                item_index['content_groups'] = item_content_groups if item_content_groups else None
-                item_index.update(cls.supplemental_fields(item))
-                items_index.append(item_index)
+                items_index.append(
+                    cls._build_item_index(item, item_id, location_info, item_index_dictionary, item_content_groups)
+                )
                 indexed_count["count"] += 1
-                return item_content_groups
             except Exception as err:  # pylint: disable=broad-except
                 # broad exception so that index operation does not fail on one item of many
                 log.warning('Could not index item: %s - %r', item.location, err)
                 error_list.append(_('Could not index item: {}').format(item.location))
+                return
+
+            # send the index dictionaries in batches, so that the bulk requests stay small
+            if len(items_index) >= INDEX_BATCH_SIZE:
+                searcher.index(cls.DOCUMENT_TYPE, items_index)
+                del items_index[:]
+            return item_content_groups
 
+        published_version = None
         try:
+            # the version of the published structure is read before indexing it, so that
+            # changes published while indexing are not considered indexed
+            if cls.SUPPORTS_INCREMENTAL_INDEX and triggered_at is None:
+                published_version = get_published_version(modulestore, structure_key)
+
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
                 structure = cls._fetch_top_level(modulestore, structure_key)
                 groups_usage_info = cls.fetch_group_usage(modulestore, structure)
@@ -273,8 +401,225 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        if published_version is not None:
+            cls._set_indexed_version(structure_key, published_version)
+        return indexed_count["count"]
+
+    @classmethod
+    def index_changes(cls, modulestore, structure_key, previous_version=None):
+        """
+        Process course for indexing, updating only the index of the items which changed
+        since a previously indexed version of the published course
+
+        The previously indexed published structure of the course is compared with the
+        current one, in split: the items which were added or changed are indexed again,
+        with their ancestors and descendants, and the items which were removed are
+        removed from the index. All the other items are left as they are in the index,
+        without being loaded. A full index takes place instead if the course is not in
+        split, or if the previously indexed version is not known.
+
+        Arguments:
+        modulestore - modulestore object to use for operations
+
+        structure_key (CourseKey) - course identifier
+
+        previous_version - version of the published structure that was indexed last;
+            if None, the version recorded by the last index of the course is used
+
+        Returns:
+        Number of items that have been added to the index
+        """
+        searcher = SearchEngine.get_search_engine(cls.INDEX_NAME)
+        if not searcher:
+            return
+
+        structure_key = cls.normalize_structure_key(structure_key)
+        if not cls.SUPPORTS_INCREMENTAL_INDEX:
+            return cls.index(modulestore, structure_key)
+
+        if previous_version is None:
+            previous_version = cls._get_indexed_version(structure_key)
+        published_version = get_published_version(modulestore, structure_key)
+        if published_version is None or previous_version is None:
+            return cls.index(modulestore, structure_key)
+        if unicode(published_version) == unicode(previous_version):
+            return 0
+
+        structure = get_published_structure(modulestore, structure_key, published_version)
+        previous_structure = get_published_structure(modulestore, structure_key, previous_version)
+        if structure is None or previous_structure is None:
+            return cls.index(modulestore, structure_key)
+
+        blocks_to_index, removed_blocks = get_published_structure_changes(previous_structure, structure)
+        log.info(
+            'Indexing changes of %s; items to index: %d, items to remove: %d, total: %d.',
+            structure_key,
+            len(blocks_to_index),
+            len(removed_blocks),
+            len(structure['blocks']),
+        )
+
+        error_list = []
+        location_info = cls._get_location_info(structure_key)
+        indexed_count = {
+            "count": 0
+        }
+        items_index = []
+        items = {}
+        # content groups of the items, as returned by `prepare_item_index`
+        items_content_groups = {}
+        # changed items which no longer have a document in the index
+        unindexed_blocks = []
+
+        def get_usage_key(block_key):
+            """
+            Gets the usage key of the block with the given key in the structure
+            """
+            return structure_key.for_branch(None).make_usage_key(block_key.type, block_key.id)
+
+        def get_item_content_groups(block_key, groups_usage_info):
+            """
+            Gets the content groups of the item, as `index` does
+            """
+            if block_key not in items_content_groups:
+                items_content_groups[block_key] = prepare_item_index(block_key, groups_usage_info)
+            return items_content_groups[block_key]
+
+        def prepare_item_index(block_key, groups_usage_info):
+            """
+            Add the item to the items_index if it is to be indexed
+
+            Items which are not to be indexed are only loaded when their content
+            groups are needed to find those of a container to be indexed.  Changed
+            items which cannot be loaded or which no longer have an index dictionary
+            are added to unindexed_blocks, so that their documents are removed.
+
+            Returns:
+            item_content_groups - content groups assigned to the item
+            """
+            item = items.get(block_key)
+            if item is None:
+                try:
+                    item = modulestore.get_item(get_usage_key(block_key))
+                except ItemNotFoundError:
+                    if block_key in blocks_to_index:
+                        unindexed_blocks.append(block_key)
+                    return None
+
+            is_indexable = hasattr(item, "index_dictionary")
+            item_index_dictionary = item.index_dictionary() if is_indexable else None
+            if not item_index_dictionary and block_key in blocks_to_index:
+                unindexed_blocks.append(block_key)
+            if not item_index_dictionary and not item.has_children:
+                return None
+
+            item_content_groups = None
+            if groups_usage_info:
+                item_content_groups = groups_usage_info.get(unicode(_get_item_location(item)), None)
+            # the content groups of a container are only kept if all of its children have some
+            if item_content_groups and item.has_children:
+                for child_key in structure['blocks'][block_key].fields.get('children', []):
+                    if get_item_content_groups(child_key, groups_usage_info) is None:
+                        item_content_groups = None
+                        break
+
+            if not item_index_dictionary:
+                return None
+            if block_key not in blocks_to_index:
+                return item_content_groups
+
+            item_id = unicode(cls._id_modifier(item.scope_ids.usage_id))
+            try:
+                items_index.append(
+                    cls._build_item_index(item, item_id, location_info, item_index_dictionary, item_content_groups)
+                )
+                indexed_count["count"] += 1
+            except Exception as err:  # pylint: disable=broad-except
+                # broad exception so that index operation does not fail on one item of many
+                log.warning('Could not index item: %s - %r', item.location, err)
+                error_list.append(_('Could not index item: {}').format(item.location))
+                return None
+
+            if len(items_index) >= INDEX_BATCH_SIZE:
+                searcher.index(cls.DOCUMENT_TYPE, items_index)
+                del items_index[:]
+            return item_content_groups
+
+        try:
+            with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
+                structure_item = cls._fetch_top_level(modulestore, structure_key, depth=0)
+                groups_usage_info = cls.fetch_group_usage(modulestore, structure_item)
+                cls.supplemental_index_information(modulestore, structure_item)
+
+                # the experiment groups of the items are found from all of the split tests, as they
+                # are not walked through
+                if groups_usage_info is not None:
+                    for split_test in modulestore.get_items(structure_key, qualifiers={'category': 'split_test'}):
+                        _add_split_test_groups_usage(split_test, groups_usage_info)
+
+                # load all of the items to index at once
+                if blocks_to_index:
+                    for item in modulestore.get_items(
+                            structure_key, qualifiers={'name': [block_key.id for block_key in blocks_to_index]}
+                    ):
+                        items[(item.location.block_type, item.location.block_id)] = item
+
+                for block_key in blocks_to_index:
+                    get_item_content_groups(block_key, groups_usage_info)
+                if items_index:
+                    searcher.index(cls.DOCUMENT_TYPE, items_index)
+
+                removed_ids = [
+                    unicode(cls._id_modifier(get_usage_key(block_key)))
+                    for block_key in itertools.chain(removed_blocks, unindexed_blocks)
+                ]
+                for start in xrange(0, len(removed_ids), INDEX_BATCH_SIZE):
+                    searcher.remove(cls.DOCUMENT_TYPE, removed_ids[start:start + INDEX_BATCH_SIZE])
+        except Exception as err:  # pylint: disable=broad-except
+            # broad exception so that index operation does not prevent the rest of the application from working
+            log.exception(
+                "Indexing error encountered, courseware index may be out of date %s - %r",
+                structure_key,
+                err
+            )
+            error_list.append(_('General indexing error occurred'))
+
+        if error_list:
+            raise SearchIndexingError('Error(s) present during indexing', error_list)
+
+        cls._set_indexed_version(structure_key, published_version)
         return indexed_count["count"]
 
+    @classmethod
+    def _indexed_version_cache_key(cls, structure_key):
+        """ Key of the cache entry holding the version of the published structure that was indexed last """
+        return u'{}.indexed_version.{}'.format(cls.INDEX_NAME, structure_key)
+
+    @classmethod
+    def _get_indexed_version(cls, structure_key):
+        """ Gets the version of the published structure that was indexed last, if known """
+        return cache.get(cls._indexed_version_cache_key(structure_key))
+
+    @classmethod
+    def _set_indexed_version(cls, structure_key, version):
+        """ Records the version of the published structure that was indexed last """
+        cache.set(cls._indexed_version_cache_key(structure_key), unicode(version), None)
+
+    @classmethod
+    def _build_item_index(cls, item, item_id, location_info, item_index_dictionary, item_content_groups):
+        """
+        Builds the index dictionary of the item
+        """
+        item_index = {}
+        item_index.update(location_info)
+        item_index.update(item_index_dictionary)
+        item_index['id'] = item_id
+        if item.start:
+            item_index['start_date'] = item.start
+        item_index['content_groups'] = item_content_groups if item_content_groups else None
+        item_index.update(cls.supplemental_fields(item))
+        return item_index
+
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
         """
@@ -346,6 +691,7 @@ class CoursewareSearchIndexer(SearchIndexerBase):
     INDEX_NAME = "courseware_index"
     DOCUMENT_TYPE = "courseware_content"
     ENABLE_INDEXING_KEY = 'ENABLE_COURSEWARE_INDEX'
+    SUPPORTS_INCREMENTAL_INDEX = True
 
     INDEX_EVENT = {
         'name': 'edx.course.index.reindexed',
@@ -360,9 +706,9 @@ class CoursewareSearchIndexer(SearchIndexerBase):
         return structure_key
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_course(structure_key, depth=None)
+        return modulestore.get_course(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
@@ -448,9 +794,9 @@ class LibrarySearchIndexer(SearchIndexerBase):
         return normalize_key_for_search(structure_key)
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_library(structure_key, depth=None)
+        return modulestore.get_library(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
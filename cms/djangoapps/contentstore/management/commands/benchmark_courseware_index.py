@@ -0,0 +1,78 @@
+"""
+Command to compare the time taken by full and incremental indexing of a course.
+"""
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from contentstore.courseware_index import CoursewareSearchIndexer, get_published_structure, get_published_version
+from xmodule.modulestore.django import modulestore
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py cms benchmark_courseware_index course-v1:edX+DemoX+Demo_Course --settings=devstack
+        $ ./manage.py cms benchmark_courseware_index course-v1:edX+DemoX+Demo_Course --iterations 5
+
+    Large courses can be created with the generate_courses command. Both kinds of
+    indexing update the search index of the course, like reindex_course does.
+    """
+    help = (
+        u'Compares the time taken by a full index of a course in split, and by an incremental index '
+        u'of the changes since a previous version of its published structure.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id')
+        parser.add_argument(
+            '--previous-version',
+            help=u'Version of the published structure to index the changes from; '
+                 u'defaults to the version preceding the current one.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times the course is indexed in each way.',
+            default=3,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course_key = CourseKey.from_string(options['course_id'])
+        except InvalidKeyError:
+            raise CommandError(u'Invalid course_key: {}'.format(options['course_id']))
+
+        store = modulestore()
+        version = get_published_version(store, course_key)
+        if version is None:
+            raise CommandError(u'{} has no published structure in split'.format(course_key))
+
+        previous_version = options['previous_version']
+        if previous_version is None:
+            previous_version = get_published_structure(store, course_key, version).get('previous_version')
+            if previous_version is None:
+                raise CommandError(u'{} has no previous published structure'.format(course_key))
+
+        indexing = (
+            (u'full', lambda: CoursewareSearchIndexer.index(store, course_key)),
+            (
+                u'incremental',
+                lambda: CoursewareSearchIndexer.index_changes(store, course_key, previous_version=previous_version),
+            ),
+        )
+        for indexing_name, index in indexing:
+            elapsed = 0
+            for _ in xrange(options['iterations']):
+                start = default_timer()
+                indexed_count = index()
+                elapsed += default_timer() - start
+            self.stdout.write(
+                u'{indexing:<12} {per_index:8.3f} s per index, {count} items indexed'.format(
+                    indexing=indexing_name,
+                    per_index=elapsed / options['iterations'],
+                    count=indexed_count,
+                )
+            )
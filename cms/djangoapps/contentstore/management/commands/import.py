@@ -1,6 +1,7 @@
 """
 Script for importing courseware from XML format
 """
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django_comment_common.utils import are_permissions_roles_seeded, seed_permissions_roles
 from lms.djangoapps.dashboard.git_import import DEFAULT_PYTHON_LIB_FILENAME
@@ -66,6 +67,8 @@ class Command(BaseCommand):
             do_import_static=do_import_static, do_import_python_lib=do_import_python_lib,
             create_if_not_present=True,
             python_lib_filename=python_lib_filename,
+            # the command is also run by the LMS git import, whose settings may not define it
+            static_content_workers=getattr(settings, 'COURSE_IMPORT_STATIC_CONTENT_WORKERS', 1),
         )
 
         for course in course_items:
@@ -31,6 +31,7 @@ from user_tasks.models import UserTaskArtifact, UserTaskStatus
 from user_tasks.tasks import UserTask
 
 import dogstats_wrapper as dog_stats_api
+from contentstore.config import waffle
 from contentstore.courseware_index import CoursewareSearchIndexer, LibrarySearchIndexer, SearchIndexingError
 from contentstore.storage import course_import_export_storage
 from contentstore.utils import initialize_permissions, reverse_usage_url
@@ -164,7 +165,12 @@ def update_search_index(course_id, triggered_time_isoformat):
     """ Updates course search index. """
     try:
         course_key = CourseKey.from_string(course_id)
-        CoursewareSearchIndexer.index(modulestore(), course_key, triggered_at=(_parse_time(triggered_time_isoformat)))
+        if waffle.waffle().is_enabled(waffle.ENABLE_INCREMENTAL_COURSEWARE_INDEX):
+            CoursewareSearchIndexer.index_changes(modulestore(), course_key)
+        else:
+            CoursewareSearchIndexer.index(
+                modulestore(), course_key, triggered_at=(_parse_time(triggered_time_isoformat))
+            )
 
     except SearchIndexingError as exc:
         LOGGER.error(u'Search indexing error for complete course %s - %s', course_id, text_type(exc))
@@ -508,7 +514,8 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
                 settings.GITHUB_REPO_ROOT, [dirpath],
                 load_error_modules=False,
                 static_content_store=contentstore(),
-                target_id=courselike_key
+                target_id=courselike_key,
+                static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
             )
 
         new_location = courselike_items[0].location
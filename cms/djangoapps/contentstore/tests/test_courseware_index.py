@@ -4,14 +4,14 @@ Testing indexing of the courseware as it is changed
 import json
 import time
 from datetime import datetime
-from unittest import skip
+from unittest import TestCase, skip
 from uuid import uuid4
 
 import ddt
 import pytest
 from django.conf import settings
 from lazy.lazy import lazy
-from mock import patch
+from mock import Mock, patch
 from pytz import UTC
 from search.search_engine_base import SearchEngine
 
@@ -19,7 +19,8 @@ from contentstore.courseware_index import (
     CourseAboutSearchIndexer,
     CoursewareSearchIndexer,
     LibrarySearchIndexer,
-    SearchIndexingError
+    SearchIndexingError,
+    get_published_structure_changes
 )
 from contentstore.signals.handlers import listen_for_course_publish, listen_for_library_update
 from contentstore.tests.utils import CourseTestCase
@@ -536,6 +537,68 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         self.assertEqual(result["course_name"], "Search Index Test Course")
         self.assertEqual(result["location"], ["Week 1", CoursewareSearchIndexer.UNNAMED_MODULE_NAME, "Subsection 2"])
 
+    def _test_index_changes(self, store):
+        """ Test that only the changes since the last index are indexed """
+        self.publish_item(store, self.vertical.location)
+        self.reindex_course(store)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
+        # nothing changed since the last index
+        with patch.object(CoursewareSearchIndexer, 'index') as mock_index:
+            self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id), 0)
+        self.assertFalse(mock_index.called)
+
+        # adding a unit indexes it, along with its container and the ancestors of its container
+        html_unit2 = ItemFactory.create(
+            parent_location=self.vertical.location,
+            category="html",
+            display_name="Some other content",
+            publish_item=False,
+            modulestore=store,
+        )
+        self.publish_item(store, self.vertical.location)
+        with patch.object(CoursewareSearchIndexer, 'index') as mock_index:
+            self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id), 5)
+        self.assertFalse(mock_index.called)
+        response = self.search()
+        self.assertEqual(response["total"], 5)
+
+        # renaming a container indexes its descendants with their new location
+        self.sequential.display_name = "Lesson 1 renamed"
+        self.update_item(store, self.sequential)
+        self.publish_item(store, self.sequential.location)
+        CoursewareSearchIndexer.index_changes(store, self.course.id)
+        response = self.search(query_string="Html Content")
+        self.assertEqual(response["results"][0]["data"]["location"], ["Week 1", "Lesson 1 renamed", "Subsection 1"])
+
+        # deleting a unit removes it from the index
+        self.delete_item(store, html_unit2.location)
+        self.publish_item(store, self.vertical.location)
+        CoursewareSearchIndexer.index_changes(store, self.course.id)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
+        # a changed unit which no longer has an index dictionary is removed from the index
+        self.html_unit.data = "<p>Emptied</p>"
+        self.update_item(store, self.html_unit)
+        self.publish_item(store, self.vertical.location)
+        with patch('xmodule.html_module.HtmlDescriptor.index_dictionary', return_value={}):
+            CoursewareSearchIndexer.index_changes(store, self.course.id)
+        response = self.search()
+        self.assertEqual(response["total"], 3)
+        self.assertNotIn(
+            unicode(self.html_unit.location),
+            [result["data"]["id"] for result in response["results"]],
+        )
+
+    def _test_index_changes_unknown_version(self, store):
+        """ Test that the whole course is indexed when the version last indexed is not known """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(CoursewareSearchIndexer.index_changes(store, self.course.id, previous_version='0' * 24), 4)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
     @patch('django.conf.settings.SEARCH_ENGINE', 'search.tests.utils.ErroringIndexEngine')
     def _test_exception(self, store):
         """ Test that exception within indexing yields a SearchIndexingError """
@@ -600,6 +663,63 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         """ Test for removing course from CourseAboutSearchIndexer """
         self._perform_test_using_store(store_type, self._test_delete_course_from_search_index_after_course_deletion)
 
+    def test_index_changes(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_index_changes)
+
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_index_changes_unknown_version(self, store_type):
+        self._perform_test_using_store(store_type, self._test_index_changes_unknown_version)
+
+
+@ddt.ddt
+class TestPublishedStructureChanges(TestCase):
+    """ Tests the comparison of published structures by get_published_structure_changes """
+
+    def create_structure(self, children_map, update_versions=None):
+        """
+        Returns a structure with a block for each of the entries of the children_map,
+        with the given update versions
+        """
+        update_versions = update_versions or {}
+        return {
+            'root': 0,
+            'blocks': {
+                block_key: Mock(
+                    fields={'children': children},
+                    edit_info=Mock(update_version=update_versions.get(block_key, 'v1')),
+                )
+                for block_key, children in children_map.iteritems()
+            },
+        }
+
+    @ddt.data(
+        # (children_map, updated blocks, expected blocks to index)
+        ({0: [1, 2], 1: [3], 2: [], 3: []}, {}, set()),
+        ({0: [1, 2], 1: [3], 2: [], 3: []}, {3: 'v2'}, {1, 3}),
+        ({0: [1, 2], 1: [3], 2: [], 3: []}, {1: 'v2'}, {1, 3}),
+        ({0: [1, 2], 1: [3], 2: [], 3: []}, {0: 'v2'}, {1, 2, 3}),
+    )
+    @ddt.unpack
+    def test_updated_blocks(self, children_map, update_versions, expected_blocks_to_index):
+        previous_structure = self.create_structure(children_map)
+        structure = self.create_structure(children_map, update_versions)
+        self.assertEqual(
+            get_published_structure_changes(previous_structure, structure),
+            (expected_blocks_to_index, set())
+        )
+
+    def test_moved_and_removed_blocks(self):
+        previous_structure = self.create_structure({0: [1, 2], 1: [3, 5], 2: [4], 3: [], 4: [], 5: []})
+        # 3 is moved from 1 to 2, 4 and 5 are removed, and 6 is added
+        structure = self.create_structure(
+            {0: [1, 2], 1: [6], 2: [3], 3: [], 4: [], 6: []},
+            {1: 'v2', 2: 'v2', 6: 'v2'},
+        )
+        self.assertEqual(
+            get_published_structure_changes(previous_structure, structure),
+            ({1, 2, 3, 6}, {4, 5})
+        )
+
 
 @patch('django.conf.settings.SEARCH_ENGINE', 'search.tests.utils.ForceRefreshElasticSearchEngine')
 @ddt.ddt
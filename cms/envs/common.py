@@ -496,6 +496,7 @@ MIDDLEWARE_CLASSES = [
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'util.sandboxing.ConfigureSafeExecPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -543,6 +544,25 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 # Paths to wrapper methods which should be applied to every XBlock's FieldData.
 XBLOCK_FIELD_DATA_WRAPPERS = ()
 
+############################ Contentserver Configuration ################################
+# Local tiers of the cache of course assets served by the contentserver, in front of
+# the "course_assets" cache and the contentstore.  Both tiers are disabled by default.
+CONTENTSERVER_LOCAL_CACHE = {
+    # Total size, in bytes, of the small assets kept in the memory of each process.
+    'MEMORY_SIZE': 0,
+    # Largest asset, in bytes, kept in memory.  Larger ones are spooled to disk.
+    'MEMORY_MAX_ITEM_SIZE': 1024 * 1024,
+    # Directory of the files of spooled assets.  None disables spooling.
+    'SPOOL_DIR': None,
+    # Total size, in bytes, of the spooled assets.
+    'SPOOL_SIZE': 10 * 1024 * 1024 * 1024,
+    # Largest asset, in bytes, spooled to disk.
+    'SPOOL_MAX_ITEM_SIZE': 512 * 1024 * 1024,
+    # Internal location of SPOOL_DIR in nginx, to serve spooled assets with X-Accel-Redirect.
+    # None serves them from the spooled files in Django.
+    'X_ACCEL_REDIRECT_PREFIX': None,
+}
+
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
@@ -594,6 +614,15 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of warm sandbox processes, with the assumed modules already
+    # imported, used to execute code that needs no extra files.
+    'pool': {
+        # Maximum number of sandbox processes per server process.  0 disables the pool.
+        'size': 0,
+        # How many executions before a sandbox process is replaced?
+        'max_executions': 100,
+    },
 }
 
 ############################ DJANGO_BUILTINS ################################
@@ -637,6 +666,10 @@ STATICFILES_DIRS = [
     # ("book", ENV_ROOT / "book_images"),
 ]
 
+# Number of seconds the text in which the static urls of course assets were replaced is
+# cached, under the version of the course assets.  0 disables the cache.
+STATIC_REPLACE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Locale/Internationalization
 TIME_ZONE = 'America/New_York'  # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 LANGUAGE_CODE = 'en'  # http://www.i18nguy.com/unicode/language-identifiers.html
@@ -661,6 +694,9 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
 COURSE_IMPORT_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Number of static files imported in parallel when importing a course
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 1
+
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
 
@@ -1180,8 +1216,7 @@ EVENT_TRACKING_BACKENDS = {
                 }
             },
             'processors': [
-                {'ENGINE': 'track.shim.LegacyFieldMappingProcessor'},
-                {'ENGINE': 'track.shim.PrefixedEventProcessor'}
+                {'ENGINE': 'track.shim.CompiledEventProcessor'}
             ]
         }
     },
@@ -1,11 +1,14 @@
+import hashlib
 import logging
 import re
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
+from django.core.cache import cache
 
 from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.versioning import get_course_assets_version
 
 from opaque_keys.edx.locator import AssetLocator
 from six import text_type
@@ -155,11 +158,81 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
     correct url in the contentstore (/c4x/.. or /asset-loc:..)
 
+    Course assets are looked up in the contentstore all at once, and the resulting text
+    is cached under the version of the course assets, for STATIC_REPLACE_CACHE_TIMEOUT
+    seconds.
+
     text: The source text to do the substitution in
     data_directory: The directory in which course data is stored
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    if '/static/' not in text and not (settings.STATIC_URL and settings.STATIC_URL in text):
+        # There is nothing to replace.
+        return text
+
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    use_contentstore = (not static_asset_path) and course_id
+    data_dir = static_asset_path or data_directory
+    exists_in_staticfiles_storage = {}
+
+    def is_in_staticfiles_storage(rest):
+        """
+        Returns whether the url is a piece of static content which is in the edx-platform repo
+        (e.g. JS associated with an xmodule), looking each url up once.
+        """
+        if rest not in exists_in_staticfiles_storage:
+            exists_in_staticfiles_storage[rest] = False
+            try:
+                exists_in_staticfiles_storage[rest] = staticfiles_storage.exists(rest)
+            except Exception as err:
+                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                    rest, str(err)))
+        return exists_in_staticfiles_storage[rest]
+
+    def is_course_asset(rest):
+        """
+        Returns whether the url is one of courseware specific content, in the contentstore.
+        """
+        # Don't mess with things that end in '?raw'
+        if rest.endswith('?raw'):
+            return False
+        # In debug mode, if we can find the url as is,
+        if settings.DEBUG and finders.find(rest, True):
+            return False
+        return not is_in_staticfiles_storage(rest)
+
+    canonicalized_urls = {}
+    cache_key = None
+    if use_contentstore:
+        # Import is placed here to avoid model import at project startup.
+        from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+        base_url = AssetBaseUrlConfig.get_base_url()
+        excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+
+        if not settings.DEBUG and getattr(settings, 'STATIC_REPLACE_CACHE_TIMEOUT', 0):
+            cache_key = _replaced_text_cache_key(text, data_dir, course_id, base_url, excluded_exts)
+            if cache_key is not None:
+                replaced_text = cache.get(cache_key)
+                if replaced_text is not None:
+                    return replaced_text
+
+        # First find the urls of all of the course assets in the text, to look them up at once.
+        asset_paths = []
+
+        def collect_asset_path(original, prefix, quote, rest):  # pylint: disable=unused-argument
+            """
+            Collect the url if it is one of a course asset.
+            """
+            if rest not in asset_paths and is_course_asset(rest):
+                asset_paths.append(rest)
+            return original
+
+        process_static_urls(text, collect_asset_path, data_dir=data_dir)
+        if asset_paths:
+            canonicalized_urls = StaticContent.get_canonicalized_asset_paths(
+                course_id, asset_paths, base_url, excluded_exts
+            )
 
     def replace_static_url(original, prefix, quote, rest):
         """
@@ -172,35 +245,22 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         # In debug mode, if we can find the url as is,
         if settings.DEBUG and finders.find(rest, True):
             return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
+        elif use_contentstore:
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
+            if is_in_staticfiles_storage(rest):
                 url = staticfiles_storage.url(rest)
             else:
-                # if not, then assume it's courseware specific content and then look in the
+                # if not, then it's courseware specific content, which was looked up in the
                 # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+                url = canonicalized_urls[rest]
 
                 if AssetLocator.CANONICAL_NAMESPACE in url:
                     url = url.replace('block@', 'block/', 1)
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+            course_path = "/".join((data_dir, rest))
 
             try:
                 if staticfiles_storage.exists(rest):
@@ -215,4 +275,29 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    replaced_text = process_static_urls(text, replace_static_url, data_dir=data_dir)
+    if cache_key is not None:
+        cache.set(cache_key, replaced_text, settings.STATIC_REPLACE_CACHE_TIMEOUT)
+    return replaced_text
+
+
+def _replaced_text_cache_key(text, data_dir, course_id, base_url, excluded_exts):
+    """
+    Returns the cache key of the text with the static urls of the given course replaced,
+    for the current version of the course assets, or None if there is no such version.
+    """
+    assets_version = get_course_assets_version(course_id)
+    if assets_version is None:
+        return None
+
+    hasher = hashlib.sha1()
+    parts = (
+        getattr(settings, 'EDX_PLATFORM_REVISION', u''), settings.STATIC_URL, text_type(course_id), assets_version,
+        data_dir or u'', base_url, u','.join(excluded_exts), text,
+    )
+    for part in parts:
+        if isinstance(part, text_type):
+            part = part.encode('utf-8')
+        hasher.update(part)
+        hasher.update('\0')
+    return 'static_replace.{}'.format(hasher.hexdigest())
@@ -7,6 +7,7 @@ from urlparse import parse_qsl, urlparse, urlunparse
 
 import ddt
 import pytest
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import override_settings
 from django.utils.http import urlencode, urlquote
 from mock import Mock, patch
@@ -122,7 +123,7 @@ def test_storage_url_not_exists(mock_storage):
 def test_mongo_filestore(mock_get_excluded_extensions, mock_get_base_url, mock_modulestore, mock_static_content):
 
     mock_modulestore.return_value = Mock(MongoModuleStore)
-    mock_static_content.get_canonicalized_asset_path.return_value = "c4x://mock_url"
+    mock_static_content.get_canonicalized_asset_paths.return_value = {'file.png': "c4x://mock_url"}
     mock_get_base_url.return_value = u''
     mock_get_excluded_extensions.return_value = ['foobar']
 
@@ -131,11 +132,45 @@ def test_mongo_filestore(mock_get_excluded_extensions, mock_get_base_url, mock_m
 
     # Namespace => content url
     assert_equals(
-        '"' + mock_static_content.get_canonicalized_asset_path.return_value + '"',
+        '"c4x://mock_url"',
         replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, course_id=COURSE_KEY)
     )
 
-    mock_static_content.get_canonicalized_asset_path.assert_called_once_with(COURSE_KEY, 'file.png', u'', ['foobar'])
+    mock_static_content.get_canonicalized_asset_paths.assert_called_once_with(
+        COURSE_KEY, ['file.png'], u'', ['foobar']
+    )
+
+
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.get_course_assets_version')
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.cache', LocMemCache('static_replace', {}))
+@patch('static_replace.models.AssetBaseUrlConfig.get_base_url', Mock(return_value=u''))
+@patch('static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions', Mock(return_value=[]))
+def test_replaced_text_cached(mock_storage, mock_get_course_assets_version, mock_static_content):
+    mock_storage.exists.return_value = False
+    mock_get_course_assets_version.return_value = 'version1'
+    mock_static_content.get_canonicalized_asset_paths.return_value = {'file.png': "c4x://mock_url"}
+    source = '<img src="/static/file.png"/><img src="/static/file.png"/>'
+    expected = '<img src="c4x://mock_url"/><img src="c4x://mock_url"/>'
+
+    # The course assets are looked up at once, and the text cached.
+    assert_equals(expected, replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY))
+    assert_equals(expected, replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY))
+    mock_static_content.get_canonicalized_asset_paths.assert_called_once_with(
+        COURSE_KEY, ['file.png'], u'', []
+    )
+    mock_storage.exists.assert_called_once_with('file.png')
+
+    # The text is replaced again once the course assets change.
+    mock_get_course_assets_version.return_value = 'version2'
+    assert_equals(expected, replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY))
+    assert_equals(mock_static_content.get_canonicalized_asset_paths.call_count, 2)
+
+    # The cache can be disabled.
+    with override_settings(STATIC_REPLACE_CACHE_TIMEOUT=0):
+        assert_equals(expected, replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY))
+    assert_equals(mock_static_content.get_canonicalized_asset_paths.call_count, 3)
 
 
 @patch('static_replace.settings', autospec=True)
@@ -571,6 +606,27 @@ class CanonicalContentTest(SharedModuleStoreTestCase):
             print asset_path
             self.assertIsNotNone(re.match(expected, asset_path))
 
+    @ddt.data('split', 'old')
+    def test_canonical_asset_paths(self, prefix):
+        exts = ['.html', '.tm']
+        paths = [
+            u'/static/{}_ünlöck.png'.format(prefix),
+            u'/static/{}_lock.png'.format(prefix),
+            u'special/{}_lock.png'.format(prefix),
+            u'{}_excluded.html'.format(prefix),
+            u'missing.png',
+            u'/static/{0}_not_excluded.htm?foo=/static/{0}_ünlöck.png'.format(prefix),
+        ]
+        # All of the assets are looked up at once.
+        with check_mongo_calls(1):
+            asset_paths = StaticContent.get_canonicalized_asset_paths(self.courses[prefix].id, paths, u'dev', exts)
+
+        for path in paths:
+            self.assertEqual(
+                asset_paths[path],
+                StaticContent.get_canonicalized_asset_path(self.courses[prefix].id, path, u'dev', exts)
+            )
+
     @ddt.data(
         # No leading slash.
         (u'', u'{prfx}_ünlöck.png', u'/{c4x}/{prfx}_ünlöck.png', 1),
@@ -0,0 +1,227 @@
+"""
+Event tracker backend that buffers events in memory, and sends them in
+batches to another backend from a background thread, outside of the
+requests that emitted them.
+
+The wrapped backend is configured like the backends in TRACKING_BACKENDS::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'flush_interval': 1.0,
+              'overflow_policy': 'drop',
+          }
+      }
+  }
+
+Events are lost when the process is killed before they are sent. Events
+emitted after the backend is closed are sent to the wrapped backend
+directly.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from Queue import Empty, Full, Queue
+
+from django.db import InterfaceError, OperationalError, close_old_connections, connections
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop', 'block')
+
+_BACKENDS = weakref.WeakSet()
+
+# Queued on close to wake up the background thread.
+_STOP = object()
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events, and sends them to another
+    backend in batches from a background thread.
+    """
+
+    def __init__(
+            self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+            overflow_policy='drop', block_timeout=0.1, close_timeout=5.0, **kwargs
+    ):
+        """
+        :Parameters:
+
+          - `backend`: the configuration of the wrapped backend, a dict with
+            an `ENGINE` and optional `OPTIONS`
+          - `max_queue_size`: maximum number of events waiting to be sent
+          - `batch_size`: number of events sent at once
+          - `flush_interval`: maximum number of seconds an event waits for
+            its batch to be full before being sent
+          - `overflow_policy`: what to do with events emitted while the
+            queue is full: `drop` them, or `block` the request for up to
+            `block_timeout` seconds for room in the queue, then drop them
+          - `close_timeout`: maximum number of seconds spent sending the
+            queued events when the process exits
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError('Invalid overflow policy {}'.format(overflow_policy))
+
+        # Imported here, as the tracker instantiates the backends when it is imported.
+        from track.tracker import _instantiate_backend_from_name  # pylint: disable=protected-access
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.tags = [u'backend:{}'.format(type(self.backend).__name__)]
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.close_timeout = close_timeout
+
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stopping = None
+        _BACKENDS.add(self)
+
+    def send(self, event):
+        """Queue the event to be sent, or drop it if the queue is full."""
+        queue = self._ensure_started()
+        if self._stopping.is_set():
+            # The background thread is stopped, or only sends the events
+            # already queued, so the event is sent from the request.
+            self.backend.send(event)
+            return
+        try:
+            if self.overflow_policy == 'block':
+                queue.put(event, timeout=self.block_timeout)
+            else:
+                queue.put_nowait(event)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+            dog_stats_api.increment('track.buffered.dropped', tags=self.tags)
+
+    def close(self, timeout=None):
+        """
+        Stop the background thread once it has sent the queued events, waiting
+        for up to `timeout` seconds, and return whether it stopped.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid():
+                return True
+            self._stopping.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except Full:
+            # The thread is busy sending events, and will see it is stopping.
+            pass
+        thread.join(self.close_timeout if timeout is None else timeout)
+        return not thread.is_alive()
+
+    def _ensure_started(self):
+        """
+        Start the background thread, in this process, if not done yet, and
+        return the queue it sends events from.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._queue
+        with self._lock:
+            # Threads are not inherited by forked processes, so each process
+            # starts its own, with its own queue.
+            if self._pid != pid:
+                self._queue = Queue(self.max_queue_size)
+                self._stopping = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='track.backends.buffered')
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = pid
+            return self._queue
+
+    def _run(self):
+        """Send the queued events in batches, until stopped."""
+        while not self._stopping.is_set():
+            batch = self._get_batch(wait=True)
+            if batch:
+                self._send_batch(batch)
+
+        # Send the events queued before stopping.
+        while True:
+            batch = self._get_batch(wait=False)
+            if not batch:
+                return
+            self._send_batch(batch)
+
+    def _get_batch(self, wait):
+        """
+        Return up to `batch_size` queued events. If `wait`, wait up to
+        `flush_interval` seconds for the first one, then up to
+        `flush_interval` seconds more for the batch to be full.
+        """
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if wait and remaining > 0 and not self._stopping.is_set():
+                    event = self._queue.get(timeout=remaining)
+                else:
+                    event = self._queue.get_nowait()
+            except Empty:
+                break
+            if event is _STOP:
+                continue
+            if not batch:
+                deadline = time.time() + self.flush_interval
+            batch.append(event)
+        return batch
+
+    def _send_batch(self, batch):
+        """
+        Send a batch of events to the wrapped backend, retrying once on a new
+        database connection when the connection of the thread is broken.
+        """
+        dog_stats_api.gauge('track.buffered.queue_depth', self._queue.qsize(), tags=self.tags)
+        dog_stats_api.histogram('track.buffered.batch_size', len(batch), tags=self.tags)
+        # The thread outlives the requests, which close their database connections
+        # once too old or broken, so it closes its own.
+        close_old_connections()
+        try:
+            try:
+                self.backend.send_batch(batch)
+            except (OperationalError, InterfaceError):
+                log.warning(u'Retrying %d events for the %s event tracker backend', len(batch), self.tags[0])
+                for connection in connections.all():
+                    connection.close()
+                self.backend.send_batch(batch)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Error sending %d events to the %s event tracker backend', len(batch), self.tags[0])
+            dog_stats_api.increment('track.buffered.failed', len(batch), tags=self.tags)
+
+
+@atexit.register
+def _close_backends():
+    """Send the queued events of all the buffered backends when the process exits."""
+    for backend in list(_BACKENDS):
+        if not backend.close():
+            log.warning(u'Events queued for the %s event tracker backend were lost on exit', backend.tags[0])
@@ -11,7 +11,7 @@ from __future__ import absolute_import
 
 import logging
 
-from django.db import models
+from django.db import InterfaceError, OperationalError, models
 
 from track.backends import BaseBackend
 
@@ -74,9 +74,29 @@ class DjangoBackend(BaseBackend):
         self.name = name
 
     def send(self, event):
-        field_values = {x: event.get(x, '') for x in LOGFIELDS}
-        tldat = TrackingLog(**field_values)
+        tldat = self._tracking_log(event)
         try:
             tldat.save(using=self.name)
         except Exception as e:  # pylint: disable=broad-except
             log.exception(e)
+
+    def send_batch(self, events):
+        """
+        Save the events with a single bulk insert. Errors of the database
+        connection are raised, so that the events can be sent again. On other
+        errors, the events are saved one at a time, so that only the events
+        which cannot be saved are lost.
+        """
+        try:
+            TrackingLog.objects.using(self.name).bulk_create([self._tracking_log(event) for event in events])
+        except (OperationalError, InterfaceError):
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            log.exception(e)
+            for event in events:
+                self.send(event)
+
+    def _tracking_log(self, event):
+        """Returns an unsaved TrackingLog for the event."""
+        field_values = {x: event.get(x, '') for x in LOGFIELDS}
+        return TrackingLog(**field_values)
@@ -0,0 +1,143 @@
+"""Tests for the buffered event tracker backend."""
+from __future__ import absolute_import
+
+import threading
+
+from django.db import OperationalError
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend that records the batches of events sent to it."""
+
+    def __init__(self, **kwargs):
+        super(RecordingBackend, self).__init__(**kwargs)
+        self.batches = []
+        self.receiving = threading.Event()
+        self.sent = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.receiving.set()
+        self.release.wait()
+        self.batches.append(list(events))
+        self.sent.set()
+
+
+class BrokenConnectionBackend(RecordingBackend):
+    """Backend whose database connection is broken for its first `failures` batches."""
+
+    def __init__(self, failures=0, **kwargs):
+        super(BrokenConnectionBackend, self).__init__(**kwargs)
+        self.failures = failures
+
+    def send_batch(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError('MySQL server has gone away')
+        super(BrokenConnectionBackend, self).send_batch(events)
+
+
+class TestBufferedBackend(TestCase):
+    def create_backend(
+            self, engine='track.backends.tests.test_buffered.RecordingBackend', engine_options=None, **options
+    ):
+        """Returns a buffered backend wrapping a RecordingBackend, closed after the test."""
+        backend = BufferedBackend(
+            backend={'ENGINE': engine, 'OPTIONS': engine_options or {}},
+            **options
+        )
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_batch_size(self):
+        backend = self.create_backend(batch_size=2, flush_interval=60)
+        for event in range(5):
+            backend.send({'test': event})
+        self.assertTrue(backend.close())
+        self.assertEqual(
+            backend.backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]]
+        )
+
+    def test_flush_interval(self):
+        backend = self.create_backend(batch_size=100, flush_interval=0.01)
+        backend.send({'test': 1})
+        self.assertTrue(backend.backend.sent.wait(5))
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+
+    def test_close(self):
+        backend = self.create_backend(batch_size=100, flush_interval=60)
+        backend.send({'test': 1})
+        self.assertTrue(backend.close())
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+
+    def test_drop_when_full(self):
+        backend = self.create_backend(max_queue_size=1, batch_size=1, flush_interval=60)
+        backend.backend.release.clear()
+        backend.send({'test': 1})
+        # The first event is taken from the queue by the blocked thread.
+        self.assertTrue(backend.backend.receiving.wait(5))
+        backend.send({'test': 2})
+        backend.send({'test': 3})
+        self.assertEqual(backend.dropped, 1)
+
+        backend.backend.release.set()
+        self.assertTrue(backend.close())
+        self.assertEqual(backend.backend.batches, [[{'test': 1}], [{'test': 2}]])
+
+    def test_block_when_full(self):
+        backend = self.create_backend(
+            max_queue_size=1, batch_size=1, flush_interval=60, overflow_policy='block', block_timeout=0.01
+        )
+        backend.backend.release.clear()
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        backend.send({'test': 3})
+        self.assertGreaterEqual(backend.dropped, 1)
+        backend.backend.release.set()
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            self.create_backend(overflow_policy='wait')
+
+    def test_send_after_close(self):
+        backend = self.create_backend(batch_size=100, flush_interval=60)
+        backend.send({'test': 1})
+        self.assertTrue(backend.close())
+        backend.send({'test': 2})
+        self.assertEqual(backend.backend.batches, [[{'test': 1}], [{'test': 2}]])
+
+    @patch('track.backends.buffered.close_old_connections')
+    def test_retry_on_broken_connection(self, close_old_connections):
+        backend = self.create_backend(
+            engine='track.backends.tests.test_buffered.BrokenConnectionBackend',
+            engine_options={'failures': 1},
+            batch_size=1,
+            flush_interval=60,
+        )
+        backend.send({'test': 1})
+        self.assertTrue(backend.close())
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+        self.assertTrue(close_old_connections.called)
+
+    def test_next_batch_after_broken_connection(self):
+        backend = self.create_backend(
+            engine='track.backends.tests.test_buffered.BrokenConnectionBackend',
+            engine_options={'failures': 2},
+            batch_size=1,
+            flush_interval=60,
+        )
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        self.assertTrue(backend.close())
+        # The first batch fails on both attempts, the next one gets through.
+        self.assertEqual(backend.backend.batches, [[{'test': 2}]])
@@ -0,0 +1,145 @@
+"""
+Command to compare the cost per event of the tracking log processors.
+"""
+import copy
+import datetime
+import random
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from track.shim import CompiledEventProcessor, LegacyFieldMappingProcessor, PrefixedEventProcessor
+
+CONTEXT = {
+    u'accept_language': u'en-US,en;q=0.8',
+    u'agent': u'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/55.0 Safari/537.36',
+    u'client_id': u'1234567890.1234567890',
+    u'course_id': u'course-v1:edX+DemoX+Demo_Course',
+    u'course_user_tags': {},
+    u'host': u'courses.example.com',
+    u'ip': u'127.0.0.1',
+    u'org_id': u'edX',
+    u'path': u'/event',
+    u'referer': u'https://courses.example.com/courses/course-v1:edX+DemoX+Demo_Course/courseware/',
+    u'session': u'0123456789abcdef0123456789abcdef',
+    u'user_id': 42,
+    u'username': u'student',
+}
+
+VIDEO_DATA = {
+    u'id': u'i4x-edX-DemoX-video-0b9e39477cf34507a7a48f74be381fdd',
+    u'code': u'html5',
+    u'currentTime': 12.5,
+}
+
+# Events as emitted to the tracker, with the share of each in the mix.
+EVENT_MIX = (
+    # Legacy video events emitted by the video player.
+    (40, u'play_video', u'browser', VIDEO_DATA),
+    (20, u'pause_video', u'browser', VIDEO_DATA),
+    (10, u'seek_video', u'browser', dict(VIDEO_DATA, old_time=12.5, new_time=42.0, type=u'onSlideSeek')),
+    # Video events emitted by the mobile apps, transformed into legacy events.
+    (10, u'edx.video.played', u'mobile', {
+        u'module_id': u'block-v1:edX+DemoX+Demo_Course+type@video+block@0b9e39477cf34507a7a48f74be381fdd',
+        u'code': u'mobile',
+        u'current_time': 12.5,
+    }),
+    (5, u'edx.video.position.changed', u'mobile', {
+        u'module_id': u'block-v1:edX+DemoX+Demo_Course+type@video+block@0b9e39477cf34507a7a48f74be381fdd',
+        u'code': u'mobile',
+        u'current_time': 12.5,
+        u'new_time': 42.5,
+        u'seek_type': u'skip',
+        u'requested_skip_interval': 30,
+    }),
+    # Sequence navigation events, transformed into legacy events.
+    (10, u'edx.ui.lms.sequence.next_selected', u'browser', {
+        u'current_tab': 2, u'tab_count': 5, u'id': u'block-v1:edX+DemoX+Demo_Course+type@sequential+block@basic',
+    }),
+    # Server events.
+    (5, u'problem_check', u'server', {
+        u'problem_id': u'block-v1:edX+DemoX+Demo_Course+type@problem+block@d1b84dcd39b0423d9e288f27f0f7f242',
+        u'success': u'correct',
+        u'grade': 1,
+        u'max_grade': 1,
+        u'attempts': 1,
+    }),
+)
+
+
+def create_events(num_events):
+    """
+    Returns `num_events` events drawn from EVENT_MIX, as emitted to the tracker.
+    """
+    population = [
+        (name, event_source, data)
+        for share, name, event_source, data in EVENT_MIX
+        for _ in xrange(share)
+    ]
+    random.seed(0)
+    events = []
+    for name, event_source, data in (random.choice(population) for _ in xrange(num_events)):
+        events.append({
+            u'name': name,
+            u'timestamp': datetime.datetime(2017, 1, 1, 12, 0, 0),
+            u'context': dict(CONTEXT, event_source=event_source),
+            u'data': copy.deepcopy(data),
+        })
+    return events
+
+
+def process_events(processors, events):
+    """
+    Applies the processors to each of the events, as the routing backend does.
+    """
+    for event in events:
+        for processor in processors:
+            result = processor(event)
+            if result is not None:
+                event = result
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_event_processors --settings=devstack
+        $ ./manage.py lms benchmark_event_processors --events 100000 --iterations 5
+    """
+    help = u'Compares the cost per event of the tracking log processors, on a mix of mostly video events.'
+
+    PIPELINES = (
+        (u'separate', lambda: [LegacyFieldMappingProcessor(), PrefixedEventProcessor()]),
+        (u'compiled', lambda: [CompiledEventProcessor()]),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            help=u'Number of events processed in each iteration.',
+            default=10000,
+            type=int,
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times the events are processed.',
+            default=3,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        events = create_events(options['events'])
+        for pipeline_name, create_processors in self.PIPELINES:
+            processors = create_processors()
+            elapsed = 0
+            for _ in xrange(options['iterations']):
+                # The processors modify the events, so each iteration gets its own copies.
+                events_copy = copy.deepcopy(events)
+                start = default_timer()
+                process_events(processors, events_copy)
+                elapsed += default_timer() - start
+            self.stdout.write(
+                u'{pipeline:<10} {per_event:8.2f} us per event'.format(
+                    pipeline=pipeline_name,
+                    per_event=elapsed * 1000000 / (options['events'] * options['iterations']),
+                )
+            )
@@ -0,0 +1,19 @@
+"""
+Tests for the benchmark_event_processors management command.
+"""
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkEventProcessorsTest(TestCase):
+    """
+    Tests for the benchmark_event_processors management command.
+    """
+    def test_reports_both_pipelines(self):
+        output = StringIO()
+        call_command('benchmark_event_processors', events=50, iterations=2, stdout=output)
+        report = output.getvalue()
+        self.assertIn(u'separate', report)
+        self.assertIn(u'compiled', report)
@@ -1,5 +1,6 @@
 """Map new event context values to old top-level field values. Ensures events can be parsed by legacy parsers."""
 
+import copy
 import json
 
 from .transformers import EventTransformerRegistry
@@ -19,15 +20,33 @@ class LegacyFieldMappingProcessor(object):
     """Ensures all required fields are included in emitted events"""
 
     def __call__(self, event):
+        self.map_fields(event)
+
+    def map_fields(self, event, encode_browser_data=True):
+        """
+        Map the fields of the event in place.
+
+        Unless `encode_browser_data`, the data of browser events is left as a
+        dict instead of being encoded to JSON, and True is returned to let the
+        caller encode it.
+        """
+        encode_data = False
         context = event.get('context', {})
         if 'context' in event:
+            # Inlined move_from_context and remove_shim_context, as this runs for every event.
             for field in CONTEXT_FIELDS_TO_INCLUDE:
-                self.move_from_context(field, event)
-            remove_shim_context(event)
+                event[field] = context.pop(field, '')
+            context.pop('client_id', None)
 
         if 'data' in event:
             if context.get('event_source', '') == 'browser' and isinstance(event['data'], dict):
-                event['event'] = json.dumps(event['data'])
+                if encode_browser_data:
+                    event['event'] = json.dumps(event['data'])
+                else:
+                    # Copied, as if decoded from JSON, so that transformers can modify
+                    # it, including its nested values, without modifying the emitted data.
+                    event['event'] = copy.deepcopy(event['data'])
+                    encode_data = True
             else:
                 event['event'] = event['data']
             del event['data']
@@ -35,17 +54,17 @@ class LegacyFieldMappingProcessor(object):
             event['event'] = {}
 
         if 'timestamp' in context:
-            event['time'] = context['timestamp']
-            del context['timestamp']
+            event['time'] = context.pop('timestamp')
         elif 'timestamp' in event:
             event['time'] = event['timestamp']
 
         if 'timestamp' in event:
             del event['timestamp']
 
-        self.move_from_context('event_type', event, event.get('name', ''))
-        self.move_from_context('event_source', event, 'server')
-        self.move_from_context('page', event, None)
+        event['event_type'] = context.pop('event_type', event.get('name', ''))
+        event['event_source'] = context.pop('event_source', 'server')
+        event['page'] = context.pop('page', None)
+        return encode_data
 
     def move_from_context(self, field, event, default_value=''):
         """Move a field from the context to the top level of the event."""
@@ -101,9 +120,35 @@ class PrefixedEventProcessor(object):
         If the event is registered with the EventTransformerRegistry, transform
         it.  Otherwise do nothing to it, and continue processing.
         """
-        try:
-            event = EventTransformerRegistry.create_transformer(event)
-        except KeyError:
+        transformer_class = EventTransformerRegistry.get_transformer_class(event.get(u'name'))
+        if transformer_class is None:
             return
+        event = transformer_class(event)
         event.transform()
         return event
+
+
+class CompiledEventProcessor(LegacyFieldMappingProcessor):
+    """
+    Applies LegacyFieldMappingProcessor and then PrefixedEventProcessor to
+    events, as a single processor.
+
+    The EventTransformer of each event name is looked up once and cached by
+    the registry, and events without one are mapped in place.  The data of
+    transformed browser events is encoded to JSON once, after the transformer
+    is applied, instead of being encoded, decoded by the transformer and
+    encoded again.
+    """
+
+    def __call__(self, event):
+        transformer_class = EventTransformerRegistry.get_transformer_class(event.get(u'name'))
+        if transformer_class is None:
+            self.map_fields(event)
+            return
+
+        encode_data = self.map_fields(event, encode_browser_data=False)
+        transformer = transformer_class(event)
+        transformer.transform()
+        if encode_data:
+            transformer[u'event'] = json.dumps(transformer[u'event'])
+        return transformer
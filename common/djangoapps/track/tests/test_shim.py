@@ -1,16 +1,20 @@
 """Ensure emitted events contain the fields legacy processors expect to find."""
 
+import copy
+import json
 from collections import namedtuple
 
 import ddt
+from django.test import TestCase
 from django.test.utils import override_settings
-from mock import sentinel
+from mock import patch, sentinel
 
 from openedx.core.lib.tests.assertions.events import assert_events_equal
 
 from . import FROZEN_TIME, EventTrackingTestCase
 from .. import transformers
-from ..shim import PrefixedEventProcessor
+from ..management.commands.benchmark_event_processors import create_events
+from ..shim import CompiledEventProcessor, LegacyFieldMappingProcessor, PrefixedEventProcessor
 
 LEGACY_SHIM_PROCESSOR = [
     {
@@ -257,6 +261,43 @@ class EventTransformerRegistryTestCase(EventTrackingTestCase):
         event = {'name': event_name}
         with self.assertRaises(KeyError):
             self.registry.create_transformer(event)
+        self.assertIsNone(self.registry.get_transformer_class(event_name))
+
+    def test_get_transformer_class(self):
+        self.assertIs(
+            self.registry.get_transformer_class('edx.video.played'),
+            transformers.VideoEventTransformer
+        )
+
+
+class DottedPathMappingTestCase(TestCase):
+    """
+    Test DottedPathMapping
+    """
+
+    def test_most_specific_prefix(self):
+        mapping = transformers.DottedPathMapping()
+        mapping['edx.'] = sentinel.edx
+        mapping['edx.video.'] = sentinel.video
+        mapping['edx.video.played'] = sentinel.played
+        self.assertEqual(mapping['edx.video.played'], sentinel.played)
+        self.assertEqual(mapping['edx.video.paused'], sentinel.video)
+        self.assertEqual(mapping.get('edx.ui.lms'), sentinel.edx)
+        self.assertIsNone(mapping.get('unregistered_event'))
+
+    def test_changes_reset_resolved_keys(self):
+        mapping = transformers.DottedPathMapping()
+        mapping['edx.'] = sentinel.edx
+        self.assertEqual(mapping['edx.video.played'], sentinel.edx)
+        self.assertNotIn('video.played', mapping)
+
+        mapping['edx.video.'] = sentinel.video
+        mapping['video.'] = sentinel.video
+        self.assertEqual(mapping['edx.video.played'], sentinel.video)
+        self.assertIn('video.played', mapping)
+
+        del mapping['edx.video.']
+        self.assertEqual(mapping['edx.video.played'], sentinel.edx)
 
 
 @ddt.ddt
@@ -318,3 +359,58 @@ class PrefixedEventProcessorTestCase(EventTrackingTestCase):
         self.assertEqual(result[u'event_type'], u'seq_goto')
         self.assertEqual(result[u'event'][u'old'], 2)
         self.assertEqual(result[u'event'][u'new'], 5)
+
+
+class CompiledEventProcessorTestCase(TestCase):
+    """
+    Test CompiledEventProcessor
+    """
+
+    def process(self, processors, event):
+        """
+        Return the event processed by the processors, with its payload decoded.
+        """
+        for processor in processors:
+            result = processor(event)
+            if result is not None:
+                event = result
+        event = dict(event)
+        if isinstance(event[u'event'], basestring):
+            event[u'event'] = json.loads(event[u'event'])
+        return event
+
+    def test_same_as_separate_processors(self):
+        for event in create_events(200):
+            self.assertEqual(
+                self.process([CompiledEventProcessor()], copy.deepcopy(event)),
+                self.process([LegacyFieldMappingProcessor(), PrefixedEventProcessor()], copy.deepcopy(event)),
+            )
+
+    def test_transformed_browser_event(self):
+        data = {u'current_tab': 2, u'target_tab': 5, u'tab_count': 9, u'id': u'block-v1:abc'}
+        event = {
+            u'name': u'edx.ui.lms.sequence.tab_selected',
+            u'context': {u'event_source': u'browser'},
+            u'data': data,
+        }
+        result = CompiledEventProcessor()(event)
+        self.assertEqual(result[u'event_type'], u'seq_goto')
+        self.assertEqual(json.loads(result[u'event']), dict(data, old=2, new=5))
+        # The emitted data is left as it was.
+        self.assertNotIn(u'old', data)
+
+    def test_emitted_nested_data_not_modified(self):
+        class NestedDataTransformer(transformers.EventTransformer):
+            """Transformer which modifies the nested values of the event payload."""
+            def process_event(self):
+                self.event[u'position'][u'old'] = 2
+                self.event[u'tabs'].append(3)
+
+        data = {u'position': {u'current': 1}, u'tabs': [1, 2]}
+        event = {u'name': u'test.nested', u'context': {u'event_source': u'browser'}, u'data': data}
+        with patch.object(
+            transformers.EventTransformerRegistry, 'get_transformer_class', return_value=NestedDataTransformer
+        ):
+            result = CompiledEventProcessor()(event)
+        self.assertEqual(json.loads(result[u'event']), {u'position': {u'current': 1, u'old': 2}, u'tabs': [1, 2, 3]})
+        self.assertEqual(data, {u'position': {u'current': 1}, u'tabs': [1, 2]})
@@ -14,6 +14,9 @@ from opaque_keys.edx.keys import UsageKey
 log = logging.getLogger(__name__)
 
 
+_NOT_FOUND = object()
+
+
 class DottedPathMapping(object):
     """
     Dictionary-like object for creating keys of dotted paths.
@@ -24,16 +27,16 @@ class DottedPathMapping(object):
     be used.
     """
 
-    # TODO: The current implementation of the prefix registry requires
-    # O(number of prefix event transformers) to access an event.  If we get a
-    # large number of EventTransformers, it may be worth writing a tree-based
-    # map structure where each node is a segment of the match key, which would
-    # reduce access time to O(len(match.key.split('.'))), or essentially constant
-    # time.
+    # Resolved keys are cached, so the prefix registry is only scanned once per
+    # key.  Event names can come from clients, so the cache is cleared when it
+    # grows past this size.
+    MAX_RESOLVED_KEYS = 1000
 
     def __init__(self, registry=None):
         self._match_registry = {}
         self._prefix_registry = {}
+        self._sorted_prefixes = []
+        self._resolved = {}
         self.update(registry or {})
 
     def __contains__(self, key):
@@ -44,36 +47,71 @@ class DottedPathMapping(object):
             return False
 
     def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _NOT_FOUND:
+            raise KeyError('Key {} not found in {}'.format(key, type(self)))
+        return value
+
+    def _lookup(self, key):
+        """
+        Return the value of the given key, or _NOT_FOUND.
+        """
+        try:
+            return self._resolved[key]
+        except (KeyError, TypeError):
+            return self._resolve(key)
+
+    def _resolve(self, key):
+        """
+        Return the value of the given key, or _NOT_FOUND, and cache it.
+        """
+        value = _NOT_FOUND
         if key in self._match_registry:
-            return self._match_registry[key]
-        if isinstance(key, basestring):
-            # Reverse-sort the keys to find the longest matching prefix.
-            for prefix in sorted(self._prefix_registry, reverse=True):
+            value = self._match_registry[key]
+        elif isinstance(key, basestring):
+            # The prefixes are reverse-sorted to find the longest matching prefix.
+            for prefix in self._sorted_prefixes:
                 if key.startswith(prefix):
-                    return self._prefix_registry[prefix]
-        raise KeyError('Key {} not found in {}'.format(key, type(self)))
+                    value = self._prefix_registry[prefix]
+                    break
+        else:
+            return value
+
+        if len(self._resolved) >= self.MAX_RESOLVED_KEYS:
+            self._resolved.clear()
+        self._resolved[key] = value
+        return value
 
     def __setitem__(self, key, value):
         if key.endswith('.'):
             self._prefix_registry[key] = value
         else:
             self._match_registry[key] = value
+        self._registry_changed()
 
     def __delitem__(self, key):
         if key.endswith('.'):
             del self._prefix_registry[key]
         else:
             del self._match_registry[key]
+        self._registry_changed()
+
+    def _registry_changed(self):
+        """
+        Reset the sorted prefixes and the resolved keys after a change.
+        """
+        self._sorted_prefixes = sorted(self._prefix_registry, reverse=True)
+        self._resolved = {}
 
     def get(self, key, default=None):
         """
         Return `self[key]` if it exists, otherwise, return `None` or `default`
         if it is specified.
         """
-        try:
-            self[key]
-        except KeyError:
+        value = self._lookup(key)
+        if value is _NOT_FOUND:
             return default
+        return value
 
     def update(self, dict_):
         """
@@ -120,6 +158,14 @@ class EventTransformerRegistry(object):
         name = event.get(u'name')
         return cls.mapping[name](event)
 
+    @classmethod
+    def get_transformer_class(cls, name):
+        """
+        Return the EventTransformer registered to handle events with the given
+        name, or None.
+        """
+        return cls.mapping.get(name)
+
 
 class EventTransformer(dict):
     """
@@ -43,7 +43,7 @@ def substitute_keywords(string, user_id, context):
 
     # do this lazily to avoid unneeded database hits
     KEYWORD_FUNCTION_MAP = {
-        '%%USER_ID%%': lambda: anonymous_id_from_user_id(user_id),
+        '%%USER_ID%%': lambda: context.get('anonymous_user_id') or anonymous_id_from_user_id(user_id),
         '%%USER_FULLNAME%%': lambda: context.get('name'),
         '%%COURSE_DISPLAY_NAME%%': lambda: context.get('course_title'),
         '%%COURSE_END_DATE%%': lambda: context.get('course_end_date'),
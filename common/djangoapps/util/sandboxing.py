@@ -1,6 +1,9 @@
 import re
 
+from capa.safe_exec import configure_pool
 from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.exceptions import MiddlewareNotUsed
 from lms.djangoapps.dashboard.git_import import DEFAULT_PYTHON_LIB_FILENAME
 
 
@@ -29,6 +32,17 @@ def can_execute_unsafe_code(course_id):
     return False
 
 
+def get_safe_exec_cache():
+    """
+    Return the cache for the results of sandboxed code executions: the
+    "safe_exec" cache if it is configured, else the default cache.
+    """
+    try:
+        return caches['safe_exec']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
 def get_python_lib_zip(contentstore, course_id):
     """Return the bytes of the course code library file, if it exists."""
     python_lib_filename = getattr(settings, 'PYTHON_LIB_FILENAME', DEFAULT_PYTHON_LIB_FILENAME)
@@ -38,3 +52,15 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+class ConfigureSafeExecPoolMiddleware(object):
+    """
+    Configure the pool of warm sandbox workers of capa's safe_exec from the
+    "pool" key of the CODE_JAIL setting, once, when the middleware is loaded.
+    """
+    def __init__(self):
+        pool_settings = getattr(settings, 'CODE_JAIL', {}).get('pool', {})
+        if pool_settings.get('size'):
+            configure_pool(**pool_settings)
+        raise MiddlewareNotUsed()
@@ -0,0 +1,92 @@
+"""
+Microbenchmark of the evaluation of expressions at many sample points, as
+done by FormulaResponse.
+
+Compares parsing the expression for every evaluation, as evaluator used to,
+with evaluating a compiled expression at each sample point, and with
+evaluating it over all of the sample points at once.
+
+Example usage:
+    $ python -m calc.benchmark
+    $ python -m calc.benchmark --samples 100 --iterations 20
+"""
+import argparse
+import random
+from timeit import default_timer
+
+from calc import CompiledExpression, compile_expression
+
+EXPRESSIONS = (
+    u'x^2 + 2*x*y + y^2',
+    u'sqrt(x^2 + y^2) / (x || y)',
+    u'3.5k*sin(x)*e^(-y/2) + ln(y)',
+)
+
+
+def _time(function, iterations):
+    """
+    Return the average time, in milliseconds, of calling `function`.
+    """
+    start = default_timer()
+    for _ in xrange(iterations):
+        function()
+    return (default_timer() - start) * 1000 / iterations
+
+
+def run_benchmark(expression, num_samples, iterations):
+    """
+    Return the average times, in milliseconds, to evaluate `expression` at
+    `num_samples` random sample points with each method.
+    """
+    variable_sets = [
+        {'x': random.uniform(1, 10), 'y': random.uniform(1, 10)}
+        for _ in xrange(num_samples)
+    ]
+    compiled = compile_expression(expression)
+
+    def parse_each_time():
+        """
+        Parse the expression for each sample point.
+        """
+        for variables in variable_sets:
+            CompiledExpression(expression).evaluate(variables, {})
+
+    def compiled_each_time():
+        """
+        Evaluate the compiled expression at each sample point.
+        """
+        for variables in variable_sets:
+            compiled.evaluate(variables, {})
+
+    def vectorized():
+        """
+        Evaluate the compiled expression at all sample points at once.
+        """
+        compiled.evaluate_vectorized(variable_sets, {})
+
+    return dict(
+        parsed=_time(parse_each_time, iterations),
+        compiled=_time(compiled_each_time, iterations),
+        vectorized=_time(vectorized, iterations),
+    )
+
+
+def main():
+    """
+    Print the results of the benchmark for each of EXPRESSIONS.
+    """
+    parser = argparse.ArgumentParser(description=u'Compares the evaluation times of expressions.')
+    parser.add_argument('--samples', help=u'Number of sample points.', default=20, type=int)
+    parser.add_argument('--iterations', help=u'Number of times the expressions are evaluated.', default=10, type=int)
+    args = parser.parse_args()
+
+    for expression in EXPRESSIONS:
+        results = run_benchmark(expression, args.samples, args.iterations)
+        print (
+            u'{expression:<40} parsed: {parsed:8.2f} ms, compiled: {compiled:8.2f} ms, '
+            u'vectorized: {vectorized:8.2f} ms'.format(expression=expression, **results)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,17 @@
 Parser and evaluator for FormulaResponse and NumericalResponse
 
 Uses pyparsing to parse. Main function as of now is evaluator().
+
+Expressions that are evaluated repeatedly, e.g. at several sample points,
+can be parsed once with compile_expression() and then evaluated with the
+returned CompiledExpression.
 """
 
 import math
 import numbers
 import operator
+import threading
+from collections import OrderedDict
 
 import numpy
 import scipy.constants
@@ -92,6 +98,21 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# Default functions that work element-wise on numpy arrays, and so can be
+# used when evaluating an expression over many sets of variables at once.
+# The others, e.g. factorial or arccot, only work on single values.
+VECTORIZED_FUNCTIONS = frozenset([
+    'sin', 'cos', 'tan', 'sec', 'csc', 'cot',
+    'sqrt', 'log10', 'log2', 'ln', 'exp',
+    'arccos', 'arcsin', 'arctan', 'arcsec', 'arccsc',
+    'abs',
+    'sinh', 'cosh', 'tanh', 'sech', 'csch', 'coth',
+    'arcsinh', 'arccosh', 'arctanh', 'arcsech', 'arccsch', 'arccoth',
+])
+
+# Maximum number of compiled expressions kept by compile_expression.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+
 
 class UndefinedVariable(Exception):
     """
@@ -255,35 +276,260 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    check_parens(math_expr)
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+class _CompiledExpressionCache(object):
+    """
+    A thread-safe cache of the least recently used compiled expressions.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._expressions = OrderedDict()
+        self._lock = threading.Lock()
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+    def get(self, key):
+        """
+        Return the compiled expression with the given key, or None.
+        """
+        with self._lock:
+            compiled = self._expressions.pop(key, None)
+            if compiled is not None:
+                self._expressions[key] = compiled
+            return compiled
+
+    def set(self, key, compiled):
+        """
+        Add the compiled expression with the given key, evicting the least
+        recently used ones above max_size.
+        """
+        with self._lock:
+            self._expressions.pop(key, None)
+            self._expressions[key] = compiled
+            while len(self._expressions) > self.max_size:
+                self._expressions.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all compiled expressions.
+        """
+        with self._lock:
+            self._expressions.clear()
+
+
+_COMPILED_EXPRESSIONS = _CompiledExpressionCache(COMPILED_EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Parse an expression into a CompiledExpression, which can be evaluated
+    any number of times with different variables and functions.
+
+    Compiled expressions are cached by `(math_expr, case_sensitive)`, so
+    repeatedly evaluated expressions are only parsed once. Raise the same
+    exceptions as evaluator for expressions that cannot be parsed.
+    """
+    key = (math_expr, case_sensitive)
+    compiled = _COMPILED_EXPRESSIONS.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(math_expr, case_sensitive)
+        _COMPILED_EXPRESSIONS.set(key, compiled)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A parsed expression, converted into a tree of closures that evaluate it.
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Instances are not modified once created, so they can be shared, e.g. by
+    the cache of compile_expression.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr`. An empty expression always evaluates to NaN.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self._math_interpreter = None
+        self._evaluate_scalar = None
+        self._evaluate_vector = None
+
+        if math_expr.strip() != "":
+            check_parens(math_expr)
+            self._math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self._math_interpreter.parse_algebra()
+            self._evaluate_scalar = self._compile_node(self._math_interpreter.tree, vectorized=False)
+            self._evaluate_vector = self._compile_node(self._math_interpreter.tree, vectorized=True)
+
+    def _casify(self, name):
+        """
+        Return the name under which a variable or function is looked up.
+        """
+        return name if self.case_sensitive else name.lower()
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, as
+        evaluator would.
+        """
+        if self._math_interpreter is None:
+            return float('nan')
+
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self._math_interpreter.check_variables(all_variables, all_functions)
+        return self._evaluate_scalar(all_variables, all_functions)
+
+    def evaluate_vectorized(self, variable_sets, functions):
+        """
+        Evaluate the expression for each of the variable dictionaries in
+        `variable_sets` and return a numpy array of the results, in order.
+
+        The dictionaries are expected to define the same variables. The
+        expression is evaluated over all of them at once with numpy arrays
+        when its functions allow it. Results that are not finite are then
+        evaluated again one at a time, so that any exception raised, or
+        complex result returned, is the same as with evaluate.
+        """
+        if not variable_sets or self._math_interpreter is None:
+            return numpy.array([self.evaluate(variables, functions) for variables in variable_sets])
+
+        all_variables, all_functions = add_defaults(variable_sets[0], functions, self.case_sensitive)
+        self._math_interpreter.check_variables(all_variables, all_functions)
+
+        results = None
+        if self._can_vectorize(all_functions):
+            try:
+                all_variables.update(self._variable_arrays(variable_sets))
+                with numpy.errstate(all='ignore'):
+                    results = numpy.asarray(self._evaluate_vector(all_variables, all_functions))
+            except (ArithmeticError, LookupError, TypeError, ValueError):
+                # e.g. operations on constants only, which raise instead of
+                # returning inf or NaN; evaluate them one at a time instead.
+                results = None
+            if results is not None and results.shape == ():
+                # The expression does not depend on the variables.
+                results = results * numpy.ones(len(variable_sets))
+            elif results is not None and results.shape != (len(variable_sets),):
+                results = None
+
+        if results is None:
+            return numpy.array([self.evaluate(variables, functions) for variables in variable_sets])
+
+        results = list(results)
+        with numpy.errstate(invalid='ignore'):
+            not_finite = numpy.flatnonzero(~numpy.isfinite(results))
+        for index in not_finite:
+            results[index] = self.evaluate(variable_sets[index], functions)
+        return numpy.array(results)
+
+    def _can_vectorize(self, all_functions):
+        """
+        Return whether all of the functions used in the expression are
+        default functions that work element-wise on numpy arrays.
+        """
+        for name in self._math_interpreter.functions_used:
+            name = self._casify(name)
+            if name not in VECTORIZED_FUNCTIONS or all_functions[name] is not DEFAULT_FUNCTIONS[name]:
+                return False
+        return True
+
+    def _variable_arrays(self, variable_sets):
+        """
+        Return a dictionary of the variables used in the expression that are
+        defined in `variable_sets`, with arrays of their values in each set.
+        """
+        if not self.case_sensitive:
+            variable_sets = [lower_dict(variables) for variables in variable_sets]
+        arrays = {}
+        for name in set(self._casify(name) for name in self._math_interpreter.variables_used):
+            if name in variable_sets[0]:
+                values = numpy.array([variables[name] for variables in variable_sets])
+                if values.dtype.kind not in 'fc':
+                    # Integer arrays would not be promoted to floats on division
+                    # or on negative powers, as python numbers are.
+                    values = values.astype(float)
+                arrays[name] = values
+        return arrays
+
+    def _compile_node(self, node, vectorized):
+        """
+        Return a function of the variables and functions dictionaries that
+        evaluates the given node of the parse tree, with the same semantics as
+        the eval_* actions above.
+
+        Numbers are only converted once, and operators are resolved when
+        compiling. With `vectorized`, the values may be numpy arrays.
+        """
+        node_name = node.getName()
+        children = [child for child in node if isinstance(child, ParseResults)]
+        compiled_children = [self._compile_node(child, vectorized) for child in children]
+
+        if node_name == 'number':
+            value = eval_number(list(node))
+            return lambda variables, functions: value
+
+        elif node_name == 'variable':
+            variable_name = self._casify(node[0])
+            return lambda variables, functions: variables[variable_name]
+
+        elif node_name == 'function':
+            function_name = self._casify(node[0])
+            argument = compiled_children[0]
+            return lambda variables, functions: functions[function_name](argument(variables, functions))
+
+        elif node_name == 'atom':
+            # Ignore any parentheses around the wrapped value.
+            return compiled_children[0]
+
+        elif node_name == 'power':
+            def evaluate_power(variables, functions):
+                """
+                Exponentiate the operands, right to left.
+                """
+                values = [child(variables, functions) for child in compiled_children]
+                return reduce(lambda a, b: b ** a, reversed(values))
+            return evaluate_power
+
+        elif node_name == 'parallel':
+            if len(compiled_children) == 1:
+                return compiled_children[0]
+
+            def evaluate_parallel(variables, functions):
+                """
+                Compute the operands according to the parallel resistors operator.
+                """
+                values = [child(variables, functions) for child in compiled_children]
+                if not vectorized:
+                    return eval_parallel(values)
+                has_zero = reduce(numpy.logical_or, [numpy.asarray(value) == 0 for value in values])
+                return numpy.where(has_zero, float('nan'), 1. / sum(1. / value for value in values))
+            return evaluate_parallel
+
+        elif node_name in ('product', 'sum'):
+            if node_name == 'product':
+                total, current_op = 1.0, operator.mul
+                operators = {'*': operator.mul, '/': operator.truediv}
+            else:
+                total, current_op = 0.0, operator.add
+                operators = {'+': operator.add, '-': operator.sub}
+            terms = []
+            for child in node:
+                if isinstance(child, ParseResults):
+                    terms.append((current_op, compiled_children[len(terms)]))
+                else:
+                    current_op = operators[child]
+
+            def evaluate_terms(variables, functions):
+                """
+                Combine the terms with their operators, left to right.
+                """
+                result = total
+                for term_op, term in terms:
+                    result = term_op(result, term(variables, functions))
+                return result
+            return evaluate_terms
+
+        raise Exception(u"Unknown branch name '{}'".format(node_name))  # pragma: no cover
 
 
 def check_parens(formula):
@@ -5,6 +5,7 @@ Unit tests for calc.py
 import unittest
 import numpy
 import calc
+from calc import benchmark
 from pyparsing import ParseException
 
 # numpy's default behavior when it evaluates a function outside its domain
@@ -565,3 +566,123 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({}, {}, "(1+2")
         with self.assertRaisesRegexp(calc.UnmatchedParenthesis, 'no matching opening parenthesis'):
             calc.evaluator({}, {}, "(1+2))")
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and calc.CompiledExpression
+    """
+    EXPRESSIONS = [
+        '3*x^2 - 2*x + 1',
+        '-x/y + y/x',
+        'x||y',
+        'sqrt(x - y) + ln(y)',
+        'sin(x)^2 + cos(x)^2',
+        '2^y^0.5',
+        'x^y',
+        'fact(3)*x',
+        'e^(i*pi*x)',
+        '5k*x + 3%',
+    ]
+
+    def setUp(self):
+        super(CompiledExpressionTest, self).setUp()
+        calc.calc._COMPILED_EXPRESSIONS.clear()  # pylint: disable=protected-access
+
+    def test_cache(self):
+        compiled = calc.compile_expression('x+1')
+        self.assertIs(calc.compile_expression('x+1'), compiled)
+        self.assertIsNot(calc.compile_expression('x+1', case_sensitive=True), compiled)
+        self.assertIsNot(calc.compile_expression('x + 1'), compiled)
+
+    def test_cache_eviction(self):
+        cache = calc.calc._CompiledExpressionCache(2)  # pylint: disable=protected-access
+        cache.set('1', 1)
+        cache.set('2', 2)
+        self.assertEqual(cache.get('1'), 1)
+        cache.set('3', 3)
+        self.assertEqual(cache.get('1'), 1)
+        self.assertIsNone(cache.get('2'))
+        self.assertEqual(cache.get('3'), 3)
+
+    def test_errors_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(calc.UnmatchedParenthesis):
+                calc.compile_expression('(x')
+            with self.assertRaises(ParseException):
+                calc.compile_expression('x+')
+        compiled = calc.compile_expression('x+y')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            compiled.evaluate({'x': 1.0}, {})
+
+    def test_evaluate(self):
+        variables = {'x': 2.0, 'y': 0.5}
+        for expression in self.EXPRESSIONS:
+            compiled = calc.compile_expression(expression)
+            self.assertEqual(compiled.evaluate(variables, {}), calc.evaluator(variables, {}, expression))
+        self.assertTrue(numpy.isnan(calc.compile_expression(' ').evaluate({}, {})))
+
+    def test_evaluate_vectorized(self):
+        variable_sets = [
+            {'x': 2.0, 'y': 0.5},
+            {'x': -1.5, 'y': 3.0},
+            {'x': 0.5, 'y': 1.0},
+            {'x': 1 + 2j, 'y': 0.25},
+            {'x': 4, 'y': 2},
+        ]
+        for expression in self.EXPRESSIONS:
+            compiled = calc.compile_expression(expression)
+            results = compiled.evaluate_vectorized(variable_sets, {})
+            self.assertEqual(len(results), len(variable_sets))
+            for variables, result in zip(variable_sets, results):
+                expected = compiled.evaluate(variables, {})
+                if numpy.isnan(expected):
+                    self.assertTrue(numpy.isnan(result), msg=expression)
+                else:
+                    self.assertAlmostEqual(result, expected, msg=expression)
+
+    def test_evaluate_vectorized_errors(self):
+        compiled = calc.compile_expression('1/x')
+        numpy.testing.assert_array_equal(compiled.evaluate_vectorized([{'x': 2.0}, {'x': 4.0}], {}), [0.5, 0.25])
+        with self.assertRaises(ZeroDivisionError):
+            compiled.evaluate_vectorized([{'x': 2.0}, {'x': 0.0}], {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'x'):
+            compiled.evaluate_vectorized([{'y': 2.0}], {})
+
+        results = calc.compile_expression('x||1').evaluate_vectorized([{'x': 0.0}, {'x': 1.0}], {})
+        self.assertTrue(numpy.isnan(results[0]))
+        self.assertEqual(results[1], 0.5)
+
+    def test_evaluate_vectorized_functions(self):
+        calls = []
+
+        def custom_function(value):
+            """
+            Only works on single values.
+            """
+            calls.append(value)
+            return float(value) + 1
+
+        compiled = calc.compile_expression('f(x) + sin(x)')
+        results = compiled.evaluate_vectorized([{'x': 0.0}, {'x': 1.0}], {'f': custom_function})
+        self.assertEqual(calls, [0.0, 1.0])
+        self.assertAlmostEqual(results[1], 2 + numpy.sin(1.0))
+
+        # a default function is not vectorized when it is overridden
+        results = calc.compile_expression('sin(x)').evaluate_vectorized([{'x': 0.0}], {'sin': custom_function})
+        self.assertEqual(list(results), [1.0])
+
+    def test_evaluate_vectorized_constant(self):
+        results = calc.compile_expression('2*pi').evaluate_vectorized([{'x': 1.0}, {'x': 2.0}], {})
+        numpy.testing.assert_array_equal(results, [2 * numpy.pi, 2 * numpy.pi])
+        self.assertEqual(len(calc.compile_expression('x').evaluate_vectorized([], {})), 0)
+
+
+class BenchmarkTest(unittest.TestCase):
+    """
+    Run tests for calc.benchmark
+    """
+    def test_run_benchmark(self):
+        for expression in benchmark.EXPRESSIONS:
+            results = benchmark.run_benchmark(expression, num_samples=3, iterations=1)
+            self.assertItemsEqual(results.keys(), ['parsed', 'compiled', 'vectorized'])
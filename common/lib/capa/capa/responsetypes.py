@@ -40,13 +40,14 @@ import capa.safe_exec as safe_exec
 import capa.xqueue_interface as xqueue_interface
 import dogstats_wrapper as dog_stats_api
 # specific library imports
-from calc import UndefinedVariable, UnmatchedParenthesis, evaluator
+from calc import UndefinedVariable, UnmatchedParenthesis, compile_expression, evaluator
 from cmath import isnan
 from openedx.core.djangolib.markup import HTML, Text
 
 from . import correctmap
 from .registry import TagRegistry
 from .util import (
+    compare_arrays_with_tolerance,
     compare_with_tolerance,
     contextualize_text,
     convert_files_to_filenames,
@@ -3092,18 +3093,19 @@ class FormulaResponse(LoncapaResponse):
         Takes in an answer and a list of dictionaries mapping variables to values.
         Each dictionary represents a test case for the answer.
         Returns a tuple of formula evaluation results.
+
+        The answer is parsed once and evaluated for all of the test cases at
+        once, see calc.CompiledExpression.evaluate_vectorized.
         """
         _ = self.capa_system.i18n.ugettext
 
         out = []
-        for var_dict in var_dict_list:
+        if var_dict_list:
             try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
+                out = list(compile_expression(
                     answer,
                     case_sensitive=self.case_sensitive,
-                ))
+                ).evaluate_vectorized(var_dict_list, dict()))
             except UndefinedVariable as err:
                 log.debug(
                     'formularesponse: undefined variable in formula=%s',
@@ -3186,8 +3188,7 @@ class FormulaResponse(LoncapaResponse):
         student_result = self.tupleize_answers(given, var_dict_list)
         instructor_result = self.tupleize_answers(expected, var_dict_list)
 
-        correct = all(compare_with_tolerance(student, instructor, self.tolerance)
-                      for student, instructor in zip(student_result, instructor_result))
+        correct = compare_arrays_with_tolerance(student_result, instructor_result, self.tolerance).all()
         if correct:
             return "correct"
         else:
@@ -0,0 +1,416 @@
+"""
+A pool of warm sandbox processes for safe_exec.
+
+Starting a sandboxed Python process, and importing numpy and the other
+assumed modules in it, takes much longer than executing most problem code.
+Each worker of the pool is a long running fork server (see pool_worker.py),
+started in the sandbox the way codejail starts its processes, which has
+already imported those modules. Every execution happens in a fresh child
+process forked from it, so executions cannot see each other's state, and
+the child has the same resource limits as a codejail process.
+
+Workers are replaced after `max_executions` executions, and whenever an
+execution leaves any file behind in the sandbox, times out, is killed, or
+does anything unexpected. Like codejail processes, each worker and each
+forked process runs in its own session, and replaced workers are stopped by
+killing all of their sessions, so that no process can outlive its worker.
+"""
+import json
+import logging
+import os
+import Queue
+import resource
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+from time import sleep, time
+from uuid import uuid4
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+WORKER_SCRIPT_NAME = 'pool_worker.py'
+with open(os.path.join(os.path.dirname(__file__), WORKER_SCRIPT_NAME)) as _worker_script:
+    WORKER_SCRIPT = _worker_script.read()
+
+# Seconds given to a new worker to start and import its modules, on top
+# of the real time limit of its first execution.
+WORKER_STARTUP_TIMEOUT = 30
+
+# Seconds given to a running worker to fork the process of an execution.
+WORKER_FORK_TIMEOUT = 5
+
+# Seconds given to a worker to exit once its stdin is closed, before it is killed.
+WORKER_STOP_TIMEOUT = 1
+
+# Seconds to wait for an idle worker before executing the code in a new
+# codejail process instead.
+ACQUIRE_TIMEOUT = 5
+
+
+class WorkerFailure(Exception):
+    """
+    A worker did not respond as expected, and should not be used anymore.
+
+    `may_have_executed` is whether the code may have been executed before
+    the failure, in which case it must not be executed again.
+    """
+    def __init__(self, message, may_have_executed=False):
+        super(WorkerFailure, self).__init__(message)
+        self.may_have_executed = may_have_executed
+
+
+class SandboxWorker(object):
+    """
+    A fork server running in the sandbox.
+    """
+    def __init__(self, preload, max_executions):
+        self.max_executions = max_executions
+        self.num_executions = 0
+        self.recycle_reason = None
+        self._buffer = ''
+        self._child_pid = None
+
+        self.homedir = tempfile.mkdtemp(prefix='codejail-')
+        # The sandbox user needs to be able to read the directory.
+        os.chmod(self.homedir, 0o775)
+        tmpdir = os.path.join(self.homedir, 'tmp')
+        os.mkdir(tmpdir)
+        os.chmod(tmpdir, 0o777)
+        with open(os.path.join(self.homedir, WORKER_SCRIPT_NAME), 'w') as script:
+            script.write(WORKER_SCRIPT)
+        self._initial_files = sorted(os.listdir(self.homedir))
+
+        command = jail_code.COMMANDS['python']
+        cmd = []
+        if command['user']:
+            cmd.extend(['sudo', '-u', command['user'], 'TMPDIR=tmp'])
+        cmd.extend(command['cmdline_start'])
+        cmd.append(WORKER_SCRIPT_NAME)
+        cmd.append(json.dumps({
+            'preload': preload,
+            'cpu': jail_code.LIMITS.get('CPU') or 0,
+            'realtime': jail_code.LIMITS.get('REALTIME') or 0,
+        }))
+        self._devnull = open(os.devnull, 'w')
+        self._process = subprocess.Popen(
+            cmd,
+            cwd=self.homedir,
+            env={'TMPDIR': 'tmp'},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._devnull,
+            close_fds=True,
+            preexec_fn=_set_worker_limits,
+        )
+
+    def execute(self, code, globals_dict):
+        """
+        Execute the code with the globals in a process forked by the worker,
+        and return the error message, if any, and the resulting globals.
+
+        Raises WorkerFailure if the worker did not respond as expected.
+        """
+        request_id = uuid4().hex
+        self._send({'id': request_id, 'code': code, 'globals': json_safe(globals_dict)})
+
+        # The forked process only executes the code once its id is confirmed,
+        # so that it can be killed with the worker whatever the code does.
+        accepted = self._read_line(WORKER_STARTUP_TIMEOUT if self.num_executions == 0 else WORKER_FORK_TIMEOUT)
+        if accepted.get('id') != request_id or not accepted.get('pid'):
+            raise WorkerFailure(u'unexpected response')
+        self._child_pid = accepted['pid']
+        self._send({'id': request_id})
+        self.num_executions += 1
+
+        # As with codejail, a REALTIME of 0 means that there is no time limit.
+        realtime = jail_code.LIMITS.get('REALTIME') or 0
+        try:
+            response = self._read_line(realtime * 2 + 1 if realtime else None)
+        except WorkerFailure as failure:
+            raise WorkerFailure(failure.args[0], may_have_executed=True)
+        if response.get('id') != request_id:
+            raise WorkerFailure(u'unexpected response', may_have_executed=True)
+        if self._has_pending_output():
+            raise WorkerFailure(u'unexpected output', may_have_executed=True)
+        self._child_pid = None
+
+        try:
+            result = json.loads(response['output']) if response['output'] else {}
+        except ValueError:
+            result = None
+
+        if response['timed_out']:
+            self.recycle_reason = 'timeout'
+        elif response['status'] != 0:
+            self.recycle_reason = 'killed'
+        elif result is None:
+            self.recycle_reason = 'invalid_output'
+        elif self._has_leaked_files():
+            self.recycle_reason = 'leaked_files'
+        elif self.num_executions >= self.max_executions:
+            self.recycle_reason = 'max_executions'
+
+        result = result or {}
+        if 'globals' in result:
+            return None, result['globals']
+        return u"Couldn't execute jailed code: {}".format(result.get('error', u'')), {}
+
+    def _send(self, message):
+        """
+        Write the message to the worker as a JSON line.
+        """
+        try:
+            self._process.stdin.write(json.dumps(message) + '\n')
+            self._process.stdin.flush()
+        except (IOError, OSError, ValueError) as error:
+            raise WorkerFailure(u'could not send request: {}'.format(error))
+
+    def _read_line(self, timeout):
+        """
+        Read the next JSON line written by the worker, within `timeout`
+        seconds, if set.
+        """
+        fd = self._process.stdout.fileno()
+        deadline = time() + timeout if timeout is not None else None
+        while '\n' not in self._buffer:
+            wait = max(deadline - time(), 0) if deadline is not None else None
+            readable, _, _ = select.select([fd], [], [], wait)
+            if not readable:
+                raise WorkerFailure(u'no response')
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WorkerFailure(u'exited')
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split('\n', 1)
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise WorkerFailure(u'invalid response')
+
+    def _has_pending_output(self):
+        """
+        Returns whether the worker wrote more than its response.
+        """
+        if self._buffer:
+            return True
+        readable, _, _ = select.select([self._process.stdout.fileno()], [], [], 0)
+        return bool(readable)
+
+    def _has_leaked_files(self):
+        """
+        Returns whether the execution left files in the sandbox.
+        """
+        try:
+            return (
+                sorted(os.listdir(self.homedir)) != self._initial_files or
+                bool(os.listdir(os.path.join(self.homedir, 'tmp')))
+            )
+        except OSError:
+            return True
+
+    def close(self):
+        """
+        Stop the worker and remove its files.
+        """
+        if self._process.stdout.closed:
+            # Already closed; the ids of its processes may have been reused.
+            return
+        # The worker exits when its stdin is closed. Whether it did or not,
+        # its session and the session of its last forked process are killed,
+        # since the code may have stopped or killed the worker.
+        try:
+            self._process.stdin.close()
+        except (IOError, OSError):
+            pass
+        deadline = time() + WORKER_STOP_TIMEOUT
+        while self._process.poll() is None and time() < deadline:
+            sleep(0.01)
+        self._kill_sessions()
+        try:
+            self._process.wait()
+        except OSError:
+            pass
+        self._process.stdout.close()
+        self._devnull.close()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+    def _kill_sessions(self):
+        """
+        Kill every process in the sessions of the worker and of its last
+        forked process, the same way codejail kills its sandboxed processes.
+        """
+        sessions = [self._process.pid]
+        if self._child_pid:
+            sessions.append(self._child_pid)
+        cmd = ['pkill', '-9', '-s', ','.join(str(pid) for pid in sessions)]
+        user = jail_code.COMMANDS['python']['user']
+        if user:
+            cmd = ['sudo', 'pkill', '-9', '-u', user] + cmd[2:]
+        try:
+            subprocess.call(cmd, stdout=self._devnull, stderr=self._devnull, close_fds=True)
+        except OSError:
+            log.exception(u'Could not kill the sessions of a sandbox worker')
+
+
+def _set_worker_limits():
+    """
+    Start a new session for the worker, and set the limits shared by the
+    worker and all of its forked processes, before the worker is started.
+    The limits specific to each execution are set by the worker in the
+    forked processes.
+    """
+    os.setsid()
+    vmem = jail_code.LIMITS.get('VMEM')
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+    fsize = jail_code.LIMITS.get('FSIZE') or 0
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+
+class SandboxPool(object):
+    """
+    A pool of at most `size` sandbox workers, started as they are needed.
+    """
+    def __init__(self, size, max_executions, preload):
+        self.size = size
+        self.max_executions = max_executions
+        self.preload = preload
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """
+        Forget all workers, e.g. those inherited from a parent process.
+        """
+        self._pid = os.getpid()
+        self._idle_workers = Queue.LifoQueue()
+        self._num_workers = 0
+        self._num_waiting = 0
+
+    def execute(self, code, globals_dict):
+        """
+        Execute the code with the globals in a sandbox worker. The globals are
+        updated with the results, as with codejail's safe_exec.
+
+        Returns False if no worker could execute the code, in which case it
+        should be executed in a new codejail process instead. Raises
+        SafeExecException if the code raised an exception, or if the worker
+        failed after the code may have been executed.
+        """
+        worker = self._acquire()
+        if worker is None:
+            return False
+
+        start = time()
+        try:
+            emsg, results = worker.execute(code, globals_dict)
+        except WorkerFailure as failure:
+            log.warning(u'Sandbox worker failed: %s', failure)
+            worker.recycle_reason = 'failure'
+            if failure.may_have_executed:
+                # Executing the code again could repeat its side effects.
+                raise SafeExecException(u"Couldn't execute jailed code: sandbox worker failed: {}".format(failure))
+            return False
+        finally:
+            self._release(worker)
+        dog_stats_api.histogram('capa.safe_exec.pool.execution_time', time() - start)
+
+        globals_dict.update(results)
+        if emsg:
+            raise SafeExecException(emsg)
+        return True
+
+    def _acquire(self):
+        """
+        Returns an idle worker, starting a new one if the pool is not full, or
+        None if none became idle within ACQUIRE_TIMEOUT.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                return self._idle_workers.get_nowait()
+            except Queue.Empty:
+                pass
+            if self._num_workers < self.size:
+                return self._start_worker()
+            self._num_waiting += 1
+            dog_stats_api.gauge('capa.safe_exec.pool.queue_depth', self._num_waiting)
+
+        start = time()
+        try:
+            return self._idle_workers.get(timeout=ACQUIRE_TIMEOUT)
+        except Queue.Empty:
+            dog_stats_api.increment('capa.safe_exec.pool.acquire_timeout')
+            return None
+        finally:
+            with self._lock:
+                self._num_waiting -= 1
+            dog_stats_api.histogram('capa.safe_exec.pool.wait_time', time() - start)
+
+    def _release(self, worker):
+        """
+        Make the worker available again, replacing it with a new one if it
+        needs to be recycled.
+        """
+        if worker.recycle_reason:
+            dog_stats_api.increment('capa.safe_exec.pool.recycled', tags=['reason:' + worker.recycle_reason])
+            worker.close()
+            with self._lock:
+                self._num_workers -= 1
+                worker = self._start_worker()
+        if worker is not None:
+            self._idle_workers.put(worker)
+
+    def _start_worker(self):
+        """
+        Returns a new worker counted in the pool, or None if it could not be
+        started. Must be called with the lock held.
+        """
+        try:
+            worker = SandboxWorker(self.preload, self.max_executions)
+        except (IOError, OSError):
+            log.exception(u'Could not start a sandbox worker')
+            return None
+        self._num_workers += 1
+        return worker
+
+    def close(self):
+        """
+        Stop all of the idle workers.
+        """
+        while True:
+            try:
+                worker = self._idle_workers.get_nowait()
+            except Queue.Empty:
+                return
+            worker.close()
+            with self._lock:
+                self._num_workers -= 1
+
+
+_POOL = None
+
+
+def configure(size, max_executions, preload):
+    """
+    Configure the pool used by `get_pool`, stopping the idle workers of any
+    previously configured pool. A size of 0 disables the pool.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        _POOL.close()
+    _POOL = SandboxPool(size, max_executions, preload) if size > 0 else None
+
+
+def get_pool():
+    """
+    Returns the configured pool, or None if there isn't one.
+    """
+    return _POOL
@@ -0,0 +1,194 @@
+"""
+Fork server run in the sandbox by capa.safe_exec.pool.
+
+The server imports the modules listed in its configuration, then reads
+requests from stdin, one JSON line each. The code of each request is
+executed in a child process forked for that request, which starts from the
+state of the server with the modules already imported. The server itself
+never executes any requested code, so every request is executed in the
+same clean state.
+
+For each request, the server writes a JSON line with the id of the child
+process to stdout, and waits for the pool to confirm it with another line
+with the id of the request before the child executes the code. Once the
+child exits, the server writes the response as a JSON line. The child starts
+its own session, which it cannot leave, so that the pool can kill it even if
+it kills or stops the server.
+
+This file is copied into the sandbox and run there, so it only uses the
+standard library.
+"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+
+def main():
+    """
+    Serve requests until stdin is closed.
+    """
+    config = json.loads(sys.argv[1])
+
+    # See TNL-6456; this needs to be set before numpy is imported.
+    os.environ["OPENBLAS_NUM_THREADS"] = "1"
+    for modname in config['preload']:
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            # The code will get the same error from its LazyModule if it uses the module.
+            pass
+
+    control_in = sys.stdin
+    control_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    while True:
+        line = control_in.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        response = run_request(request, config, control_in, control_out)
+        if response is None:
+            return
+        write_line(control_out, response)
+
+
+def write_line(control_out, message):
+    """
+    Write the message to the pool as a JSON line.
+    """
+    control_out.write(json.dumps(message) + '\n')
+    control_out.flush()
+
+
+def run_request(request, config, control_in, control_out):
+    """
+    Execute the code of the request in a forked child process, and return
+    the response for the request, or None if the pool did not confirm the
+    id of the child process.
+    """
+    result_read, result_write = os.pipe()
+    start_read, start_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(result_read)
+            os.close(start_write)
+            os.setsid()
+            # Nothing is read if the server exits before the pool confirmed the request.
+            if os.read(start_read, 1):
+                run_child(request, config, result_write)
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(result_write)
+    os.close(start_read)
+    write_line(control_out, {'id': request['id'], 'pid': pid})
+    line = control_in.readline()
+    if not line or json.loads(line).get('id') != request['id']:
+        os.close(start_write)
+        os.close(result_read)
+        os.waitpid(pid, 0)
+        return None
+    os.write(start_write, 'x')
+    os.close(start_write)
+    output, timed_out = read_child_output(result_read, pid, config['realtime'])
+    os.close(result_read)
+    _, status = os.waitpid(pid, 0)
+    return {
+        'id': request['id'],
+        'output': output,
+        'status': status,
+        'timed_out': timed_out,
+    }
+
+
+def read_child_output(result_read, pid, realtime):
+    """
+    Read the output of the child process until it closes its end of the
+    pipe, killing it if that takes more than `realtime` seconds, if set.
+
+    Returns the output and whether the child process was killed.
+    """
+    chunks = []
+    deadline = time.time() + realtime if realtime else None
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        readable, _, _ = select.select([result_read], [], [], timeout)
+        if not readable:
+            os.kill(pid, signal.SIGKILL)
+            return ''.join(chunks), True
+        chunk = os.read(result_read, 65536)
+        if not chunk:
+            return ''.join(chunks), False
+        chunks.append(chunk)
+
+
+def run_child(request, config, result_write):
+    """
+    Execute the code of the request in the child process, and write its
+    results to `result_write`.
+    """
+    # Detach from the control pipes of the server, so that the code cannot
+    # interfere with other requests.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    # Apply the limits of the code. Hard limits cannot be raised again, and
+    # the CPU time of a forked process starts at zero.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    if config['cpu']:
+        resource.setrlimit(resource.RLIMIT_CPU, (config['cpu'], config['cpu'] + 1))
+
+    result = execute(request['code'], request['globals'])
+    output = json.dumps(result)
+    while output:
+        written = os.write(result_write, output)
+        output = output[written:]
+
+
+class DevNull(object):
+    """
+    Discards anything printed by the code.
+    """
+    def write(self, *args, **kwargs):
+        pass
+
+
+def execute(code, globals_dict):
+    """
+    Execute the code with the globals, as codejail's safe_exec does, and
+    return either the resulting JSON-able globals or the error.
+    """
+    sys.stdout = DevNull()
+    try:
+        exec(code, globals_dict)  # pylint: disable=exec-used
+    except BaseException:  # pylint: disable=broad-except
+        return {'error': traceback.format_exc()}
+
+    ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)  # pylint: disable=undefined-variable
+    bad_keys = ("__builtins__",)
+
+    def jsonable(value):
+        """
+        Returns whether the value can be sent back as JSON.
+        """
+        if not isinstance(value, ok_types):
+            return False
+        try:
+            json.dumps(value)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    return {'globals': {k: v for k, v in globals_dict.iteritems() if jsonable(v) and k not in bad_keys}}
+
+
+if __name__ == '__main__':
+    main()
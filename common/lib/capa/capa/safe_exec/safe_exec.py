@@ -3,11 +3,14 @@
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
-from . import lazymod
+from codejail.jail_code import is_configured
+from . import lazymod, pool
 from dogapi import dog_stats_api
 from six import text_type
 
 import hashlib
+import json
+from time import time
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -51,27 +54,73 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
-def update_hash(hasher, obj):
+def configure_pool(size, max_executions=100):
     """
-    Update a `hashlib` hasher with a nested object.
+    Configure the pool of warm sandbox workers used to execute code that
+    needs no extra files, `size` workers at most, each replaced after
+    `max_executions` executions. A size of 0 disables the pool.
+    """
+    pool.configure(size, max_executions, [modname for _, modname in ASSUMED_IMPORTS])
+
+
+# Change this when the format of the cache keys or values changes.
+CACHE_VERSION = 2
 
-    To properly cache nested structures, we need to compute a hash from the
-    entire structure, canonicalizing at every level.
+# The globals that can be sent to the sandbox, as filtered by `json_safe`.
+JSON_SAFE_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+JSON_UNSAFE_NAMES = ("__builtins__",)
 
-    `hasher`'s `.update()` method is called a number of times, touching all of
-    `obj` in the process.  Only primitive JSON-safe types are supported.
 
+def encode_globals(globals_dict):
     """
-    hasher.update(str(type(obj)))
-    if isinstance(obj, (tuple, list)):
-        for e in obj:
-            update_hash(hasher, e)
-    elif isinstance(obj, dict):
-        for k in sorted(obj):
-            update_hash(hasher, k)
-            update_hash(hasher, obj[k])
-    else:
-        hasher.update(repr(obj))
+    Returns the canonical JSON encoding of each of the globals that can be sent
+    to the sandbox, by name.
+
+    Values that are equal once sent to the sandbox, such as equal dicts, or a
+    tuple and a list, have the same encoding.
+    """
+    encoded = {}
+    for name, value in globals_dict.iteritems():
+        if name in JSON_UNSAFE_NAMES or not isinstance(value, JSON_SAFE_TYPES):
+            continue
+        try:
+            encoded[name] = json.dumps(value, sort_keys=True)
+        except Exception:  # pylint: disable=broad-except
+            continue
+    return encoded
+
+
+def get_cache_key(code, encoded_globals, random_seed, python_path=None, extra_files=None):
+    """
+    Returns the cache key of the execution of `code` with the given encoded
+    globals, random seed, python path and extra files: a hash of all of them.
+    """
+    hasher = hashlib.sha1()
+    hasher.update(json.dumps([CACHE_VERSION, random_seed, python_path or []]))
+    if isinstance(code, unicode):
+        code = code.encode('utf-8')
+    hasher.update("{}:".format(len(code)))
+    hasher.update(code)
+    for name in sorted(encoded_globals):
+        hasher.update(json.dumps(name))
+        hasher.update(encoded_globals[name])
+    for filename, contents in extra_files or ():
+        hasher.update(json.dumps(filename))
+        hasher.update(hashlib.sha1(contents).hexdigest())
+    return "safe_exec.{}".format(hasher.hexdigest())
+
+
+def _record_cache_stats(slug, result, seconds):
+    """
+    Records a cache hit or miss of the execution of the code of `slug`, and
+    how long it took to execute the code.
+    """
+    tags = [u'result:{}'.format(result)]
+    if slug:
+        tags.append(u'problem:{}'.format(slug))
+    dog_stats_api.increment('capa.safe_exec.cache', tags=tags)
+    if result == 'hit':
+        dog_stats_api.histogram('capa.safe_exec.cache.time_saved', seconds, tags=tags)
 
 
 @dog_stats_api.timed('capa.safe_exec.time')
@@ -103,7 +152,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed, the python path and the extra files.  Only the globals changed
+    by the code are cached, along with the time taken to execute it.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -113,17 +163,17 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        encoded_globals = encode_globals(globals_dict)
+        key = get_cache_key(code, encoded_globals, random_seed, python_path, extra_files)
         cached = cache.get(key)
         if cached is not None:
-            # We have a cached result.  The result is a pair: the exception
-            # message, if any, else None; and the resulting globals dictionary.
-            emsg, cleaned_results = cached
-            globals_dict.update(cleaned_results)
+            # We have a cached result: the exception message, if any, else
+            # None; the globals changed by the code; the names of the other
+            # globals sent back from the sandbox; and the execution time.
+            emsg, changed_globals, unchanged_names, seconds = cached
+            globals_dict.update((name, json.loads(encoded_globals[name])) for name in unchanged_names)
+            globals_dict.update(changed_globals)
+            _record_cache_stats(slug, 'hit', seconds)
             if emsg:
                 raise SafeExecException(emsg)
             return
@@ -137,12 +187,19 @@ def safe_exec(
     else:
         exec_fn = codejail_safe_exec
 
+    # Use a warm sandbox worker when possible.
+    sandbox_pool = None
+    if not unsafely and not python_path and not extra_files and is_configured("python"):
+        sandbox_pool = pool.get_pool()
+
     # Run the code!  Results are side effects in globals_dict.
+    start = time()
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        if sandbox_pool is None or not sandbox_pool.execute(code_prolog + LAZY_IMPORTS + code, globals_dict):
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = text_type(e)
     else:
@@ -151,8 +208,16 @@ def safe_exec(
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
-        cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        seconds = time() - start
+        changed_globals = {}
+        unchanged_names = []
+        for name, encoded in encode_globals(globals_dict).iteritems():
+            if encoded_globals.get(name) == encoded:
+                unchanged_names.append(name)
+            else:
+                changed_globals[name] = json.loads(encoded)
+        cache.set(key, (emsg, changed_globals, unchanged_names, seconds))
+        _record_cache_stats(slug, 'miss', seconds)
 
     # If an exception happened, raise it now.
     if emsg:
@@ -0,0 +1,179 @@
+"""Test pool.py"""
+
+import os
+import signal
+import sys
+from time import sleep, time
+import unittest
+
+import ddt
+from mock import patch
+
+from capa.safe_exec import pool
+from codejail import jail_code
+
+
+class SandboxWorkerTestCase(unittest.TestCase):
+    """
+    Runs the workers with the current Python executable, without a sandbox
+    user, so that the tests don't depend on the sandbox being configured.
+    """
+    def setUp(self):
+        super(SandboxWorkerTestCase, self).setUp()
+        for patcher in (
+            patch.dict(jail_code.COMMANDS, {'python': {'cmdline_start': [sys.executable, '-E', '-B'], 'user': None}}),
+            patch.dict(jail_code.LIMITS, {'CPU': 1, 'REALTIME': 1, 'VMEM': 0, 'FSIZE': 0}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_worker(self, max_executions=10):
+        """
+        Returns a started worker, stopped after the test.
+        """
+        worker = pool.SandboxWorker(['json'], max_executions)
+        self.addCleanup(worker.close)
+        return worker
+
+
+@ddt.ddt
+class TestSandboxWorker(SandboxWorkerTestCase):
+    def test_execute(self):
+        worker = self.create_worker()
+        emsg, results = worker.execute("import json\nb = a + 1\nc = json.dumps(b)", {'a': 17})
+        self.assertIsNone(emsg)
+        self.assertEqual(results, {'a': 17, 'b': 18, 'c': '18'})
+        self.assertIsNone(worker.recycle_reason)
+
+    def test_exception(self):
+        worker = self.create_worker()
+        emsg, results = worker.execute("1/0", {})
+        self.assertIn("ZeroDivisionError", emsg)
+        self.assertEqual(results, {})
+        self.assertIsNone(worker.recycle_reason)
+
+    def test_executions_are_isolated(self):
+        worker = self.create_worker()
+        worker.execute("import json\njson.leaked = 1\nimport sys\nsys.modules['leaked'] = json", {})
+        emsg, results = worker.execute(
+            "import json, sys\nleaked = hasattr(json, 'leaked') or 'leaked' in sys.modules", {}
+        )
+        self.assertIsNone(emsg)
+        self.assertFalse(results['leaked'])
+
+    def test_recycled_after_max_executions(self):
+        worker = self.create_worker(max_executions=2)
+        worker.execute("a = 1", {})
+        self.assertIsNone(worker.recycle_reason)
+        worker.execute("a = 1", {})
+        self.assertEqual(worker.recycle_reason, 'max_executions')
+
+    def test_recycled_after_leaked_file(self):
+        worker = self.create_worker()
+        emsg, _ = worker.execute("open('tmp/leaked', 'w').close()", {})
+        self.assertIsNone(emsg)
+        self.assertEqual(worker.recycle_reason, 'leaked_files')
+
+    def test_recycled_after_timeout(self):
+        worker = self.create_worker()
+        emsg, _ = worker.execute("import time\ntime.sleep(5)", {})
+        self.assertIsNotNone(emsg)
+        self.assertEqual(worker.recycle_reason, 'timeout')
+
+    def test_output_is_discarded(self):
+        worker = self.create_worker()
+        emsg, results = worker.execute("import os, sys\nprint 'out'\nos.write(1, 'out')\nsys.stderr.write('err')", {})
+        self.assertIsNone(emsg)
+        self.assertEqual(results, {})
+        self.assertIsNone(worker.recycle_reason)
+
+    def test_no_time_limit(self):
+        with patch.dict(jail_code.LIMITS, {'REALTIME': 0}):
+            worker = self.create_worker()
+            emsg, results = worker.execute("import time\ntime.sleep(1.5)\na = 1", {})
+        self.assertIsNone(emsg)
+        self.assertEqual(results, {'a': 1})
+        self.assertIsNone(worker.recycle_reason)
+
+    def test_failed_worker(self):
+        worker = self.create_worker()
+        worker.close()
+        with self.assertRaises(pool.WorkerFailure) as context:
+            worker.execute("a = 1", {})
+        self.assertFalse(context.exception.may_have_executed)
+
+    @ddt.data(signal.SIGKILL, signal.SIGSTOP)
+    def test_child_signals_worker(self, signum):
+        worker = self.create_worker()
+        with self.assertRaises(pool.WorkerFailure) as context:
+            worker.execute("import os, time\nos.kill(os.getppid(), {})\ntime.sleep(30)".format(signum), {})
+        self.assertTrue(context.exception.may_have_executed)
+
+        child_pid = worker._child_pid  # pylint: disable=protected-access
+        worker.close()
+        self.assertEqual(worker._process.returncode, -signal.SIGKILL)  # pylint: disable=protected-access
+        # The orphaned child is reaped by init once it is killed.
+        deadline = time() + 5
+        while self._is_running(child_pid) and time() < deadline:
+            sleep(0.01)
+        self.assertFalse(self._is_running(child_pid))
+
+    def _is_running(self, pid):
+        """
+        Returns whether the process exists.
+        """
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return False
+        return True
+
+    @patch.object(pool, 'WORKER_STOP_TIMEOUT', 0.1)
+    def test_close_stopped_worker(self):
+        worker = self.create_worker()
+        os.kill(worker._process.pid, signal.SIGSTOP)  # pylint: disable=protected-access
+        start = time()
+        worker.close()
+        self.assertLess(time() - start, 5)
+        self.assertEqual(worker._process.returncode, -signal.SIGKILL)  # pylint: disable=protected-access
+
+
+class TestSandboxPool(SandboxWorkerTestCase):
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = pool.SandboxPool(1, 2, ['json'])
+        self.addCleanup(self.pool.close)
+
+    def test_execute(self):
+        globals_dict = {'a': 17}
+        self.assertTrue(self.pool.execute("b = a + 1", globals_dict))
+        self.assertEqual(globals_dict, {'a': 17, 'b': 18})
+
+    def test_exception(self):
+        with self.assertRaises(pool.SafeExecException):
+            self.pool.execute("1/0", {})
+
+    def test_workers_are_reused_then_replaced(self):
+        self.pool.execute("a = 1", {})
+        worker = self.pool._idle_workers.get_nowait()  # pylint: disable=protected-access
+        self.pool._idle_workers.put(worker)  # pylint: disable=protected-access
+
+        self.pool.execute("a = 1", {})
+        replacement = self.pool._idle_workers.get_nowait()  # pylint: disable=protected-access
+        self.assertIsNot(replacement, worker)
+        self.assertFalse(os.path.exists(worker.homedir))
+        self.assertEqual(self.pool._num_workers, 1)  # pylint: disable=protected-access
+        replacement.close()
+
+    def test_failed_worker(self):
+        with patch.object(pool.SandboxWorker, 'execute', side_effect=pool.WorkerFailure('failed')):
+            self.assertFalse(self.pool.execute("a = 1", {}))
+        self.assertTrue(self.pool.execute("a = 1", {}))
+
+    def test_failed_worker_after_execution(self):
+        # The code is not executed again if it may already have been.
+        failure = pool.WorkerFailure('failed', may_have_executed=True)
+        with patch.object(pool.SandboxWorker, 'execute', side_effect=failure):
+            with self.assertRaises(pool.SafeExecException):
+                self.pool.execute("a = 1", {})
+        self.assertTrue(self.pool.execute("a = 1", {}))
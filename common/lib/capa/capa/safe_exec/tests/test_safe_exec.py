@@ -1,6 +1,5 @@
 """Test safe_exec.py"""
 
-import hashlib
 import os
 import os.path
 import random
@@ -10,7 +9,8 @@ import unittest
 from nose.plugins.skip import SkipTest
 from six import text_type
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec
+from capa.safe_exec.safe_exec import encode_globals, get_cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -119,10 +119,10 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
         self.assertEqual(g['a'], 3)
         # A result has been cached
-        self.assertEqual(cache.values()[0], (None, {'a': 3}))
+        self.assertEqual(cache.values()[0][:3], (None, {'a': 3}, []))
 
         # Fiddle with the cache, then try it again.
-        cache[cache.keys()[0]] = (None, {'a': 17})
+        cache[cache.keys()[0]] = (None, {'a': 17}, [], 0.1)
 
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
@@ -149,24 +149,57 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # The exception should be in the cache now.
         self.assertEqual(len(cache), 1)
-        cache_exc_msg, cache_globals = cache.values()[0]
+        cache_exc_msg, cache_globals, _, _ = cache.values()[0]
         self.assertIn("ZeroDivisionError", cache_exc_msg)
 
         # Change the value stored in the cache, the result should change.
-        cache[cache.keys()[0]] = ("Hey there!", {})
+        cache[cache.keys()[0]] = ("Hey there!", {}, [], 0.1)
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
 
         self.assertEqual(len(cache), 1)
-        cache_exc_msg, cache_globals = cache.values()[0]
+        cache_exc_msg, cache_globals, _, _ = cache.values()[0]
         self.assertEqual("Hey there!", cache_exc_msg)
 
         # Change it again, now no exception!
-        cache[cache.keys()[0]] = (None, {'a': 17})
+        cache[cache.keys()[0]] = (None, {'a': 17}, [], 0.1)
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_only_changed_globals(self):
+        code = "b = a[0] + c\nd = (1, 2)"
+        g = {'a': (1, 2), 'b': 5, 'c': 10, 'e': {'f': [1]}}
+        cache = {}
+        safe_exec(code, g, cache=DictCache(cache))
+        self.assertEqual(g, {'a': [1, 2], 'b': 11, 'c': 10, 'd': [1, 2], 'e': {'f': [1]}})
+
+        _, changed_globals, unchanged_names, _ = cache.values()[0]
+        self.assertEqual(changed_globals, {'b': 11, 'd': [1, 2]})
+        self.assertItemsEqual(unchanged_names, ['a', 'c', 'e'])
+
+        # A hit gives the same globals as the execution.
+        g2 = {'a': (1, 2), 'b': 5, 'c': 10, 'e': {'f': [1]}}
+        safe_exec(code, g2, cache=DictCache(cache))
+        self.assertEqual(g2, g)
+
+    def test_cache_key(self):
+        cache = {}
+        safe_exec("a = b", {'b': [1, {'x': 1, 'y': 2}]}, cache=DictCache(cache))
+        # Globals that are equal in the sandbox give the same key.
+        safe_exec("a = b", {'b': (1, {'y': 2, 'x': 1}), 'f': lambda: None}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+
+        # The seed and the extra files are part of the key.
+        safe_exec("a = b", {'b': [1, {'x': 1, 'y': 2}]}, random_seed=1, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+        extra_files = [("constant.py", "THE_CONST = 23\n")]
+        safe_exec("a = b", {'b': [1, {'x': 1, 'y': 2}]}, extra_files=extra_files, cache=DictCache(cache))
+        self.assertEqual(len(cache), 3)
+        extra_files = [("constant.py", "THE_CONST = 17\n")]
+        safe_exec("a = b", {'b': [1, {'x': 1, 'y': 2}]}, extra_files=extra_files, cache=DictCache(cache))
+        self.assertEqual(len(cache), 4)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -178,14 +211,12 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
-class TestUpdateHash(unittest.TestCase):
-    """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
+class TestCacheKey(unittest.TestCase):
+    """Test the safe_exec.get_cache_key function to be sure it canonicalizes the globals properly."""
 
     def hash_obj(self, obj):
-        """Return the md5 hash that `update_hash` makes us."""
-        md5er = hashlib.md5()
-        update_hash(md5er, obj)
-        return md5er.hexdigest()
+        """Return the cache key of code executed with `obj` as a global."""
+        return get_cache_key("a = obj", encode_globals({'obj': obj}), random_seed=1)
 
     def equal_but_different_dicts(self):
         """
@@ -5,7 +5,13 @@ import unittest
 from lxml import etree
 
 from capa.tests.helpers import test_capa_system
-from capa.util import compare_with_tolerance, sanitize_html, get_inner_html_from_xpath, remove_markup
+from capa.util import (
+    compare_arrays_with_tolerance,
+    compare_with_tolerance,
+    sanitize_html,
+    get_inner_html_from_xpath,
+    remove_markup
+)
 
 
 class UtilTest(unittest.TestCase):
@@ -106,6 +112,40 @@ class UtilTest(unittest.TestCase):
         result = compare_with_tolerance(111.0, complex(100.0, 0), '10%', True)
         self.assertTrue(result)
 
+    def test_compare_arrays_with_tolerance(self):
+        infinity = float('Inf')
+        nan = float('NaN')
+        student_values = [
+            100.0, 100.001, 101.0, 109.9, 110.1, 111.0, 112.0, 100.01, 100.002, 0.4,
+            infinity, 100.0, infinity, nan, 100.0, 1 + 1j, 1 + 1.5j, 1e-20, 0.0, 3.000000000001,
+        ]
+        instructor_values = [
+            100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 0.44,
+            100.0, infinity, infinity, 100.0, nan, 1 + 1.05j, complex(1, 1), 0.0, 0.0, 3.0,
+        ]
+        for tolerance, relative_tolerance in [
+                ('0.001%', False),
+                ('10%', False),
+                ('10%', True),
+                ('10.0', False),
+                ('0.1', True),
+                (10.0, False),
+                (0.1, True),
+                (0.01, False),
+                (0.001, False),
+                ('0.01%', False),
+                (0, False),
+        ]:
+            results = compare_arrays_with_tolerance(student_values, instructor_values, tolerance, relative_tolerance)
+            self.assertEqual(
+                list(results),
+                [
+                    compare_with_tolerance(student, instructor, tolerance, relative_tolerance)
+                    for student, instructor in zip(student_values, instructor_values)
+                ],
+                msg='tolerance: {}, relative: {}'.format(tolerance, relative_tolerance),
+            )
+
     def test_sanitize_html(self):
         """
         Test for html sanitization with bleach.
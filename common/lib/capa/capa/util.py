@@ -5,6 +5,7 @@ import re
 from decimal import Decimal
 
 import bleach
+import numpy
 from lxml import etree
 
 from calc import evaluator
@@ -94,6 +95,60 @@ def compare_with_tolerance(student_complex, instructor_complex, tolerance=defaul
         return abs(student_complex - instructor_complex) <= tolerance
 
 
+def compare_arrays_with_tolerance(student_values, instructor_values, tolerance=default_tolerance,
+                                  relative_tolerance=False):
+    """
+    Compare each of student_values to the instructor value with the same index
+    with compare_with_tolerance, and return a numpy array of the results.
+
+    The comparisons are done with numpy over all of the values at once. Real
+    values are compared by compare_with_tolerance as decimals of their string
+    representations, which are rounded, so the values whose difference is too
+    close to the tolerance for the rounding to be ignored are compared again
+    with compare_with_tolerance itself.
+    """
+    student_values = numpy.asarray(student_values, dtype=complex)
+    instructor_values = numpy.asarray(instructor_values, dtype=complex)
+
+    tolerances = tolerance
+    if isinstance(tolerances, str):
+        if tolerances == default_tolerance:
+            relative_tolerance = True
+        if tolerances.endswith('%'):
+            tolerances = evaluator(dict(), dict(), tolerances[:-1]) * 0.01
+            if not relative_tolerance:
+                tolerances = tolerances * numpy.abs(instructor_values)
+        else:
+            tolerances = evaluator(dict(), dict(), tolerances)
+
+    with numpy.errstate(invalid='ignore', over='ignore'):
+        if relative_tolerance:
+            tolerances = tolerances * numpy.maximum(numpy.abs(student_values), numpy.abs(instructor_values))
+        tolerances = tolerances * numpy.ones(len(student_values))
+
+        differences = numpy.abs(student_values - instructor_values)
+        results = differences <= tolerances
+
+        # If an input is infinite, compare directly, as compare_with_tolerance does.
+        infinite = (
+            numpy.isinf(student_values.real) | numpy.isinf(student_values.imag) |
+            numpy.isinf(instructor_values.real) | numpy.isinf(instructor_values.imag)
+        )
+        results[infinite] = (student_values == instructor_values)[infinite]
+
+        real = ~infinite & (student_values.imag == 0) & (instructor_values.imag == 0)
+        rounding_margin = 1e-10 * (
+            numpy.maximum(numpy.abs(student_values), numpy.abs(instructor_values)) + numpy.abs(tolerances)
+        )
+        near_tolerance = real & (numpy.abs(differences - tolerances) <= rounding_margin)
+
+    for index in numpy.flatnonzero(near_tolerance):
+        results[index] = compare_with_tolerance(
+            student_values[index], instructor_values[index], tolerance, relative_tolerance
+        )
+    return results
+
+
 def contextualize_text(text, context):  # private
     """
     Takes a string with variables. E.g. $a+$b.
@@ -58,3 +58,21 @@ class AssetManager(object):
         compressed course structure from the structure cache.
         """
         return contentstore().find(asset_key, throw_on_not_found, as_stream)
+
+    @staticmethod
+    @contract(asset_key='AssetKey', throw_on_not_found='bool')
+    def find_metadata(asset_key, throw_on_not_found=True):
+        """
+        Finds the metadata of a course asset in the deprecated contentstore, as a StaticContent
+        without data, without reading the asset bytes.
+        """
+        return contentstore().find_metadata(asset_key, throw_on_not_found)
+
+    @staticmethod
+    @contract(asset_keys='list(AssetKey)')
+    def find_metadata_many(asset_keys):
+        """
+        Finds the metadata of many course assets in the deprecated contentstore at once, as a dict
+        of asset key to StaticContent without data, leaving out the assets which are not found.
+        """
+        return contentstore().find_metadata_many(asset_keys)
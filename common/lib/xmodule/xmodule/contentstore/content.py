@@ -2,6 +2,7 @@ import re
 import uuid
 
 from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.manifest import get_course_asset_manifest
 
 STATIC_CONTENT_VERSION = 1
 XASSET_LOCATION_TAG = 'c4x'
@@ -20,8 +21,6 @@ from urllib import urlencode, quote_plus
 from opaque_keys.edx.locator import AssetLocator
 from opaque_keys.edx.keys import CourseKey, AssetKey
 from opaque_keys import InvalidKeyError
-from xmodule.modulestore.exceptions import ItemNotFoundError
-from xmodule.exceptions import NotFoundError
 from PIL import Image
 
 
@@ -222,7 +221,7 @@ class StaticContent(object):
         return any(path.lower().endswith(excluded_ext.lower()) for excluded_ext in excluded_exts)
 
     @staticmethod
-    def get_canonicalized_asset_path(course_key, path, base_url, excluded_exts, encode=True):
+    def get_canonicalized_asset_path(course_key, path, base_url, excluded_exts, encode=True, asset_metadata=None):
         """
         Returns a fully-qualified path to a piece of static content.
 
@@ -232,6 +231,9 @@ class StaticContent(object):
         Args:
             course_key: key to the course which owns this asset
             path: the path to said content
+            asset_metadata: optional dict of asset key to the metadata of the
+                assets already found, as returned by `find_assets_metadata`, in
+                which case the asset is not looked up again
 
         Returns:
             string: fully-qualified path to asset
@@ -244,15 +246,13 @@ class StaticContent(object):
         asset_key = StaticContent.get_asset_key_from_path(course_key, relative_path)
 
         # Check the status of the asset to see if this can be served via CDN aka publicly.
-        serve_from_cdn = False
-        content_digest = None
-        try:
-            content = AssetManager.find(asset_key, as_stream=True)
-            serve_from_cdn = not getattr(content, "locked", True)
-            content_digest = getattr(content, "content_digest", None)
-        except (ItemNotFoundError, NotFoundError):
-            # If we can't find the item, just treat it as if it's locked.
-            serve_from_cdn = False
+        if asset_metadata is None:
+            content = StaticContent.find_assets_metadata([asset_key]).get(asset_key)
+        else:
+            content = asset_metadata.get(asset_key)
+        # If we can't find the item, just treat it as if it's locked.
+        serve_from_cdn = not getattr(content, "locked", True)
+        content_digest = getattr(content, "content_digest", None)
 
         # Do a generic check to see if anything about this asset disqualifies it from being CDN'd.
         is_excluded = False
@@ -268,7 +268,7 @@ class StaticContent(object):
         for query_name, query_val in query_params:
             if query_val.startswith("/static/"):
                 new_val = StaticContent.get_canonicalized_asset_path(
-                    course_key, query_val, base_url, excluded_exts, encode=False)
+                    course_key, query_val, base_url, excluded_exts, encode=False, asset_metadata=asset_metadata)
                 updated_query_params.append((query_name, new_val))
             else:
                 # Make sure we're encoding Unicode strings down to their byte string
@@ -291,6 +291,59 @@ class StaticContent(object):
 
         return urlunparse((None, base_url.encode('utf-8'), asset_path, params, urlencode(updated_query_params), None))
 
+    @staticmethod
+    def find_assets_metadata(asset_keys):
+        """
+        Returns the lock flag and content digest of the assets with the given keys
+        that exist, as a dict of asset key to an object with `locked` and
+        `content_digest` attributes.
+
+        The assets are looked up in the manifests of their courses, when available,
+        and otherwise in the contentstore, all at once.
+        """
+        found = {}
+        manifests = {}
+        not_in_manifests = []
+        for asset_key in asset_keys:
+            course_key = asset_key.course_key
+            if course_key not in manifests:
+                manifests[course_key] = get_course_asset_manifest(course_key)
+            manifest = manifests[course_key]
+            if manifest is None:
+                not_in_manifests.append(asset_key)
+            else:
+                entry = manifest.get(asset_key)
+                if entry is not None:
+                    found[asset_key] = entry
+
+        if not_in_manifests:
+            found.update(AssetManager.find_metadata_many(not_in_manifests))
+        return found
+
+    @staticmethod
+    def get_canonicalized_asset_paths(course_key, paths, base_url, excluded_exts):
+        """
+        Returns a dict of each of the given paths to its fully-qualified path,
+        as returned by `get_canonicalized_asset_path`, looking up all of the
+        assets they refer to at once.
+        """
+        asset_keys = set()
+        for path in paths:
+            _, _, relative_path, _, query_string, _ = urlparse(path)
+            asset_keys.add(StaticContent.get_asset_key_from_path(course_key, relative_path))
+            for _, query_val in parse_qsl(query_string):
+                if query_val.startswith("/static/"):
+                    query_relative_path = urlparse(query_val)[2]
+                    asset_keys.add(StaticContent.get_asset_key_from_path(course_key, query_relative_path))
+
+        asset_metadata = StaticContent.find_assets_metadata(list(asset_keys))
+        return {
+            path: StaticContent.get_canonicalized_asset_path(
+                course_key, path, base_url, excluded_exts, asset_metadata=asset_metadata
+            )
+            for path in paths
+        }
+
     def stream_data(self):
         yield self._data
 
@@ -358,6 +411,44 @@ class ContentStore(object):
     def find(self, filename):
         raise NotImplementedError
 
+    def find_metadata(self, location, throw_on_not_found=True):
+        """
+        Returns the asset at the given location as a StaticContent without
+        data. Stores that can read the metadata of an asset without its data
+        should override this.
+        """
+        content = self.find(location, throw_on_not_found=throw_on_not_found, as_stream=True)
+        if content is None:
+            return None
+        content.close()
+        return StaticContent(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+
+    def find_metadata_many(self, locations):
+        """
+        Returns the assets found at the given locations, as a dict of location
+        to StaticContent without data. Stores that can read the metadata of
+        many assets at once should override this.
+        """
+        found = {}
+        for location in locations:
+            content = self.find_metadata(location, throw_on_not_found=False)
+            if content is not None:
+                found[location] = content
+        return found
+
+    def get_asset_manifest(self, course_key):
+        """
+        Returns the content digest, lock flag and length of all of the assets and
+        thumbnails of the course, as a dict of their (block type, block id) to
+        their AssetManifestEntry.
+        """
+        raise NotImplementedError
+
     def get_all_content_for_course(self, course_key, start=0, maxresults=-1, sort=None, filter_params=None):
         '''
         Returns a list of static assets for a course, followed by the total number of assets.
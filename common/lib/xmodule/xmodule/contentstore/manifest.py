@@ -0,0 +1,72 @@
+"""
+Manifests of the assets of each course.
+
+The manifest of a course maps each of its assets, and their thumbnails, to
+their content digest, lock flag and length.  It is read from the contentstore
+in a single query, and cached under the version of the course assets, which
+changes on every save, delete or change of attributes of one of them.  Whether
+an asset exists, whether it is locked and what its digest is can then be
+answered without querying the contentstore for each asset.
+"""
+from collections import namedtuple
+
+from . import versioning
+
+AssetManifestEntry = namedtuple('AssetManifestEntry', ['content_digest', 'locked', 'length'])
+
+# Manifests of courses with more assets than this are not cached, to keep the
+# cache entries small; their assets are looked up in the contentstore instead.
+MAX_MANIFEST_SIZE = 10000
+
+MANIFEST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cached in place of the manifests of courses with too many assets, so that
+# they are not read again.
+_TOO_LARGE = 'too large'
+
+
+class CourseAssetManifest(object):
+    """
+    The manifest of the assets of a course.
+    """
+    def __init__(self, entries):
+        """
+        `entries` is a dict of the (block type, block id) of each asset to its
+        AssetManifestEntry.
+        """
+        self.entries = entries
+
+    def get(self, asset_key):
+        """
+        Returns the AssetManifestEntry of the asset with the given key, or None
+        if there is no such asset.
+        """
+        return self.entries.get((asset_key.block_type, asset_key.block_id))
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_course_asset_manifest(course_key):
+    """
+    Returns the CourseAssetManifest of the given course, or None if manifests
+    are not available, or the course has too many assets.
+    """
+    cache = versioning.get_cache()
+    version = versioning.get_course_assets_version(course_key)
+    if cache is None or version is None:
+        return None
+
+    key = u'{}.{}'.format(versioning.course_assets_key(course_key, 'manifest'), version)
+    entries = cache.get(key)
+    if entries is None:
+        # Imported here, as the contentstore is configured by Django.
+        from .django import contentstore
+        entries = contentstore().get_asset_manifest(course_key)
+        if len(entries) > MAX_MANIFEST_SIZE:
+            entries = _TOO_LARGE
+        cache.set(key, entries, MANIFEST_CACHE_TIMEOUT)
+
+    if entries == _TOO_LARGE:
+        return None
+    return CourseAssetManifest(entries)
@@ -17,6 +17,8 @@ from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 from xmodule.util.misc import escape_invalid_characters
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 from .content import StaticContent, ContentStore, StaticContentStream
+from .manifest import AssetManifestEntry
+from .versioning import update_course_assets_version
 
 
 class MongoContentStore(ContentStore):
@@ -100,16 +102,21 @@ class MongoContentStore(ContentStore):
             else:
                 fp.write(content.data)
 
+        update_course_assets_version(content.location.course_key)
         return content
 
     def delete(self, location_or_id):
         """
         Delete an asset.
         """
+        course_key = None
         if isinstance(location_or_id, AssetKey):
+            course_key = location_or_id.course_key
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        if course_key is not None:
+            update_course_assets_version(course_key)
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -152,6 +159,69 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
+    @autoretry_read()
+    def find_metadata(self, location, throw_on_not_found=True):
+        """
+        Returns the asset at the given location with its metadata only, as a
+        StaticContent without data: its file document is read, but none of its
+        chunks.
+        """
+        content_id, __ = self.asset_db_key(location)
+        item = self.fs_files.find_one({'_id': content_id})
+        if item is None:
+            if throw_on_not_found:
+                raise NotFoundError(content_id)
+            return None
+        return self._metadata_from_file_entry(location, item)
+
+    @autoretry_read()
+    def find_metadata_many(self, locations):
+        """
+        Returns the assets found at the given locations, as a dict of location
+        to StaticContent without data, reading all of their file documents
+        in a single query.
+        """
+        locations_by_id = {}
+        for location in locations:
+            content_id, __ = self.asset_db_key(location)
+            locations_by_id[self._hashable_id(content_id)] = (location, content_id)
+        if not locations_by_id:
+            return {}
+
+        found = {}
+        content_ids = [content_id for __, content_id in locations_by_id.itervalues()]
+        for item in self.fs_files.find({'_id': {'$in': content_ids}}):
+            location, __ = locations_by_id[self._hashable_id(item['_id'])]
+            found[location] = self._metadata_from_file_entry(location, item)
+        return found
+
+    @staticmethod
+    def _hashable_id(content_id):
+        """
+        Returns a hashable value identifying the given database _id, which is
+        a SON for deprecated asset locations, and a string otherwise.
+        """
+        if isinstance(content_id, dict):
+            return tuple(sorted(content_id.items()))
+        return content_id
+
+    @staticmethod
+    def _metadata_from_file_entry(location, item):
+        """
+        Returns the asset at the given location, described by the given file
+        document, as a StaticContent without data.
+        """
+        thumbnail_location = item.get('thumbnail_location')
+        if thumbnail_location:
+            thumbnail_location = location.course_key.make_asset_key('thumbnail', thumbnail_location[4])
+        return StaticContent(
+            location, item.get('displayname'), item.get('contentType'), None, last_modified_at=item.get('uploadDate'),
+            thumbnail_location=thumbnail_location,
+            import_path=item.get('import_path'),
+            length=item.get('length'), locked=item.get('locked', False),
+            content_digest=item.get('md5'),
+        )
+
     def export(self, location, output_directory):
         content = self.find(location)
 
@@ -314,6 +384,22 @@ class MongoContentStore(ContentStore):
             asset['asset_key'] = course_key.make_asset_key(asset_id['category'], asset_id['name'])
         return assets, count
 
+    @autoretry_read()
+    def get_asset_manifest(self, course_key):
+        """
+        See :meth:`.ContentStore.get_asset_manifest`
+
+        Only the needed fields of the file documents of the assets are read, in a single query.
+        """
+        manifest = {}
+        fields = {'content_son': True, 'md5': True, 'locked': True, 'length': True}
+        for item in self.fs_files.find(query_for_course(course_key), fields):
+            asset_id = item.get('content_son', item['_id'])
+            manifest[(asset_id['category'], asset_id['name'])] = AssetManifestEntry(
+                item.get('md5'), item.get('locked', False), item.get('length')
+            )
+        return manifest
+
     def set_attr(self, asset_key, attr, value=True):
         """
         Add/set the given attr on the asset at the given location. Does not allow overwriting gridFS built in
@@ -357,6 +443,7 @@ class MongoContentStore(ContentStore):
         result = self.fs_files.update({'_id': asset_db_key}, {"$set": attr_dict}, upsert=False)
         if not result.get('updatedExisting', True):
             raise NotFoundError(asset_db_key)
+        update_course_assets_version(location.course_key)
 
     @autoretry_read()
     def get_attrs(self, location):
@@ -413,6 +500,7 @@ class MongoContentStore(ContentStore):
                 # getattr b/c caching may mean some pickled instances don't have attr
                 locked=asset.get('locked', False)
             )
+        update_course_assets_version(dest_course_key)
 
     def delete_all_course_assets(self, course_key):
         """
@@ -425,6 +513,7 @@ class MongoContentStore(ContentStore):
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
             self.fs.delete(asset_key)
+        update_course_assets_version(course_key)
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
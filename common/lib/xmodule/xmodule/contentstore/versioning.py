@@ -0,0 +1,80 @@
+"""
+Versions of the assets of each course.
+
+Every change to the assets of a course, through the contentstore, gives them
+a new version.  Values derived from the assets of a course, like HTML in which
+their URLs were rewritten, can then be cached under the version they were
+derived from, and are never used once the assets change.
+
+Versions are kept in the "course_assets" cache, or the default cache if there
+is none.  Without Django, or with a dummy cache, courses have no version.
+"""
+import hashlib
+from uuid import uuid4
+
+try:
+    from django.core.cache import caches, InvalidCacheBackendError
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.exceptions import ImproperlyConfigured
+    DJANGO_AVAILABLE = True
+except ImportError:
+    DJANGO_AVAILABLE = False
+
+
+def get_cache():
+    """
+    Returns the cache the versions, and the values cached under them, are kept in,
+    or None if there is none.
+    """
+    if not DJANGO_AVAILABLE:
+        return None
+    try:
+        try:
+            cache = caches['course_assets']
+        except InvalidCacheBackendError:
+            cache = caches['default']
+    except ImproperlyConfigured:
+        return None
+    if isinstance(cache, DummyCache):
+        return None
+    return cache
+
+
+def course_assets_key(course_key, name):
+    """
+    Returns a cache key for the value with the given name about the assets of the
+    given course.
+    """
+    if getattr(course_key, 'deprecated', False):
+        # The assets of old style courses are stored without the course run.
+        course_id = u'{}/{}'.format(course_key.org, course_key.course)
+    else:
+        course_id = unicode(course_key.for_branch(None))
+    return 'course_assets.{}.{}'.format(name, hashlib.md5(course_id.encode('utf-8')).hexdigest())
+
+
+def get_course_assets_version(course_key):
+    """
+    Returns the current version of the assets of the given course, or None if
+    versions are not available.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    key = course_assets_key(course_key, 'version')
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            # Another process has just given the assets a version.
+            version = cache.get(key, version)
+    return version
+
+
+def update_course_assets_version(course_key):
+    """
+    Gives the assets of the given course a new version, after they changed.
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.set(course_assets_key(course_key, 'version'), uuid4().hex, None)
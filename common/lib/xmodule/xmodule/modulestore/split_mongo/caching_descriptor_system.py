@@ -25,6 +25,9 @@ from xmodule.x_module import XModuleMixin
 
 log = logging.getLogger(__name__)
 
+# Default maximum number of definitions fetched together when prefetching definitions
+DEFAULT_DEFINITION_PREFETCH_MAX_SIZE = 100
+
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('CourseLocator', CourseLocator)
 new_contract('LibraryLocator', LibraryLocator)
@@ -42,7 +45,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     Computes the settings (nee 'metadata') inheritance upon creation.
     """
     @contract(course_entry=CourseEnvelope)
-    def __init__(self, modulestore, course_entry, default_class, module_data, lazy, **kwargs):
+    def __init__(self, modulestore, course_entry, default_class, module_data, lazy,
+                 definition_prefetch_depth=0, definition_prefetch_max_size=DEFAULT_DEFINITION_PREFETCH_MAX_SIZE,
+                 **kwargs):
         """
         Computes the settings inheritance and sets up the cache.
 
@@ -55,6 +60,12 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         module_data: a dict mapping Location -> json that was cached from the
             underlying modulestore
+
+        definition_prefetch_depth: when lazy, the number of levels of descendants of a loaded block
+            whose definitions are fetched together, in a single query, rather than one at a time
+            when each block's content is first accessed. 0 disables prefetching.
+
+        definition_prefetch_max_size: the maximum number of definitions fetched in a single prefetch.
         """
         # needed by capa_problem (as runtime.filestore via this.resources_fs)
         if course_entry.course_key.course:
@@ -82,8 +93,28 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # block key -> (edit_info, subtree edited on, subtree edited by), kept here rather than
+        # in the block data, as structures may be shared with other requests
+        self._subtree_edit_info = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
+        self.definition_prefetch_depth = definition_prefetch_depth if lazy else 0
+        self.definition_prefetch_max_size = definition_prefetch_max_size
+        # definition id -> prefetched definition, for the lazy loaders of this system's blocks
+        self._prefetched_definitions = {}
+        # keys of the blocks whose descendants' definitions were already prefetched
+        self._prefetched_block_keys = set()
+        self.definition_prefetch_stats = {
+            # number of definitions fetched by prefetches
+            'prefetched': 0,
+            # number of prefetch queries made
+            'prefetch_queries': 0,
+            # number of lazy loads served from prefetched definitions, i.e. queries avoided
+            'avoided_lazy_loads': 0,
+            # number of lazy loads that still had to query for their definition
+            'lazy_loads': 0,
+        }
+
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
     def _parent_map(self):
@@ -128,6 +159,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
             return cached_module
 
         block_data = self.get_module_data(block_key, course_key)
+        if self.definition_prefetch_depth and block_data.fields.get('children'):
+            self._prefetch_definitions(block_key, course_key)
 
         class_ = self.load_block_type(block_data.block_type)
         block = self.xblock_from_json(class_, course_key, block_key, block_data, course_entry_override, **kwargs)
@@ -159,6 +192,59 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return json_data
 
+    @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
+    def _prefetch_definitions(self, block_key, course_key):
+        """
+        Fetch, in a single query, the pending definitions of the descendants of the given block, down
+        to definition_prefetch_depth levels and up to definition_prefetch_max_size of them, so that
+        their lazy loaders don't each query for their own definition.
+        """
+        if block_key in self._prefetched_block_keys:
+            return
+        self._prefetched_block_keys.add(block_key)
+
+        blocks = self.course_entry.structure['blocks']
+        definition_ids = set()
+        level = [block_key]
+        for __ in xrange(self.definition_prefetch_depth):
+            level = [
+                child_key
+                for parent_key in level
+                for child_key in blocks[parent_key].fields.get('children', [])
+                if child_key in blocks
+            ]
+            for child_key in level:
+                block_data = self.module_data.get(child_key, blocks[child_key])
+                if (  # pylint: disable=bad-continuation
+                    block_data.definition is not None and
+                    not block_data.definition_loaded and
+                    block_data.definition not in self._prefetched_definitions
+                ):
+                    definition_ids.add(block_data.definition)
+                    if len(definition_ids) >= self.definition_prefetch_max_size:
+                        break
+            if not level or len(definition_ids) >= self.definition_prefetch_max_size:
+                break
+
+        if definition_ids:
+            definitions = self.modulestore.get_definitions(course_key, list(definition_ids))
+            for definition in definitions:
+                self._prefetched_definitions[definition['_id']] = definition
+            self.definition_prefetch_stats['prefetched'] += len(definitions)
+            self.definition_prefetch_stats['prefetch_queries'] += 1
+
+    def get_prefetched_definition(self, definition_id):
+        """
+        Return the prefetched definition with the given id, or None if it wasn't prefetched.
+        Used by the lazy loaders of this system's blocks.
+        """
+        definition = self._prefetched_definitions.get(definition_id)
+        if definition is None:
+            self.definition_prefetch_stats['lazy_loads'] += 1
+        else:
+            self.definition_prefetch_stats['avoided_lazy_loads'] += 1
+        return definition
+
     # xblock's runtime does not always pass enough contextual information to figure out
     # which named container (course x branch) or which parent is requesting an item. Because split allows
     # a many:1 mapping from named containers to structures and because item's identities encode
@@ -198,6 +284,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 block_key.type,
                 definition_id,
                 convert_fields,
+                definition_cache=self if self.definition_prefetch_depth else None,
             )
         else:
             definition_loader = None
@@ -304,12 +391,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         """
         # pylint: disable=protected-access
         if not hasattr(xblock, '_subtree_edited_by'):
-            block_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if block_data.edit_info._subtree_edited_by is None:
-                self._compute_subtree_edited_internal(
-                    block_data, xblock.location.course_key
-                )
-            xblock._subtree_edited_by = block_data.edit_info._subtree_edited_by
+            xblock._subtree_edited_on, xblock._subtree_edited_by = self._get_subtree_edit_info(
+                BlockKey.from_usage_key(xblock.location), xblock.location.course_key
+            )
 
         return xblock._subtree_edited_by
 
@@ -320,12 +404,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         """
         # pylint: disable=protected-access
         if not hasattr(xblock, '_subtree_edited_on'):
-            block_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if block_data.edit_info._subtree_edited_on is None:
-                self._compute_subtree_edited_internal(
-                    block_data, xblock.location.course_key
-                )
-            xblock._subtree_edited_on = block_data.edit_info._subtree_edited_on
+            xblock._subtree_edited_on, xblock._subtree_edited_by = self._get_subtree_edit_info(
+                BlockKey.from_usage_key(xblock.location), xblock.location.course_key
+            )
 
         return xblock._subtree_edited_on
 
@@ -347,25 +428,34 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return getattr(xblock, '_published_on', None)
 
-    @contract(block_data='BlockData')
-    def _compute_subtree_edited_internal(self, block_data, course_key):
+    @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
+    def _get_subtree_edit_info(self, block_key, course_key):
         """
-        Recurse the subtree finding the max edited_on date and its corresponding edited_by. Cache it.
+        Return the max edited_on date in the subtree of the given block and its corresponding
+        edited_by, recursing the subtree the first time. Cache them in this system until the
+        block's data is replaced.
         """
         # pylint: disable=protected-access
-        max_date = block_data.edit_info.edited_on
-        max_date_by = block_data.edit_info.edited_by
-
-        for child in block_data.fields.get('children', []):
-            child_data = self.get_module_data(BlockKey(*child), course_key)
-            if block_data.edit_info._subtree_edited_on is None:
-                self._compute_subtree_edited_internal(child_data, course_key)
-            if child_data.edit_info._subtree_edited_on > max_date:
-                max_date = child_data.edit_info._subtree_edited_on
-                max_date_by = child_data.edit_info._subtree_edited_by
-
-        block_data.edit_info._subtree_edited_on = max_date
-        block_data.edit_info._subtree_edited_by = max_date_by
+        block_data = self.get_module_data(block_key, course_key)
+        edit_info = block_data.edit_info
+        cached = self._subtree_edit_info.get(block_key)
+        if cached is not None and cached[0] is edit_info:
+            return cached[1:]
+
+        if edit_info._subtree_edited_on is not None:
+            max_date = edit_info._subtree_edited_on
+            max_date_by = edit_info._subtree_edited_by
+        else:
+            max_date = edit_info.edited_on
+            max_date_by = edit_info.edited_by
+            for child in block_data.fields.get('children', []):
+                child_date, child_date_by = self._get_subtree_edit_info(BlockKey(*child), course_key)
+                if child_date > max_date:
+                    max_date = child_date
+                    max_date_by = child_date_by
+
+        self._subtree_edit_info[block_key] = (edit_info, max_date, max_date_by)
+        return max_date, max_date_by
 
     def get_aside_of_type(self, block, aside_type):
         """
@@ -13,6 +13,7 @@ from time import time
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
+from pymongo.errors import BulkWriteError
 
 try:
     from django.core.cache import caches, InvalidCacheBackendError
@@ -25,6 +26,7 @@ import logging
 
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
+from openedx.core.lib.cache_utils import SizeBoundedLRUCache
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
@@ -34,6 +36,10 @@ from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 new_contract('BlockData', BlockData)
 log = logging.getLogger(__name__)
 
+# Rough memory footprint of a decoded block of a structure, including its settings fields
+# and edit info, used to bound the total size of the structures cached per process.
+APPROXIMATE_STRUCTURE_BYTES_PER_BLOCK = 2 * 1024
+
 
 def get_cache(alias):
     """
@@ -162,6 +168,9 @@ class QueryTimer(object):
 
 TIMER = QueryTimer(__name__, 0.01)
 
+# Error code of the writes which fail on a duplicate key.
+DUPLICATE_KEY_ERROR = 11000
+
 
 def structure_from_mongo(structure, course_context=None):
     """
@@ -262,22 +271,68 @@ class CourseStructureCache(object):
 
             return pickle.loads(pickled_data)
 
+    def get_many(self, keys, course_context=None):
+        """
+        Pull the compressed, pickled struct data of all the given keys from cache in a single
+        request and deserialize them. Returns a dict of key to struct data for the keys found.
+        """
+        if self.cache is None or not keys:
+            return {}
+
+        with TIMER.timer("CourseStructureCache.get_many", course_context) as tagger:
+            tagger.measure('requested_keys', len(keys))
+            compressed_pickled_data_map = self.cache.get_many(keys)
+            tagger.measure('found_keys', len(compressed_pickled_data_map))
+
+            return {
+                key: pickle.loads(zlib.decompress(compressed_pickled_data))
+                for key, compressed_pickled_data in compressed_pickled_data_map.iteritems()
+            }
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
-            tagger.measure('uncompressed_size', len(pickled_data))
-
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            compressed_pickled_data = self._compress(structure, tagger)
 
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+    def set_many(self, structures, course_context=None):
+        """Given a dict of key to structure, will pickle, compress, and write them to cache at once."""
+        if self.cache is None or not structures:
+            return None
+
+        with TIMER.timer("CourseStructureCache.set_many", course_context) as tagger:
+            tagger.measure('keys', len(structures))
+            compressed_pickled_data_map = {
+                key: self._compress(structure, tagger)
+                for key, structure in structures.iteritems()
+            }
+
+            # Stuctures are immutable, so we set a timeout of "never"
+            self.cache.set_many(compressed_pickled_data_map, None)
+
+    def _compress(self, structure, tagger):
+        """Pickle and compress the given structure, recording its sizes with the tagger."""
+        pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+        tagger.measure('uncompressed_size', len(pickled_data))
+
+        # 1 = Fastest (slightly larger results)
+        compressed_pickled_data = zlib.compress(pickled_data, 1)
+        tagger.measure('compressed_size', len(compressed_pickled_data))
+        return compressed_pickled_data
+
+
+def structure_size_in_bytes(structure):
+    """
+    Return the approximate memory footprint of the given structure, estimated from its
+    number of blocks, as measuring it would cost as much as decoding it.
+    """
+    return len(structure['blocks']) * APPROXIMATE_STRUCTURE_BYTES_PER_BLOCK
+
 
 class MongoConnection(object):
     """
@@ -285,10 +340,15 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache_size=0, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        structure_cache_size is the maximum approximate size, in bytes, of the decoded structures
+        kept in memory by this process in front of the shared course_structure_cache. Structures
+        are immutable once saved, so they can be shared by all requests in the process. 0 (the
+        default) disables the in-process cache.
         """
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
@@ -304,6 +364,8 @@ class MongoConnection(object):
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
 
+        self.structure_cache = SizeBoundedLRUCache(structure_cache_size)
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -317,9 +379,18 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key.
 
-        This method will use a cached version of the structure if it is available.
+        This method will use a cached version of the structure if it is available, first from
+        this process' in-memory cache and then from the shared course_structure_cache.
+
+        The returned structure may be shared with other callers in this process, so it must not
+        be modified; use a copy to create a new version of it.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
+            structure = self.structure_cache.get(key)
+            tagger_get_structure.tag(from_process_cache=str(structure is not None).lower())
+            if structure is not None:
+                return structure
+
             cache = CourseStructureCache()
 
             structure = cache.get(key, course_context)
@@ -342,12 +413,70 @@ class MongoConnection(object):
 
                 cache.set(key, structure, course_context)
 
+            self._add_to_structure_cache(key, structure)
             return structure
 
-    @autoretry_read()
+    def get_structures_many(self, keys, course_context=None):
+        """
+        Get the structures whose ids are the given keys, looking them up in this process'
+        in-memory cache, then in the shared course_structure_cache with a single multi-get, and
+        then in the persistence mechanism with a single query.
+
+        Returns a dict of key to structure for the structures found. As with get_structure, the
+        returned structures must not be modified.
+        """
+        with TIMER.timer("get_structures_many", course_context) as tagger:
+            tagger.measure("requested_ids", len(keys))
+            structures = {}
+            for key in keys:
+                structure = self.structure_cache.get(key)
+                if structure is not None:
+                    structures[key] = structure
+            tagger.measure("from_process_cache", len(structures))
+
+            cache = CourseStructureCache()
+            missing_keys = [key for key in keys if key not in structures]
+            cached_structures = cache.get_many(missing_keys, course_context)
+            tagger.measure("from_cache", len(cached_structures))
+
+            missing_keys = [key for key in missing_keys if key not in cached_structures]
+            db_structures = {}
+            if missing_keys:
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+                db_structures = {
+                    structure['_id']: structure
+                    for structure in self._find_structures_by_id(missing_keys, course_context)
+                }
+                tagger.measure("from_db", len(db_structures))
+                cache.set_many(db_structures, course_context)
+
+            for key, structure in cached_structures.items() + db_structures.items():
+                self._add_to_structure_cache(key, structure)
+                structures[key] = structure
+            return structures
+
+    def _add_to_structure_cache(self, key, structure):
+        """
+        Add the given decoded structure to this process' in-memory cache, if it is enabled.
+        """
+        if self.structure_cache.max_size_in_bytes:
+            self.structure_cache.set(key, structure, structure_size_in_bytes(structure))
+
     def find_structures_by_id(self, ids, course_context=None):
         """
-        Return all structures that specified in ``ids``.
+        Return all structures that specified in ``ids``, using the structure caches when
+        available. As with get_structure, the returned structures must not be modified.
+
+        Arguments:
+            ids (list): A list of structure ids
+        """
+        return self.get_structures_many(ids, course_context).values()
+
+    @autoretry_read()
+    def _find_structures_by_id(self, ids, course_context=None):
+        """
+        Return all structures that specified in ``ids`` from the database.
 
         Arguments:
             ids (list): A list of structure ids
@@ -578,6 +707,24 @@ class MongoConnection(object):
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create the definitions in the db in a single request, skipping those which
+        are already in the db.
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            try:
+                self.definitions.insert_many(definitions, ordered=False)
+            except BulkWriteError as error:
+                # The store is append only, so a definition which is already in the db is the same one.
+                write_errors = error.details.get('writeErrors', [])
+                if error.details.get('writeConcernErrors') or any(
+                        write_error['code'] != DUPLICATE_KEY_ERROR for write_error in write_errors
+                ):
+                    raise
+                log.debug("Attempted to insert %d duplicate definitions", len(write_errors))
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -622,6 +769,7 @@ class MongoConnection(object):
         If connections is True, then close the connection to the database as well.
         """
         connection = self.database.connection
+        self.structure_cache.clear()
 
         if database:
             connection.drop_database(self.database.name)
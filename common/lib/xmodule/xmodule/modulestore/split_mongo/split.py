@@ -84,15 +84,17 @@ from xmodule.modulestore import (
 )
 
 from ..exceptions import ItemNotFoundError
-from .caching_descriptor_system import CachingDescriptorSystem
+from .caching_descriptor_system import CachingDescriptorSystem, DEFAULT_DEFINITION_PREFETCH_MAX_SIZE
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, DEFAULT_CACHE_SIZE_IN_BYTES
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
+from openedx.core.lib.cache_utils import SizeBoundedLRUCache
 
 
 log = logging.getLogger(__name__)
@@ -258,16 +260,17 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
+        new_definition_ids = bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+        if new_definition_ids:
             dirty = True
 
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+            # Definitions are written in a single request, as an import creates one per block.
+            # Those already in the database are skipped, as we may not have looked them up inside
+            # this bulk operation. That's OK, the store is append only.
+            self.db_connection.insert_definitions(
+                [bulk_write_record.definitions[_id] for _id in new_definition_ids],
+                bulk_write_record.course_key
+            )
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             dirty = True
@@ -697,14 +700,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None,
+                 structure_index_cache_size=DEFAULT_CACHE_SIZE_IN_BYTES, structure_cache_size=0,
+                 definition_prefetch_depth=0, definition_prefetch_max_size=DEFAULT_DEFINITION_PREFETCH_MAX_SIZE,
+                 **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_index_cache_size: the maximum approximate size, in bytes, of the block indexes
+            of persisted structures kept in memory for get_items. 0 disables the cache.
+        :param structure_cache_size: the maximum approximate size, in bytes, of the decoded structures
+            kept in memory in front of the course_structure_cache. 0 (the default) disables the cache.
+        :param definition_prefetch_depth: for lazily loaded blocks, the number of levels of descendants
+            of a loaded block whose definitions are fetched in a single query. 0 (the default) disables
+            prefetching, so each definition is fetched when its block's content is first accessed.
+        :param definition_prefetch_max_size: the maximum number of definitions fetched in a single prefetch.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache_size=structure_cache_size, **doc_store_config)
 
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
@@ -729,6 +743,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["request_cache"] = self.request_cache
 
         self.signal_handler = signal_handler
+        self.structure_index_cache = SizeBoundedLRUCache(structure_index_cache_size)
+        self.definition_prefetch_depth = definition_prefetch_depth
+        self.definition_prefetch_max_size = definition_prefetch_max_size
 
     def close_connections(self):
         """
@@ -796,12 +813,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 definitions = {definition['_id']: definition
                                for definition in descendent_definitions}
 
-                for block in new_module_data.itervalues():
+                for block_key, block in new_module_data.items():
                     if block.definition in definitions:
                         definition = definitions[block.definition]
+                        # Structures may be shared with other requests, so load the definition
+                        # into a copy of the block rather than into the structure itself.
+                        block = copy.copy(block)
+                        block.fields = dict(block.fields)
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+                        new_module_data[block_key] = block
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -1280,20 +1302,20 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                # Don't do an in comparison blindly; first check to make sure
-                # that the name qualifier we're looking at isn't a plain string;
-                # if it is a string, then it should match exactly. If it's other
-                # than a string, we check whether it contains the block ID; this
-                # is so a list or other iterable can be passed with multiple
-                # valid qualifiers.
-                if isinstance(block_name, six.string_types):
-                    name_matches = block_id.id == block_name
-                else:
-                    name_matches = block_id.id in block_name
-                if name_matches and _block_matches_all(block):
-                    block_ids.append(block_id)
+            # Don't do an in comparison blindly; first check to make sure
+            # that the name qualifier we're looking at isn't a plain string;
+            # if it is a string, then it should match exactly. If it's other
+            # than a string, it contains the block IDs; this is so a list or
+            # other iterable can be passed with multiple valid qualifiers.
+            if isinstance(block_name, six.string_types):
+                block_name = [block_name]
+            structure_index = self._get_structure_index(course)
+            block_ids = [
+                block_id
+                for name in set(block_name)
+                for block_id in structure_index.get_blocks_with_id(name)
+                if _block_matches_all(course.structure['blocks'][block_id])
+            ]
 
             return self._load_items(course, block_ids, **kwargs)
 
@@ -1304,20 +1326,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
-
-        if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+        # narrow the search down to the candidate blocks found in the structure's indexes, if any
+        structure_index = self._get_structure_index(course)
+        block_ids = structure_index.get_candidates(qualifiers, settings)
+        if block_ids is None:
+            block_ids = course.structure['blocks'].iterkeys()
 
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        for block_id in block_ids:
+            value = course.structure['blocks'].get(block_id)
+            if value is not None and _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
                         block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
+                        structure_index.has_path_to_root(block_id)
                     ):
                         items.append(block_id)
                 else:
@@ -1328,6 +1349,31 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_structure_index(self, course):
+        """
+        Returns the StructureIndex of the given course's structure.
+
+        Indexes of persisted structures are cached, keyed on the structure's version,
+        since those structures are never modified. A structure that is being edited in
+        an active bulk operation keeps its version while it changes, so its index is
+        rebuilt on each call instead.
+
+        :param course: CourseEnvelope of the structure to index
+        """
+        version_guid = course.structure['_id']
+        is_being_edited = any(
+            version_guid in bulk_write_record.structures and version_guid not in bulk_write_record.structures_in_db
+            for _, bulk_write_record in self._active_records
+        )
+        if is_being_edited:
+            return StructureIndex(course.structure)
+
+        structure_index = self.structure_index_cache.get(version_guid)
+        if structure_index is None:
+            structure_index = StructureIndex(course.structure)
+            self.structure_index_cache.set(version_guid, structure_index, structure_index.size_in_bytes)
+        return structure_index
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -1396,14 +1442,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.get_parents(BlockKey.from_usage_key(locator))
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if structure_index.has_path_to_root(valid_parent)
         ]
 
         if len(parent_ids) == 0:
@@ -3453,6 +3500,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             select=self.xblock_select,
             disabled_xblock_types=self.disabled_xblock_types,
             services=services,
+            definition_prefetch_depth=self.definition_prefetch_depth,
+            definition_prefetch_max_size=self.definition_prefetch_max_size,
         )
 
     def ensure_indexes(self):
@@ -0,0 +1,139 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure, used
+to answer common get_items queries without scanning every block.
+
+Persisted structures are never modified (edits create a new structure
+version), so indexes are keyed on the structure's version and never go
+stale.
+"""
+from collections import defaultdict
+
+import six
+
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+# Rough memory footprint of the indexes per block in a structure, used to
+# bound the total size of cached indexes.
+APPROXIMATE_BYTES_PER_BLOCK = 500
+
+# Default maximum total size of the structure indexes cached per process.
+DEFAULT_CACHE_SIZE_IN_BYTES = 64 * 1024 * 1024
+
+# Block types that can be the root of a course tree.
+ROOT_BLOCK_TYPES = ('course', 'library')
+
+
+class StructureIndex(object):
+    """
+    Indexes of the blocks of a single structure version by block type,
+    by block id, by parent and by whether they can be reached from the
+    root of the course.
+    """
+    def __init__(self, structure):
+        self.version = structure['_id']
+        self.num_blocks = len(structure['blocks'])
+
+        self._by_type = defaultdict(list)
+        self._by_id = defaultdict(list)
+        self._parents = defaultdict(list)
+        for block_key, block_data in structure['blocks'].iteritems():
+            self._by_type[block_key.type].append(block_key)
+            self._by_id[block_key.id].append(block_key)
+            for child_key in block_data.fields.get('children', []):
+                self._parents[child_key].append(block_key)
+
+        self._reachable = self._find_reachable_blocks(structure['blocks'])
+
+    @property
+    def size_in_bytes(self):
+        """
+        Returns the approximate memory footprint of this index.
+        """
+        return self.num_blocks * APPROXIMATE_BYTES_PER_BLOCK
+
+    def get_blocks_of_type(self, block_type):
+        """
+        Returns the keys of the blocks of the given type.
+        """
+        return self._by_type.get(block_type, [])
+
+    def get_blocks_with_id(self, block_id):
+        """
+        Returns the keys of the blocks, of any type, with the given id.
+        """
+        return self._by_id.get(block_id, [])
+
+    def get_parents(self, block_key):
+        """
+        Returns the keys of the blocks that have the given block as a
+        child.
+        """
+        return self._parents.get(block_key, [])
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether the given block is a root block or a descendant
+        of one, i.e. whether it is not an orphan.
+        """
+        return block_key in self._reachable
+
+    def get_candidates(self, qualifiers, settings):
+        """
+        Returns the keys of the blocks that may match the given get_items
+        qualifiers and settings, or None if the indexes cannot narrow
+        down the search and all blocks need to be checked.
+
+        Only the block_type qualifier and the children setting are
+        answered from the indexes; callers still need to check that each
+        candidate matches all of the criteria.
+        """
+        block_type = qualifiers.get('block_type')
+        if isinstance(block_type, six.string_types):
+            return self.get_blocks_of_type(block_type)
+        elif _is_in_criteria(block_type):
+            return [
+                block_key
+                for value in set(block_type['$in'])
+                for block_key in self.get_blocks_of_type(value)
+            ]
+
+        child_key = settings.get('children')
+        if isinstance(child_key, BlockKey):
+            return self.get_parents(child_key)
+
+        return None
+
+    def _find_reachable_blocks(self, blocks):
+        """
+        Returns the set of keys of the root blocks, those of a root type
+        without any parents, and of all of their descendants.
+        """
+        stack = [
+            block_key
+            for block_type in ROOT_BLOCK_TYPES
+            for block_key in self.get_blocks_of_type(block_type)
+            if not self._parents.get(block_key)
+        ]
+        reachable = set()
+        while stack:
+            block_key = stack.pop()
+            if block_key in reachable:
+                continue
+            reachable.add(block_key)
+            block_data = blocks.get(block_key)
+            if block_data is not None:
+                stack.extend(block_data.fields.get('children', []))
+        return frozenset(reachable)
+
+
+def _is_in_criteria(criteria):
+    """
+    Returns whether the given get_items criteria is an $in query over
+    plain string values.
+    """
+    return (
+        isinstance(criteria, dict) and
+        criteria.keys() == ['$in'] and
+        all(isinstance(value, six.string_types) for value in criteria['$in'])
+    )
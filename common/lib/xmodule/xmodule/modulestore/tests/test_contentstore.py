@@ -123,6 +123,55 @@ class TestContentstore(unittest.TestCase):
             "Found unknown asset {}".format(unknown_asset)
         )
 
+    @ddt.data(True, False)
+    def test_find_metadata(self, deprecated):
+        """
+        Test using find_metadata
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', self.course1_files[1])
+        content = self.contentstore.find(asset_key)
+        metadata = self.contentstore.find_metadata(asset_key)
+        self.assertIsNone(metadata.data)
+        for attr in ('name', 'content_type', 'length', 'locked', 'content_digest', 'last_modified_at'):
+            self.assertEqual(getattr(metadata, attr), getattr(content, attr))
+
+        unknown_asset = self.course1_key.make_asset_key('asset', 'no_such_file.gif')
+        with self.assertRaises(NotFoundError):
+            self.contentstore.find_metadata(unknown_asset)
+        self.assertIsNone(self.contentstore.find_metadata(unknown_asset, throw_on_not_found=False))
+
+    @ddt.data(True, False)
+    def test_find_metadata_many(self, deprecated):
+        """
+        Test using find_metadata_many
+        """
+        self.set_up_assets(deprecated)
+        asset_keys = [self.course1_key.make_asset_key('asset', filename) for filename in self.course1_files]
+        unknown_asset = self.course1_key.make_asset_key('asset', 'no_such_file.gif')
+        found = self.contentstore.find_metadata_many(asset_keys + [unknown_asset])
+        self.assertEqual(set(found), set(asset_keys))
+        for asset_key in asset_keys:
+            metadata = self.contentstore.find_metadata(asset_key)
+            for attr in ('name', 'content_type', 'length', 'locked', 'content_digest', 'last_modified_at'):
+                self.assertEqual(getattr(found[asset_key], attr), getattr(metadata, attr))
+        self.assertEqual(self.contentstore.find_metadata_many([]), {})
+
+    @ddt.data(True, False)
+    def test_get_asset_manifest(self, deprecated):
+        """
+        Test the manifest of the assets of a course
+        """
+        self.set_up_assets(deprecated)
+        manifest = self.contentstore.get_asset_manifest(self.course1_key)
+        self.assertEqual(set(manifest), {('asset', filename) for filename in self.course1_files})
+        for filename in self.course1_files:
+            metadata = self.contentstore.find_metadata(self.course1_key.make_asset_key('asset', filename))
+            self.assertEqual(
+                manifest[('asset', filename)],
+                (metadata.content_digest, metadata.locked, metadata.length)
+            )
+
     @ddt.data(True, False)
     def test_export_for_course(self, deprecated):
         """
@@ -16,6 +16,7 @@ from nose.plugins.attrib import attr
 from django.core.cache import caches, InvalidCacheBackendError
 
 from openedx.core.lib import tempdir
+from openedx.core.lib.cache_utils import SizeBoundedLRUCache
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore import ModuleStoreEnum
@@ -999,6 +1000,50 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    def test_process_cache(self):
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'structure_cache', SizeBoundedLRUCache(10 * 1024 * 1024)):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # even with the dummy course_structure_cache, the structure is now in this process' cache
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+
+            self.assertIs(cached_structure, not_cached_structure)
+            self.assertEqual(db_connection.structure_cache.stats()['hits'], 1)
+
+    def test_process_cache_subtree_edit_info(self):
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'structure_cache', SizeBoundedLRUCache(10 * 1024 * 1024)):
+            course = modulestore().get_course(self.new_course.id)
+            self.assertIsNotNone(course.subtree_edited_on)
+            self.assertEqual(course.subtree_edited_by, self.user)
+
+            # the subtree edit info is kept by the runtime, not in the shared structure
+            structure = self._get_structure(self.new_course)
+            for block_data in structure['blocks'].itervalues():
+                self.assertIsNone(block_data.edit_info._subtree_edited_on)  # pylint: disable=protected-access
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_find_structures_by_id(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        other_course = modulestore().create_course('org', 'course', 'other_run', self.user, BRANCH_NAME_DRAFT)
+        structure_ids = [
+            course.location.as_object_id(course.location.version_guid)
+            for course in (self.new_course, other_course)
+        ]
+
+        with check_mongo_calls(1):
+            not_cached_structures = modulestore().db_connection.find_structures_by_id(structure_ids)
+
+        # both structures are fetched from the cache in a single multi-get
+        with check_mongo_calls(0):
+            cached_structures = modulestore().db_connection.find_structures_by_id(structure_ids)
+
+        self.assertItemsEqual([structure['_id'] for structure in not_cached_structures], structure_ids)
+        self.assertItemsEqual(cached_structures, not_cached_structures)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1205,6 +1250,10 @@ class SplitModuleItemTests(SplitModuleTest):
         self.assertEqual(len(matches), 4)
         matches = modulestore().get_items(locator, qualifiers={'category': 'garbage'})
         self.assertEqual(len(matches), 0)
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$in': ['course', 'chapter']}})
+        self.assertEqual(len(matches), 5)
+        matches = modulestore().get_items(locator, qualifiers={'children': BlockKey('chapter', 'chapter1')})
+        self.assertEqual([match.location.block_id for match in matches], ['head12345'])
         # Test that we don't accidentally get an item with a similar name.
         matches = modulestore().get_items(locator, qualifiers={'name': 'chapter1'})
         self.assertEqual(len(matches), 1)
@@ -1261,6 +1310,26 @@ class SplitModuleItemTests(SplitModuleTest):
             expected_ids.remove(child.location.block_id)
         self.assertEqual(len(expected_ids), 0)
 
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_definition_prefetch(self, _from_json):
+        """
+        Test that the definitions of the children of a block loaded with prefetching are fetched
+        along with it, rather than with one query per child when its content is first accessed
+        """
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT), 'chapter', 'chapter3'
+        )
+        for prefetch_depth, num_definition_finds in ((0, 3), (1, 0)):
+            with patch.object(modulestore(), 'definition_prefetch_depth', prefetch_depth):
+                block = modulestore().get_item(locator)
+            self.assertEqual(block.runtime.definition_prefetch_stats['prefetch_queries'], prefetch_depth)
+            children = block.get_children()
+            self.assertEqual(len(children), 3)
+
+            with check_mongo_calls(num_definition_finds):
+                for child in children:
+                    self.assertIsNotNone(child.data)
+
 
 def version_agnostic(children):
     """
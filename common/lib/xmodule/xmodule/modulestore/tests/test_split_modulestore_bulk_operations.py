@@ -31,6 +31,15 @@ class TestBulkWriteMixin(unittest.TestCase):
     def assertConnCalls(self, *calls):
         self.assertEqual(list(calls), self.conn.mock_calls)
 
+    def assertDefinitionsInserted(self, *definitions):
+        """
+        Assert that the definitions were inserted together, in any order.
+        """
+        self.assertEqual(self.conn.insert_definitions.call_count, 1)
+        inserted, course_context = self.conn.insert_definitions.call_args[0]
+        self.assertItemsEqual(definitions, inserted)
+        self.assertEqual(self.course_key, course_context)
+
     def assertCacheNotCleared(self):
         self.assertFalse(self.clear_cache.called)
 
@@ -172,7 +181,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition, self.course_key),
+            call.insert_definitions([self.definition], self.course_key),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index,
@@ -190,18 +199,13 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index,
-                    course_context=self.course_key,
-                )
-            ],
-            self.conn.mock_calls
+        self.assertDefinitionsInserted(self.definition, other_definition)
+        self.conn.update_course_index.assert_called_once_with(
+            {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+            from_index=original_index,
+            course_context=self.course_key,
         )
+        self.assertEqual(len(self.conn.mock_calls), 2)
 
     def test_write_definition_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -210,7 +214,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition, self.course_key))
+        self.assertConnCalls(call.insert_definitions([self.definition], self.course_key))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -221,13 +225,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key)
-            ],
-            self.conn.mock_calls
-        )
+        self.assertDefinitionsInserted(self.definition, other_definition)
+        self.assertEqual(len(self.conn.mock_calls), 1)
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -464,6 +463,7 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
         self.bulk.get_definitions(self.course_key, test_ids)
         self.bulk._end_bulk_operation(self.course_key)
         self.assertFalse(self.conn.insert_definition.called)
+        self.assertFalse(self.conn.insert_definitions.called)
 
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
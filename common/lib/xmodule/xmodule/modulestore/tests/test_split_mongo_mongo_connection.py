@@ -1,7 +1,8 @@
 """ Test the behavior of split_mongo/MongoConnection """
 import unittest
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from pymongo.errors import BulkWriteError
+from xmodule.modulestore.split_mongo.mongo_connection import DUPLICATE_KEY_ERROR, MongoConnection
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +18,31 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestInsertDefinitions(unittest.TestCase):
+    """ Test that definitions are inserted in a single request, skipping duplicates """
+    def setUp(self):
+        super(TestInsertDefinitions, self).setUp()
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.connect_to_mongodb'):
+            self.conn = MongoConnection('useless', 'useless', 'useless')
+        self.definitions = [{'_id': 1, 'block_type': 'html'}, {'_id': 2, 'block_type': 'html'}]
+
+    def test_insert_definitions(self):
+        self.conn.insert_definitions(self.definitions)
+        self.conn.definitions.insert_many.assert_called_once_with(self.definitions, ordered=False)
+
+    def test_skip_duplicate_definitions(self):
+        self.conn.definitions.insert_many.side_effect = BulkWriteError({
+            'writeErrors': [{'index': 0, 'code': DUPLICATE_KEY_ERROR}],
+            'writeConcernErrors': [],
+        })
+        self.conn.insert_definitions(self.definitions)
+
+    def test_raise_other_errors(self):
+        self.conn.definitions.insert_many.side_effect = BulkWriteError({
+            'writeErrors': [{'index': 0, 'code': DUPLICATE_KEY_ERROR}, {'index': 1, 'code': 2}],
+            'writeConcernErrors': [],
+        })
+        with self.assertRaises(BulkWriteError):
+            self.conn.insert_definitions(self.definitions)
@@ -0,0 +1,85 @@
+"""
+Tests for the secondary block indexes of split modulestore structures.
+"""
+import unittest
+
+import ddt
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
+
+
+COURSE = BlockKey('course', 'course')
+CHAPTER_1 = BlockKey('chapter', 'chapter1')
+CHAPTER_2 = BlockKey('chapter', 'chapter2')
+PROBLEM_1 = BlockKey('problem', 'problem1')
+PROBLEM_2 = BlockKey('problem', 'problem2')
+ORPHAN_CHAPTER = BlockKey('chapter', 'orphan')
+ORPHAN_PROBLEM = BlockKey('problem', 'orphan')
+
+
+@ddt.ddt
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests for StructureIndex.
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        children = {
+            COURSE: [CHAPTER_1, CHAPTER_2],
+            CHAPTER_1: [PROBLEM_1, PROBLEM_2],
+            CHAPTER_2: [PROBLEM_2],
+            ORPHAN_CHAPTER: [ORPHAN_PROBLEM],
+        }
+        self.structure = {
+            '_id': 'version',
+            'blocks': {
+                block_key: BlockData(block_type=block_key.type, fields={'children': children.get(block_key, [])})
+                for block_key in (COURSE, CHAPTER_1, CHAPTER_2, PROBLEM_1, PROBLEM_2, ORPHAN_CHAPTER, ORPHAN_PROBLEM)
+            },
+        }
+        self.index = StructureIndex(self.structure)
+
+    def test_blocks_of_type(self):
+        self.assertItemsEqual(self.index.get_blocks_of_type('chapter'), [CHAPTER_1, CHAPTER_2, ORPHAN_CHAPTER])
+        self.assertEqual(self.index.get_blocks_of_type('garbage'), [])
+
+    def test_blocks_with_id(self):
+        self.assertItemsEqual(self.index.get_blocks_with_id('orphan'), [ORPHAN_CHAPTER, ORPHAN_PROBLEM])
+        self.assertEqual(self.index.get_blocks_with_id('garbage'), [])
+
+    def test_parents(self):
+        self.assertItemsEqual(self.index.get_parents(PROBLEM_2), [CHAPTER_1, CHAPTER_2])
+        self.assertEqual(self.index.get_parents(COURSE), [])
+
+    @ddt.data(
+        (COURSE, True),
+        (CHAPTER_1, True),
+        (PROBLEM_2, True),
+        (ORPHAN_CHAPTER, False),
+        (ORPHAN_PROBLEM, False),
+    )
+    @ddt.unpack
+    def test_has_path_to_root(self, block_key, expected_result):
+        self.assertEqual(self.index.has_path_to_root(block_key), expected_result)
+
+    @ddt.data(
+        ({'block_type': 'problem'}, {}, [PROBLEM_1, PROBLEM_2, ORPHAN_PROBLEM]),
+        ({'block_type': {'$in': ['course', 'problem']}}, {}, [COURSE, PROBLEM_1, PROBLEM_2, ORPHAN_PROBLEM]),
+        ({}, {'children': PROBLEM_2}, [CHAPTER_1, CHAPTER_2]),
+        ({'block_type': 'chapter'}, {'children': PROBLEM_2}, [CHAPTER_1, CHAPTER_2, ORPHAN_CHAPTER]),
+    )
+    @ddt.unpack
+    def test_candidates(self, qualifiers, settings, expected_candidates):
+        self.assertItemsEqual(self.index.get_candidates(qualifiers, settings), expected_candidates)
+
+    @ddt.data(
+        ({}, {}),
+        ({'block_type': {'$nin': ['course']}}, {}),
+        ({'block_type': lambda block_type: block_type.startswith('c')}, {}),
+        ({}, {'display_name': 'Chapter 1'}),
+    )
+    @ddt.unpack
+    def test_no_candidates(self, qualifiers, settings):
+        self.assertIsNone(self.index.get_candidates(qualifiers, settings))
@@ -3,20 +3,24 @@ Tests for XML importer.
 """
 import mock
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
-from xblock.fields import String, Scope, ScopeIds, List
+from xblock.fields import String, Scope, ScopeIds, List, Reference, ReferenceList, ReferenceValueDict
 from xblock.runtime import Runtime, KvsFieldData, DictKeyValueStore
 from xmodule.x_module import XModuleMixin
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.xml_importer import (
+    STATIC_FILE_CHUNK_SIZE,
     StaticContentImporter,
     _update_and_import_module,
-    _update_module_location
+    _update_module_location,
+    _update_module_references
 )
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from opaque_keys.edx.keys import CourseKey
 from xmodule.tests import DATA_DIR
 import os
+import shutil
+from tempfile import mkdtemp
 from uuid import uuid4
 from path import Path as path
 import unittest
@@ -253,6 +257,49 @@ class RemapNamespaceTest(ModuleStoreNoSettings):
             self.xblock.get_explicitly_set_fields_by_scope(scope=Scope.content)
 
 
+class StubXBlockWithReferences(StubXBlock):
+    """
+    Stub XBlock with reference fields.
+    """
+    test_reference = Reference(scope=Scope.settings)
+    test_reference_list = ReferenceList(scope=Scope.settings)
+    test_reference_dict = ReferenceValueDict(scope=Scope.settings)
+    test_unset_reference = Reference(scope=Scope.settings)
+
+
+class UpdateReferencesTest(unittest.TestCase):
+    """
+    Test that the references into the source course are moved to the destination course.
+    """
+    def test_update_module_references(self):
+        source_course_key = CourseLocator("org", "import", "run")
+        dest_course_key = CourseLocator("org", "course", "run")
+        other_course_key = CourseLocator("org", "other", "run")
+        scope_ids = ScopeIds('Bob', 'stubxblock', '123', 'import')
+        xblock = StubXBlockWithReferences(
+            mock.MagicMock(Runtime), KvsFieldData(kvs=DictKeyValueStore()), scope_ids
+        )
+        reference = source_course_key.make_usage_key('html', 'referenced')
+        other_reference = other_course_key.make_usage_key('html', 'referenced')
+        xblock.test_content_field = "Explicitly set"
+        xblock.test_reference = reference
+        xblock.test_reference_list = [reference, other_reference]
+        xblock.test_reference_dict = {'source': reference, 'other': other_reference}
+        xblock.save()
+
+        fields = _update_module_references(xblock, source_course_key, dest_course_key)
+
+        self.assertEqual(fields['test_content_field'], "Explicitly set")
+        self.assertEqual(fields['test_reference'], reference.map_into_course(dest_course_key))
+        self.assertEqual(fields['test_reference_list'], [reference.map_into_course(dest_course_key), other_reference])
+        self.assertEqual(
+            fields['test_reference_dict'],
+            {'source': reference.map_into_course(dest_course_key), 'other': other_reference}
+        )
+        self.assertNotIn('test_unset_reference', fields)
+        self.assertNotIn('test_settings_field', fields)
+
+
 class StubXBlockWithMutableFields(StubXBlock):
     """
     Stub XBlock used for testing mutable fields and children
@@ -385,3 +432,44 @@ class StaticContentImporterTest(unittest.TestCase):
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.assert_called_once()
+
+    def test_import_static_files_in_parallel(self):
+        """
+        Test that importing static files in parallel saves the same content as importing them serially
+        """
+        course_data_path = path(mkdtemp())
+        self.addCleanup(shutil.rmtree, course_data_path)
+        files = {
+            # both saved under the same asset, so the last one imported wins
+            'images/a.txt': 'first',
+            'images_a.txt': 'second',
+            'b.txt': 'third',
+            'inner/c.txt': 'fourth',
+            # streamed in chunks
+            'large.txt': 'x' * (STATIC_FILE_CHUNK_SIZE * 2 + 1),
+        }
+        for file_subpath, data in files.iteritems():
+            file_path = course_data_path / 'static' / file_subpath
+            file_path.dirname().makedirs_p()
+            file_path.write_bytes(data)
+
+        def import_files(num_workers):
+            """
+            Imports the files, and returns the remap dict and the data saved under each asset
+            """
+            content_store = mock.Mock()
+            content_store.generate_thumbnail.return_value = (None, None)
+            saved = []
+            content_store.save.side_effect = lambda content: saved.append((content.location, ''.join(content.data)))
+            importer = StaticContentImporter(
+                static_content_store=content_store,
+                course_data_path=course_data_path,
+                target_id=CourseKey.from_string('course-v1:edX+DemoX+Demo_Course'),
+                num_workers=num_workers,
+            )
+            remap_dict = importer.import_static_content_directory('static')
+            return remap_dict, dict(saved)
+
+        serial_import = import_files(num_workers=1)
+        self.assertEqual(len(serial_import[1]), 4)
+        self.assertEqual(import_files(num_workers=4), serial_import)
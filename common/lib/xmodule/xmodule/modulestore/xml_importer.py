@@ -22,6 +22,9 @@ Modulestore virtual   |          XML physical (draft, published)
 """
 import logging
 from abc import abstractmethod
+from collections import Counter
+from itertools import chain
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
@@ -56,12 +59,29 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# Static files are read in chunks of this size, and those larger than a chunk
+# are streamed to the content store instead of being read into memory at once.
+STATIC_FILE_CHUNK_SIZE = 1024 * 1024
+
+
+def _read_chunks(static_file):
+    """
+    Yields the rest of the content of the file, in chunks.
+    """
+    while True:
+        chunk = static_file.read(STATIC_FILE_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
 
 class StaticContentImporter:
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, num_workers=1):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        # number of files imported in parallel, each from its own thread
+        self.num_workers = num_workers
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -78,6 +98,7 @@ class StaticContentImporter:
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -91,20 +112,60 @@ class StaticContentImporter:
                 if verbose:
                     log.debug('importing static content %s...', file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+                file_paths.append(file_path)
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        for imported_file_attrs in self.import_static_files(file_paths, base_dir=static_dir):
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
         return remap_dict
 
+    def import_static_files(self, full_file_paths, base_dir):
+        """
+        Imports the given static files, and returns what import_static_file returned
+        for each of them, in the same order.
+
+        With more than one worker, the files are imported in parallel. The files which
+        are saved under the same asset or thumbnail as another one are imported after
+        the others, one at a time and in order, so that the content store ends up the
+        same as when all files are imported one at a time.
+        """
+        if self.num_workers <= 1 or len(full_file_paths) <= 1:
+            return [self.import_static_file(file_path, base_dir=base_dir) for file_path in full_file_paths]
+
+        saved_keys = [self._get_saved_keys(file_path, base_dir) for file_path in full_file_paths]
+        key_counts = Counter(key for keys in saved_keys for key in keys)
+        parallel_indexes = []
+        serial_indexes = []
+        for index, keys in enumerate(saved_keys):
+            if all(key_counts[key] == 1 for key in keys):
+                parallel_indexes.append(index)
+            else:
+                serial_indexes.append(index)
+
+        results = [None] * len(full_file_paths)
+        pool = ThreadPool(self.num_workers)
+        try:
+            imported_files_attrs = pool.imap(
+                lambda index: self.import_static_file(full_file_paths[index], base_dir=base_dir),
+                parallel_indexes
+            )
+            for index, imported_file_attrs in zip(parallel_indexes, imported_files_attrs):
+                results[index] = imported_file_attrs
+        finally:
+            pool.terminate()
+            pool.join()
+
+        for index in serial_indexes:
+            results[index] = self.import_static_file(full_file_paths[index], base_dir=base_dir)
+        return results
+
     def import_static_file(self, full_file_path, base_dir):
         filename = os.path.basename(full_file_path)
         try:
-            with open(full_file_path, 'rb') as f:
-                data = f.read()
+            static_file = open(full_file_path, 'rb')
         except IOError:
             # OS X "companion files". See
             # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
@@ -113,6 +174,47 @@ class StaticContentImporter:
             # Not a 'hidden file', then re-raise exception
             raise
 
+        file_subpath, asset_key, displayname, locked, mime_type = self._get_file_attrs(full_file_path, base_dir)
+
+        with static_file:
+            data = static_file.read(STATIC_FILE_CHUNK_SIZE)
+            streamed = len(data) == STATIC_FILE_CHUNK_SIZE
+            if streamed:
+                data = chain([data], _read_chunks(static_file))
+            content = StaticContent(
+                asset_key, displayname, mime_type, data,
+                import_path=file_subpath, locked=locked
+            )
+
+            # first let's save a thumbnail so we can get back a thumbnail location
+            if streamed:
+                # the thumbnail is made from the file, as the data is read while the content is saved
+                thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(
+                    content, tempfile_path=full_file_path
+                )
+            else:
+                thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(content)
+
+            if thumbnail_content is not None:
+                content.thumbnail_location = thumbnail_location
+
+            # then commit the content
+            try:
+                self.static_content_store.save(content)
+            except Exception as err:
+                log.exception(u'Error importing {0}, error={1}'.format(
+                    file_subpath, err
+                ))
+
+        return file_subpath, asset_key
+
+    def _get_file_attrs(self, full_file_path, base_dir):
+        """
+        Returns the subpath, asset key, display name, lock flag and mime type of the
+        static file.
+        """
+        filename = os.path.basename(full_file_path)
+
         # strip away leading path from the name
         file_subpath = full_file_path.replace(base_dir, '')
         if file_subpath.startswith('/'):
@@ -132,26 +234,21 @@ class StaticContentImporter:
         # Check extracted contentType in list of all valid mimetypes
         if not mime_type or mime_type not in self.mimetypes_list:
             mime_type = mimetypes.guess_type(filename)[0]  # Assign guessed mimetype
-        content = StaticContent(
-            asset_key, displayname, mime_type, data,
-            import_path=file_subpath, locked=locked
-        )
-
-        # first let's save a thumbnail so we can get back a thumbnail location
-        thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(content)
-
-        if thumbnail_content is not None:
-            content.thumbnail_location = thumbnail_location
+        return file_subpath, asset_key, displayname, locked, mime_type
 
-        # then commit the content
-        try:
-            self.static_content_store.save(content)
-        except Exception as err:
-            log.exception(u'Error importing {0}, error={1}'.format(
-                file_subpath, err
-            ))
-
-        return file_subpath, asset_key
+    def _get_saved_keys(self, full_file_path, base_dir):
+        """
+        Returns the keys of the asset, and of the thumbnail if any, the static file is
+        saved under, as named by the content store's generate_thumbnail.
+        """
+        __, asset_key, __, __, mime_type = self._get_file_attrs(full_file_path, base_dir)
+        keys = [asset_key]
+        if mime_type is not None and mime_type.split('/')[0] == 'image':
+            thumbnail_name = StaticContent.generate_thumbnail_name(
+                asset_key.block_id, extension='.svg' if mime_type == 'image/svg+xml' else None
+            )
+            keys.append(StaticContent.compute_location(asset_key.course_key, thumbnail_name, is_thumbnail=True))
+        return keys
 
 
 class ImportManager(object):
@@ -195,6 +292,8 @@ class ImportManager(object):
         python_lib_filename: The filename of the courselike's python library. Course authors can optionally
             create this file to implement custom logic in their course.
 
+        static_content_workers: The number of static files imported in parallel.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
     store_class = XMLModuleStore
@@ -207,7 +306,7 @@ class ImportManager(object):
             do_import_static=True, do_import_python_lib=True,
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
-            python_lib_filename='python_lib.zip',
+            python_lib_filename='python_lib.zip', static_content_workers=1,
     ):
         self.store = store
         self.user_id = user_id
@@ -219,6 +318,7 @@ class ImportManager(object):
         self.verbose = verbose
         self.static_content_subdir = static_content_subdir
         self.python_lib_filename = python_lib_filename
+        self.static_content_workers = static_content_workers
         self.do_import_static = do_import_static
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
@@ -254,7 +354,8 @@ class ImportManager(object):
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            num_workers=self.static_content_workers,
         )
         if self.do_import_static:
             if self.verbose:
@@ -705,6 +806,86 @@ def import_library_from_xml(*args, **kwargs):
     return list(manager.run_imports())
 
 
+# How the value of a field is converted to the destination course on import.
+_CONVERT_REFERENCE = 'reference'
+_CONVERT_REFERENCE_LIST = 'reference_list'
+_CONVERT_REFERENCE_DICT = 'reference_dict'
+_CONVERT_XML_ATTRIBUTES = 'xml_attributes'
+
+# The (field_name, field, conversion) of the imported fields of each block class.
+_FIELD_CONVERSIONS = {}
+
+
+def _get_field_conversions(block_class):
+    """
+    Return the (field_name, field, conversion) of the fields of block_class which are
+    imported, working out once per class which of them hold references.
+    """
+    conversions = _FIELD_CONVERSIONS.get(block_class)
+    if conversions is None:
+        conversions = []
+        for field_name, field in block_class.fields.iteritems():
+            if field.scope == Scope.parent:
+                continue
+            if isinstance(field, Reference):
+                conversion = _CONVERT_REFERENCE
+            elif isinstance(field, ReferenceList):
+                conversion = _CONVERT_REFERENCE_LIST
+            elif isinstance(field, ReferenceValueDict):
+                conversion = _CONVERT_REFERENCE_DICT
+            elif field_name == 'xml_attributes':
+                conversion = _CONVERT_XML_ATTRIBUTES
+            else:
+                conversion = None
+            conversions.append((field_name, field, conversion))
+        _FIELD_CONVERSIONS[block_class] = conversions
+    return conversions
+
+
+def _update_module_references(module, source_course_id, dest_course_id):
+    """
+    Return the fields set on the module, with the references into the source course
+    moved to the destination course.
+    """
+    def _convert_ref_fields_to_new_namespace(reference):  # pylint: disable=invalid-name
+        """
+        Convert a reference to the new namespace, but only
+        if the original namespace matched the original course.
+
+        Otherwise, returns the input value.
+        """
+        assert isinstance(reference, UsageKey)
+        if source_course_id == reference.course_key:
+            return reference.map_into_course(dest_course_id)
+        else:
+            return reference
+
+    fields = {}
+    for field_name, field, conversion in _get_field_conversions(type(module)):
+        if not field.is_set_on(module):
+            continue
+        value = field.read_from(module)
+        if conversion is None:
+            fields[field_name] = value
+        elif conversion == _CONVERT_REFERENCE:
+            fields[field_name] = None if value is None else _convert_ref_fields_to_new_namespace(value)
+        elif conversion == _CONVERT_REFERENCE_LIST:
+            fields[field_name] = [_convert_ref_fields_to_new_namespace(reference) for reference in value]
+        elif conversion == _CONVERT_REFERENCE_DICT:
+            fields[field_name] = {
+                key: _convert_ref_fields_to_new_namespace(reference)
+                for key, reference
+                in value.iteritems()
+            }
+        else:
+            # remove any export/import only xml_attributes
+            # which are used to wire together draft imports
+            for attribute in ('parent_url', 'parent_sequential_url', 'index_in_children_list'):
+                value.pop(attribute, None)
+            fields[field_name] = value
+    return fields
+
+
 def _update_and_import_module(
         module, store, user_id,
         source_course_id, dest_course_id,
@@ -715,58 +896,6 @@ def _update_and_import_module(
     """
     logging.debug(u'processing import of module %s...', unicode(module.location))
 
-    def _update_module_references(module, source_course_id, dest_course_id):
-        """
-        Move the module to a new course.
-        """
-        def _convert_ref_fields_to_new_namespace(reference):  # pylint: disable=invalid-name
-            """
-            Convert a reference to the new namespace, but only
-            if the original namespace matched the original course.
-
-            Otherwise, returns the input value.
-            """
-            assert isinstance(reference, UsageKey)
-            if source_course_id == reference.course_key:
-                return reference.map_into_course(dest_course_id)
-            else:
-                return reference
-
-        fields = {}
-        for field_name, field in module.fields.iteritems():
-            if field.scope != Scope.parent and field.is_set_on(module):
-                if isinstance(field, Reference):
-                    value = field.read_from(module)
-                    if value is None:
-                        fields[field_name] = None
-                    else:
-                        fields[field_name] = _convert_ref_fields_to_new_namespace(field.read_from(module))
-                elif isinstance(field, ReferenceList):
-                    references = field.read_from(module)
-                    fields[field_name] = [_convert_ref_fields_to_new_namespace(reference) for reference in references]
-                elif isinstance(field, ReferenceValueDict):
-                    reference_dict = field.read_from(module)
-                    fields[field_name] = {
-                        key: _convert_ref_fields_to_new_namespace(reference)
-                        for key, reference
-                        in reference_dict.iteritems()
-                    }
-                elif field_name == 'xml_attributes':
-                    value = field.read_from(module)
-                    # remove any export/import only xml_attributes
-                    # which are used to wire together draft imports
-                    if 'parent_url' in value:
-                        del value['parent_url']
-                    if 'parent_sequential_url' in value:
-                        del value['parent_sequential_url']
-
-                    if 'index_in_children_list' in value:
-                        del value['index_in_children_list']
-                    fields[field_name] = value
-                else:
-                    fields[field_name] = field.read_from(module)
-        return fields
-
     if do_import_static and 'data' in module.fields and isinstance(module.fields['data'], xblock.fields.String):
         # we want to convert all 'non-portable' links in the module_data
         # (if it is a string) to portable strings (e.g. /static/)
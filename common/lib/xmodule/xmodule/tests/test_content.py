@@ -3,11 +3,14 @@
 import os
 import unittest
 import ddt
+from django.core.cache.backends.locmem import LocMemCache
 from mock import Mock, patch
 from path import Path as path
 
 from xmodule.contentstore.content import StaticContent, StaticContentStream
 from xmodule.contentstore.content import ContentStore
+from xmodule.contentstore.manifest import AssetManifestEntry, get_course_asset_manifest
+from xmodule.contentstore.versioning import get_course_assets_version, update_course_assets_version
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 from xmodule.static_content import _write_js, _list_descriptors
@@ -223,3 +226,58 @@ class ContentTest(unittest.TestCase):
         js_file_paths = [file_path for file_path in js_file_paths if os.path.basename(file_path).startswith('000-')]
         self.assertEqual(len(js_file_paths), 1)
         self.assertIn("XModule.Descriptor = (function() {", open(js_file_paths[0]).read())
+
+
+@patch('xmodule.contentstore.versioning.get_cache')
+class CourseAssetManifestTest(unittest.TestCase):
+    """
+    Tests of the versions and manifests of the assets of courses.
+    """
+    def setUp(self):
+        super(CourseAssetManifestTest, self).setUp()
+        self.cache = LocMemCache('course_assets', {})
+        self.cache.clear()
+        self.course_key = CourseLocator(u'mitX', u'800', u'run')
+        self.asset_key = self.course_key.make_asset_key(u'asset', u'image.png')
+        self.entries = {(u'asset', u'image.png'): AssetManifestEntry(u'digest', False, 42)}
+        self.contentstore = Mock()
+        self.contentstore.get_asset_manifest.return_value = self.entries
+        patcher = patch('xmodule.contentstore.django.contentstore', return_value=self.contentstore)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_cache(self, get_cache):
+        get_cache.return_value = None
+        self.assertIsNone(get_course_assets_version(self.course_key))
+        self.assertIsNone(get_course_asset_manifest(self.course_key))
+        self.assertFalse(self.contentstore.get_asset_manifest.called)
+
+    def test_manifest_cached_under_version(self, get_cache):
+        get_cache.return_value = self.cache
+        manifest = get_course_asset_manifest(self.course_key)
+        self.assertEqual(manifest.get(self.asset_key), AssetManifestEntry(u'digest', False, 42))
+        self.assertIsNone(manifest.get(self.course_key.make_asset_key(u'asset', u'missing.png')))
+        self.assertEqual(len(get_course_asset_manifest(self.course_key)), 1)
+        self.assertEqual(self.contentstore.get_asset_manifest.call_count, 1)
+
+        update_course_assets_version(self.course_key)
+        get_course_asset_manifest(self.course_key)
+        self.assertEqual(self.contentstore.get_asset_manifest.call_count, 2)
+
+    def test_too_large_manifest(self, get_cache):
+        get_cache.return_value = self.cache
+        with patch('xmodule.contentstore.manifest.MAX_MANIFEST_SIZE', 0):
+            self.assertIsNone(get_course_asset_manifest(self.course_key))
+            self.assertIsNone(get_course_asset_manifest(self.course_key))
+        self.assertEqual(self.contentstore.get_asset_manifest.call_count, 1)
+
+    def test_deprecated_course_version(self, get_cache):
+        get_cache.return_value = self.cache
+        # The assets of old style courses are stored without the course run.
+        run1 = CourseKey.from_string(u'mitX/800/run1')
+        run2 = CourseKey.from_string(u'mitX/800/run2')
+        version = get_course_assets_version(run1)
+        self.assertEqual(get_course_assets_version(run2), version)
+        update_course_assets_version(run2)
+        self.assertNotEqual(get_course_assets_version(run1), version)
+        self.assertNotEqual(get_course_assets_version(self.course_key), get_course_assets_version(run1))
@@ -404,6 +404,54 @@ class CourseEmailTemplate(models.Model):
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
 
+def _escape_context(context):
+    """
+    Returns a copy of the context, with its string values HTML-escaped.
+    """
+    return {
+        key: markupsafe.escape(value) if isinstance(value, basestring) else value
+        for key, value in context.iteritems()
+    }
+
+
+class CourseEmailRenderer(object):
+    """
+    Renders the messages of a course email for each of its recipients.
+
+    The context shared by all of the recipients, and its HTML-escaped copy,
+    are built once rather than for each recipient.
+    """
+    def __init__(self, template, plaintext, htmltext, global_context):
+        self.template = template
+        self.plaintext = plaintext
+        self.htmltext = htmltext
+        self.context = {'name': '', 'email': ''}
+        self.context.update(global_context)
+        self.html_context = _escape_context(self.context)
+
+    @property
+    def uses_anonymous_user_id(self):
+        """
+        Returns whether the messages contain the anonymous id of their recipients.
+        """
+        return any(u'%%USER_ID%%' in message for message in (self.plaintext, self.htmltext) if message)
+
+    def render(self, recipient_context):
+        """
+        Returns the plain text and HTML messages for the recipient with the
+        given context.
+        """
+        context = dict(self.context)
+        context.update(recipient_context)
+        html_context = dict(self.html_context)
+        html_context.update(_escape_context(recipient_context))
+        # pylint: disable=protected-access
+        return (
+            CourseEmailTemplate._render(self.template.plain_template, self.plaintext, context),
+            CourseEmailTemplate._render(self.template.html_template, self.htmltext, html_context),
+        )
+
+
 class CourseAuthorization(models.Model):
     """
     Enable the course email feature on a course-by-course basis.
@@ -0,0 +1,164 @@
+"""
+Sending of course emails over a pool of persistent connections.
+"""
+import logging
+import threading
+from Queue import Queue
+from time import sleep, time
+
+import dogstats_wrapper as dog_stats_api
+
+log = logging.getLogger('edx.celery.task')
+
+
+class _Throttle(object):
+    """
+    Spaces the sends of all the connections of a sender by at least
+    `min_send_interval` seconds.
+    """
+    def __init__(self, min_send_interval):
+        self.min_send_interval = min_send_interval
+        self._next_send_time = None
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Waits for the next send to be allowed, and reserves it.
+        """
+        if self.min_send_interval <= 0:
+            return
+        with self._lock:
+            now = time()
+            send_time = now if self._next_send_time is None else max(now, self._next_send_time)
+            self._next_send_time = send_time + self.min_send_interval
+        if send_time > now:
+            sleep(send_time - now)
+
+
+class _Connection(object):
+    """
+    A connection to the email backend, whose sends are spaced by the throttle
+    shared by all the connections of the sender.
+    """
+    def __init__(self, connection, throttle):
+        self.connection = connection
+        self.throttle = throttle
+
+    def send(self, message, tags):
+        """
+        Sends the message, waiting for the throttle first, and returns the
+        exception raised while sending it, if any.
+        """
+        self.throttle.wait()
+        try:
+            with dog_stats_api.timer('course_email.single_send.time.overall', tags=tags):
+                self.connection.send_messages([message])
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc
+        return None
+
+
+class EmailSender(object):
+    """
+    Sends email messages over a pool of `num_connections` persistent
+    connections, which share a throttle so that together they send at most
+    one message every `min_send_interval` seconds.
+
+    With a single connection, messages are sent from the calling thread as
+    they are submitted.  With more, each connection sends messages from its
+    own thread, in the order they were submitted, and the calling thread
+    renders the next messages while they are being sent.
+
+    The outcome of sending each message is returned as a (key, exception)
+    pair, where `key` identifies the message and `exception` is the one
+    raised while sending it, or None.
+    """
+    def __init__(self, get_connection, num_connections=1, min_send_interval=0, tags=None):
+        self.get_connection = get_connection
+        self.num_connections = max(1, num_connections)
+        self.throttle = _Throttle(min_send_interval)
+        self.tags = tags or []
+        self._connections = []
+        self._threads = []
+        self._messages = None
+        self._results = None
+        self._num_pending = 0
+
+    def open(self):
+        """
+        Opens the connections, raising the errors of the email backend if they
+        cannot be opened, and starts their threads.
+        """
+        for _ in xrange(self.num_connections):
+            connection = self.get_connection()
+            self._connections.append(_Connection(connection, self.throttle))
+            connection.open()
+
+        if self.num_connections > 1:
+            self._messages = Queue(self.num_connections)
+            self._results = Queue()
+            for connection in self._connections:
+                thread = threading.Thread(target=self._send_messages, args=(connection,), name='bulk_email.sender')
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, key, message):
+        """
+        Sends the message, or queues it to be sent, and returns the outcomes
+        of the messages whose sending has completed since the last call.
+        """
+        if not self._threads:
+            return [(key, self._connections[0].send(message, self.tags))]
+
+        # Wait for a connection to be available, to keep the number of
+        # rendered messages waiting to be sent small.
+        self._messages.put((key, message))
+        self._num_pending += 1
+        return self._get_results(wait=False)
+
+    def finish(self):
+        """
+        Waits for all the queued messages to be sent, and returns their outcomes.
+        """
+        if not self._threads:
+            return []
+        return self._get_results(wait=True)
+
+    def close(self):
+        """
+        Stops the threads once the queued messages are sent, and closes the connections.
+        """
+        for _ in self._threads:
+            self._messages.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for connection in self._connections:
+            try:
+                connection.connection.close()
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Could not close an email connection')
+        self._connections = []
+
+    def _get_results(self, wait):
+        """
+        Returns the outcomes of the sent messages, waiting for all of the
+        queued ones to be sent if `wait`.
+        """
+        results = []
+        while self._num_pending and (wait or not self._results.empty()):
+            results.append(self._results.get())
+            self._num_pending -= 1
+        return results
+
+    def _send_messages(self, connection):
+        """
+        Sends the queued messages over the connection, until stopped.
+        """
+        while True:
+            item = self._messages.get()
+            if item is None:
+                return
+            key, message = item
+            self._results.put((key, connection.send(message, self.tags)))
@@ -9,7 +9,7 @@ import random
 import re
 from collections import Counter
 from smtplib import SMTPConnectError, SMTPDataError, SMTPException, SMTPServerDisconnected
-from time import sleep
+from time import time
 
 from boto.exception import AWSConnectionError
 from boto.ses.exceptions import (
@@ -31,13 +31,15 @@ from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.mail.message import forbid_multi_line_headers
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError, transaction
 from django.utils.translation import override as override_language
 from django.utils.translation import ugettext as _
 from markupsafe import escape
 from six import text_type
 
 import dogstats_wrapper as dog_stats_api
-from bulk_email.models import CourseEmail, Optout
+from bulk_email.models import CourseEmail, CourseEmailRenderer, Optout
+from bulk_email.sender import EmailSender
 from courseware.courses import get_course
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import (
@@ -48,6 +50,7 @@ from lms.djangoapps.instructor_task.subtasks import (
 )
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.lib.courses import course_image_url
+from student.models import AnonymousUserId, anonymous_id_for_user
 from util.date_utils import get_default_time_display
 
 log = logging.getLogger('edx.celery.task')
@@ -352,6 +355,39 @@ def _filter_optouts_from_recipients(to_list, course_id):
     return to_list, num_optout
 
 
+def _get_anonymous_user_ids(to_list):
+    """
+    Returns the anonymous ids of the recipients in the to_list, by user id.
+
+    The AnonymousUserId objects that do not exist yet are created in bulk,
+    rather than once for each recipient as the emails are rendered.
+    """
+    anonymous_user_ids = {
+        recipient['pk']: anonymous_id_for_user(User(id=recipient['pk']), None, save=False)
+        for recipient in to_list
+    }
+    existing_ids = set(
+        AnonymousUserId.objects.filter(
+            anonymous_user_id__in=anonymous_user_ids.values()
+        ).values_list('anonymous_user_id', flat=True)
+    )
+    missing_ids = [
+        AnonymousUserId(user_id=user_id, course_id=None, anonymous_user_id=anonymous_user_id)
+        for user_id, anonymous_user_id in anonymous_user_ids.iteritems()
+        if anonymous_user_id not in existing_ids
+    ]
+    if missing_ids:
+        try:
+            with transaction.atomic():
+                AnonymousUserId.objects.bulk_create(missing_ids)
+        except IntegrityError:
+            # Another thread has already created some of these entries,
+            # so create the others one at a time.
+            for missing_id in missing_ids:
+                anonymous_id_for_user(User(id=missing_id.user_id), None)
+    return anonymous_user_ids
+
+
 def _get_source_address(course_id, course_title, course_language, truncate=True):
     """
     Calculates an email address to be used as the 'from-address' for sent emails.
@@ -453,8 +489,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     task_id = subtask_status.task_id
     total_recipients = len(to_list)
     recipient_num = 0
-    total_recipients_successful = 0
-    total_recipients_failed = 0
+    counters = Counter()
     recipients_info = Counter()
 
     log.info(
@@ -495,68 +530,49 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    renderer = CourseEmailRenderer(
+        course_email_template, course_email.text_message, course_email.html_message, global_email_context
+    )
+    statsd_tags = [_statsd_tag(course_title)]
+
+    # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+    # but if a task has been retried for rate-limiting reasons, then we wait
+    # for a period of time between all emails sent within this task, over all of its connections.
+    # Choice of the value depends on the number of workers that might be sending email in
+    # parallel, and what the SES throttle rate is.
+    if subtask_status.retried_nomax > 0:
+        min_send_interval = settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
+    else:
+        min_send_interval = settings.BULK_EMAIL_MIN_SEND_INTERVAL
+    sender = EmailSender(get_connection, settings.BULK_EMAIL_SEND_CONNECTIONS, min_send_interval, tags=statsd_tags)
+    start_time = time()
     try:
-        connection = get_connection()
-        connection.open()
-
-        # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
-        email_context.update(global_email_context)
-
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
+        sender.open()
+
+        anonymous_user_ids = _get_anonymous_user_ids(to_list) if renderer.uses_anonymous_user_id else {}
+
+        # Recipients are emailed from the end of the list.  Once a recipient has been
+        # processed, their index is removed from `unprocessed`, and the to_list is updated
+        # to contain only the recipients remaining to be emailed when sending stops.
+        # This is convenient for retries, which will need to send to those who haven't
+        # yet been emailed, but not send to those who have already been sent to.
+        unprocessed = set(xrange(len(to_list)))
+        recipient_nums = {}
+        fatal_exc = None
+
+        def process_result(index, exc):
+            """
+            Updates the counters with the outcome of sending the email to the
+            recipient at `index` in the to_list, and returns the exception that
+            should stop the sending of emails, if any.
+            """
+            current_recipient = to_list[index]
             email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                course_email.subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            recipient_num = recipient_nums.pop(index)
 
-            try:
-                log.info(
-                    "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                    Recipient name: %s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    current_recipient['profile__name'],
-                    email
-                )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
+            if isinstance(exc, SMTPDataError):
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
+                counters['failed'] += 1
                 log.error(
                     "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
                     Recipient num: %s/%s, Email address: %s",
@@ -569,26 +585,25 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                 )
                 if exc.smtp_code >= 400 and exc.smtp_code < 500:
                     # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
-                    # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
-                        parent_task_id,
-                        task_id,
-                        email_id,
-                        recipient_num,
-                        total_recipients,
-                        email,
-                        exc.smtp_error
-                    )
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
-
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+                    return exc
                 # This will fall through and not retry the message.
-                total_recipients_failed += 1
+                log.warning(
+                    'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                    Email not delivered to %s due to error %s',
+                    parent_task_id,
+                    task_id,
+                    email_id,
+                    recipient_num,
+                    total_recipients,
+                    email,
+                    exc.smtp_error
+                )
+                dog_stats_api.increment('course_email.error', tags=statsd_tags)
+                subtask_status.increment(failed=1)
+
+            elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
+                # This will fall through and not retry the message.
+                counters['failed'] += 1
                 log.error(
                     "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
                     EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
@@ -600,11 +615,15 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     email,
                     exc
                 )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                dog_stats_api.increment('course_email.error', tags=statsd_tags)
                 subtask_status.increment(failed=1)
 
+            elif exc is not None:
+                # This will cause the outer handlers to deal with the exception.
+                return exc
+
             else:
-                total_recipients_successful += 1
+                counters['successful'] += 1
                 log.info(
                     "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
                     Recipient num: %s/%s, Email address: %s,",
@@ -615,30 +634,100 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     total_recipients,
                     email
                 )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                dog_stats_api.increment('course_email.sent', tags=statsd_tags)
                 if settings.BULK_EMAIL_LOG_SENT_EMAILS:
                     log.info('Email with id %s sent to %s', email_id, email)
                 else:
                     log.debug('Email with id %s sent to %s', email_id, email)
                 subtask_status.increment(succeeded=1)
 
-            # Pop the user that was emailed off the end of the list only once they have
+            # Only mark the user that was emailed as processed once they have
             # successfully been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
             recipients_info[email] += 1
-            to_list.pop()
+            unprocessed.discard(index)
+            return None
+
+        def process_results(results):
+            """
+            Processes the outcomes of sending emails, and returns the first
+            exception that should stop the sending of emails, if any.
+            """
+            first_exc = None
+            for index, exc in results:
+                exc = process_result(index, exc)
+                if first_exc is None:
+                    first_exc = exc
+            return first_exc
+
+        try:
+            for index in reversed(xrange(len(to_list))):
+                recipient_num += 1
+                recipient_nums[index] = recipient_num
+                current_recipient = to_list[index]
+                email = current_recipient['email']
+
+                # Construct message content using templates and the recipient's context:
+                recipient_context = {
+                    'email': email,
+                    'name': current_recipient['profile__name'],
+                    'user_id': current_recipient['pk'],
+                    'course_id': course_email.course_id,
+                }
+                if current_recipient['pk'] in anonymous_user_ids:
+                    recipient_context['anonymous_user_id'] = anonymous_user_ids[current_recipient['pk']]
+                plaintext_msg, html_msg = renderer.render(recipient_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    course_email.subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
 
+                log.info(
+                    "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                    Recipient name: %s, Email address: %s",
+                    parent_task_id,
+                    task_id,
+                    email_id,
+                    recipient_num,
+                    total_recipients,
+                    current_recipient['profile__name'],
+                    email
+                )
+                fatal_exc = process_results(sender.submit(index, email_msg))
+                if fatal_exc is not None:
+                    break
+        finally:
+            # Wait for the emails still being sent, even after an error, so that
+            # the recipients they were sent to are not emailed again on retry.
+            # The first fatal exception is the one raised.
+            finish_exc = process_results(sender.finish())
+            if fatal_exc is None:
+                fatal_exc = finish_exc
+            to_list[:] = [to_list[index] for index in sorted(unprocessed)]
+
+        if fatal_exc is not None:
+            raise fatal_exc
+
+        elapsed = time() - start_time
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
-            Failed Recipients: %s/%s",
+            Failed Recipients: %s/%s, Emails per second: %.2f",
             parent_task_id,
             task_id,
             email_id,
-            total_recipients_successful,
+            counters['successful'],
+            total_recipients,
+            counters['failed'],
             total_recipients,
-            total_recipients_failed,
-            total_recipients
+            recipient_num / elapsed if elapsed > 0 else 0
         )
+        if elapsed > 0:
+            dog_stats_api.histogram('course_email.throughput', recipient_num / elapsed, tags=statsd_tags)
         duplicate_recipients = ["{0} ({1})".format(email, repetition)
                                 for email, repetition in recipients_info.most_common() if repetition > 1]
         if duplicate_recipients:
@@ -707,7 +796,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        sender.close()
 
 
 def _get_current_task():
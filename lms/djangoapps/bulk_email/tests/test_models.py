@@ -18,6 +18,7 @@ from bulk_email.models import (
     BulkEmailFlag,
     CourseAuthorization,
     CourseEmail,
+    CourseEmailRenderer,
     CourseEmailTemplate
 )
 from course_modes.models import CourseMode
@@ -253,6 +254,34 @@ class CourseEmailTemplateTest(TestCase):
         self.assertIn(context['course_title'], message)
         self.assertIn(context['name'], message)
 
+    def test_renderer(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._add_xss_fields(self._get_sample_html_context())
+        renderer = CourseEmailRenderer(
+            template,
+            "Dear %%USER_FULLNAME%%, thanks for enrolling in %%COURSE_DISPLAY_NAME%%.",
+            "Dear %%USER_FULLNAME%%, thanks for enrolling in %%COURSE_DISPLAY_NAME%%.",
+            context
+        )
+        self.assertFalse(renderer.uses_anonymous_user_id)
+        for name in ("<b>First</b>", "<b>Second</b>"):
+            plaintext, html = renderer.render({'name': name, 'email': 'learner@example.com', 'user_id': 42})
+            # The escaping of the HTML message does not leak into the plain text message.
+            self.assertIn(name, plaintext)
+            self.assertIn(context['course_title'], plaintext)
+            self.assertNotIn(name, html)
+            self.assertIn("&lt;b&gt;", html)
+            self.assertIn("&lt;script&gt;alert(&#39;Course Title!&#39;);&lt;/alert&gt;", html)
+        self.assertEqual(context['course_title'], "<script>alert('Course Title!');</alert>")
+
+    def test_renderer_anonymous_user_id(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._add_xss_fields(self._get_sample_html_context())
+        renderer = CourseEmailRenderer(template, "Your id is %%USER_ID%%.", "Your id is %%USER_ID%%.", context)
+        self.assertTrue(renderer.uses_anonymous_user_id)
+        plaintext, __ = renderer.render({'user_id': 42, 'anonymous_user_id': 'abcdef'})
+        self.assertIn("Your id is abcdef.", plaintext)
+
 
 @attr(shard=1)
 class CourseAuthorizationTest(TestCase):
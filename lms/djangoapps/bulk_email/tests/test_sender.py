@@ -0,0 +1,95 @@
+"""
+Unit tests for the sending of course emails over a pool of connections.
+"""
+import threading
+from smtplib import SMTPDataError
+
+from django.test import TestCase
+from mock import Mock, patch
+
+from bulk_email.sender import EmailSender
+
+
+class EmailSenderTest(TestCase):
+    """Tests the EmailSender."""
+
+    def _create_sender(self, side_effect=None, **kwargs):
+        """
+        Returns an opened EmailSender, closed after the test, and the mock
+        connection each of its connections is.
+        """
+        connection = Mock()
+        connection.send_messages.side_effect = side_effect
+        sender = EmailSender(Mock(return_value=connection), **kwargs)
+        sender.open()
+        self.addCleanup(sender.close)
+        return sender, connection
+
+    def test_single_connection(self):
+        error = SMTPDataError(554, "Email address is blacklisted")
+        sender, connection = self._create_sender(side_effect=[None, error])
+        self.assertEqual(sender.submit(1, 'first'), [(1, None)])
+        self.assertEqual(sender.submit(2, 'second'), [(2, error)])
+        self.assertEqual(sender.finish(), [])
+        self.assertEqual(connection.open.call_count, 1)
+        connection.send_messages.assert_any_call(['first'])
+        connection.send_messages.assert_any_call(['second'])
+
+    def test_multiple_connections(self):
+        error = SMTPDataError(554, "Email address is blacklisted")
+
+        def send_messages(messages):
+            """Fails to send the fourth message."""
+            if messages == [3]:
+                raise error
+
+        sender, connection = self._create_sender(side_effect=send_messages, num_connections=3)
+        results = []
+        for key in xrange(10):
+            results.extend(sender.submit(key, key))
+        results.extend(sender.finish())
+
+        self.assertEqual(sorted(results), [(key, error if key == 3 else None) for key in xrange(10)])
+        self.assertEqual(connection.open.call_count, 3)
+        self.assertEqual(connection.send_messages.call_count, 10)
+        sender.close()
+        self.assertEqual(connection.close.call_count, 3)
+
+    def test_messages_sent_in_parallel(self):
+        sending = {'first': threading.Event(), 'second': threading.Event()}
+        release = threading.Event()
+
+        def send_messages(messages):
+            """Blocks until both connections are sending a message."""
+            sending[messages[0]].set()
+            release.wait(5)
+
+        sender, __ = self._create_sender(side_effect=send_messages, num_connections=2)
+        sender.submit(1, 'first')
+        sender.submit(2, 'second')
+        self.assertTrue(sending['first'].wait(5))
+        self.assertTrue(sending['second'].wait(5))
+        release.set()
+        self.assertEqual(sorted(sender.finish()), [(1, None), (2, None)])
+
+    @patch('bulk_email.sender.sleep')
+    def test_min_send_interval(self, mock_sleep):
+        sender, __ = self._create_sender(min_send_interval=60)
+        sender.submit(1, 'first')
+        self.assertFalse(mock_sleep.called)
+        sender.submit(2, 'second')
+        self.assertEqual(mock_sleep.call_count, 1)
+        (delay,), __ = mock_sleep.call_args
+        self.assertGreater(delay, 59)
+
+    @patch('bulk_email.sender.sleep')
+    def test_min_send_interval_shared_by_connections(self, mock_sleep):
+        sender, __ = self._create_sender(num_connections=3, min_send_interval=60)
+        for key in xrange(3):
+            sender.submit(key, key)
+        sender.finish()
+        # Sleeping is mocked, so each send is reserved one interval after the previous one.
+        delays = sorted(delay for (delay,), __ in mock_sleep.call_args_list)
+        self.assertEqual(len(delays), 2)
+        self.assertGreater(delays[0], 59)
+        self.assertGreater(delays[1], 119)
@@ -26,17 +26,19 @@ from boto.ses.exceptions import (
 from celery.states import FAILURE, SUCCESS  # pylint: disable=no-name-in-module, import-error
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 from mock import Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locator import CourseLocator
 
 from bulk_email.models import SEND_TO_LEARNERS, SEND_TO_MYSELF, SEND_TO_STAFF, CourseEmail, Optout
-from bulk_email.tasks import _get_course_email_context
+from bulk_email.tasks import _get_anonymous_user_ids, _get_course_email_context
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, update_subtask_status
 from lms.djangoapps.instructor_task.tasks import send_bulk_course_email
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskCourseTestCase
+from student.models import AnonymousUserId, anonymous_id_for_user
 from xmodule.modulestore.tests.factories import CourseFactory
 
 
@@ -197,6 +199,38 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
 
+    @override_settings(BULK_EMAIL_SEND_CONNECTIONS=2)
+    def test_successful_with_multiple_connections(self):
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(get_conn.call_count, 2)
+        self.assertEquals(get_conn.return_value.send_messages.call_count, num_emails)
+        self.assertEquals(get_conn.return_value.close.call_count, 2)
+
+    @override_settings(BULK_EMAIL_SEND_CONNECTIONS=2)
+    def test_email_address_failures_with_multiple_connections(self):
+        self._test_email_address_failures(SESIllegalAddressError(554, "Email address is illegal"))
+
+    def test_get_anonymous_user_ids(self):
+        students = self._create_students(3)
+        # One of the students already has an anonymous id:
+        anonymous_id_for_user(students[0], None)
+        to_list = [{'pk': student.id} for student in students]
+        anonymous_user_ids = _get_anonymous_user_ids(to_list)
+
+        self.assertEquals(
+            anonymous_user_ids,
+            {student.id: anonymous_id_for_user(student, None, save=False) for student in students}
+        )
+        for student in students:
+            self.assertTrue(
+                AnonymousUserId.objects.filter(user=student, anonymous_user_id=anonymous_user_ids[student.id]).exists()
+            )
+
     def test_successful_twice(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
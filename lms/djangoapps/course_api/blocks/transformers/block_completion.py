@@ -13,6 +13,7 @@ class BlockCompletionTransformer(BlockStructureTransformer):
     Keep track of the completion of each block within the block structure.
     """
     READ_VERSION = 1
+    SUPPORTS_INCREMENTAL_COLLECT = True
     WRITE_VERSION = 1
     COMPLETION = 'completion'
 
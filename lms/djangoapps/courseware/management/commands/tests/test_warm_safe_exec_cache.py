@@ -0,0 +1,84 @@
+"""
+Tests for the warm_safe_exec_cache management command.
+"""
+import json
+from StringIO import StringIO
+
+from django.core.management import CommandError, call_command
+from mock import patch
+from nose.plugins.attrib import attr
+
+from capa.safe_exec.tests.test_safe_exec import DictCache
+from capa.tests.response_xml_factory import CustomResponseXMLFactory
+from courseware.tests.factories import StudentModuleFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+SCRIPT = "answer = random.randint(0, 100)"
+
+
+@attr(shard=1)
+class WarmSafeExecCacheTest(SharedModuleStoreTestCase):
+    """
+    Tests for the warm_safe_exec_cache management command.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(WarmSafeExecCacheTest, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        cls.problem = ItemFactory.create(
+            parent_location=cls.course.location,
+            category='problem',
+            data=CustomResponseXMLFactory().build_xml(script=SCRIPT, cfn='check', expect='42'),
+        )
+        cls.html = ItemFactory.create(parent_location=cls.course.location, category='html')
+
+    def setUp(self):
+        super(WarmSafeExecCacheTest, self).setUp()
+        self.cache = DictCache({})
+        patcher = patch('courseware.module_render.get_safe_exec_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_student_module(self, state):
+        """
+        Creates the state of a new student for the problem.
+        """
+        return StudentModuleFactory.create(
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            state=json.dumps(state),
+        )
+
+    def call_command(self, *args, **kwargs):
+        """
+        Calls the command and returns its output.
+        """
+        out = StringIO()
+        call_command('warm_safe_exec_cache', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_warm_cache(self):
+        for seed in (1, 2, 2):
+            self.create_student_module({'seed': seed})
+        self.create_student_module({})
+
+        output = self.call_command(unicode(self.problem.location))
+        self.assertIn(u'warmed the cache for 3 students', output)
+        self.assertEqual(len(self.cache.cache), 3)
+
+    def test_limit(self):
+        for seed in (1, 2, 3):
+            self.create_student_module({'seed': seed})
+
+        output = self.call_command(unicode(self.problem.location), limit=2)
+        self.assertIn(u'warmed the cache for 2 students', output)
+        self.assertEqual(len(self.cache.cache), 2)
+
+    def test_not_a_problem(self):
+        with self.assertRaises(CommandError):
+            self.call_command(unicode(self.html.location))
+
+    def test_invalid_key(self):
+        with self.assertRaises(CommandError):
+            self.call_command('not a key')
@@ -0,0 +1,99 @@
+"""
+Pre-warm the cache of the results of the Python scripts of capa problems.
+
+The script of a problem is executed, in the sandbox, with the random seed and
+the anonymous id of each student who has seen the problem, so each student
+whose state holds a seed gets their result cached, as if they had loaded the
+problem.
+
+Example usage:
+    $ ./manage.py lms warm_safe_exec_cache 'block-v1:edX+DemoX+Demo_Course+type@problem+block@abc' --settings=devstack
+"""
+import json
+import logging
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import UsageKey
+from xblock.runtime import KvsFieldData
+
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.models import StudentModule
+from courseware.module_render import get_module_for_descriptor_internal
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usage_keys',
+            nargs='+',
+            help=u'Usage keys of the problems to warm the cache for.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help=u'Maximum number of students to warm the cache for, per problem.',
+        )
+
+    def handle(self, *args, **options):
+        for usage_key_string in options['usage_keys']:
+            try:
+                usage_key = UsageKey.from_string(usage_key_string)
+            except InvalidKeyError:
+                raise CommandError(u'Invalid usage key: {}'.format(usage_key_string))
+
+            descriptor = modulestore().get_item(usage_key)
+            if descriptor.category != 'problem':
+                raise CommandError(u'{} is not a problem'.format(usage_key))
+
+            num_warmed = self._warm_cache(descriptor, options['limit'])
+            self.stdout.write(u'{}: warmed the cache for {} students'.format(usage_key, num_warmed))
+
+    def _warm_cache(self, descriptor, limit):
+        """
+        Loads the problem for each student with a seed in their state, up to
+        `limit` students, and returns their number.
+        """
+        usage_key = descriptor.location
+        student_modules = StudentModule.objects.filter(
+            course_id=usage_key.course_key,
+            module_state_key=usage_key,
+        ).select_related('student')
+
+        num_warmed = 0
+        for student_module in student_modules.iterator():
+            if limit is not None and num_warmed >= limit:
+                break
+            if 'seed' not in json.loads(student_module.state or '{}'):
+                continue
+            try:
+                self._load_problem(student_module.student, descriptor)
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u'Could not load %s for student %s', usage_key, student_module.student_id)
+                continue
+            num_warmed += 1
+        return num_warmed
+
+    def _load_problem(self, student, descriptor):
+        """
+        Loads the problem for the student, which executes its script with
+        the student's seed and caches the result.
+        """
+        course_key = descriptor.location.course_key
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_key, student, descriptor)
+        get_module_for_descriptor_internal(
+            user=student,
+            descriptor=descriptor,
+            student_data=KvsFieldData(DjangoKeyValueStore(field_data_cache)),
+            course_id=course_key,
+            track_function=lambda event_type, event: None,
+            xqueue_callback_url_prefix='',
+            request_token=None,
+        )
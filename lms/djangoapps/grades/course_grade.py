@@ -321,5 +321,15 @@ class CourseGrade(CourseGradeBase):
         return success_cutoff and percent >= success_cutoff
 
 
+class ReadOnlyCourseGrade(CourseGrade):
+    """
+    Course Grade class when grades are read from storage without
+    computing any subsection grades that were not persisted; those are
+    assumed to be zero.
+    """
+    def _get_subsection_grade(self, subsection, force_update_subsections=False):
+        return self._subsection_grade_factory.read(subsection)
+
+
 def _uniqueify_and_keep_order(iterable):
     return OrderedDict([(item, None) for item in iterable]).keys()
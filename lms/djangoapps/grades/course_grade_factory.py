@@ -11,8 +11,8 @@ from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
-from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade, prefetch
+from .course_grade import CourseGrade, ReadOnlyCourseGrade, ZeroCourseGrade
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, prefetch
 
 log = getLogger(__name__)
 
@@ -83,6 +83,7 @@ class CourseGradeFactory(object):
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            read_only=False,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -92,6 +93,13 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If read_only is True (and force_update is not), the persisted course
+        and subsection grades of all the students are read in bulk, and only
+        the grades of students whose persisted course grade is missing or
+        stale are computed. Subsection grades that were not persisted are
+        assumed to be zero. The ratio of students whose grades were computed
+        is logged and reported to datadog.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -102,11 +110,75 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
+        if read_only and not force_update and should_persist_grades(course_data.course_key):
+            for result in self._iter_read_only(users, course_data, stats_tags):
+                yield result
+            return
+
         for user in users:
             with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
                 yield self._iter_grade_result(user, course_data, force_update)
 
-    def _iter_grade_result(self, user, course_data, force_update):
+    def _iter_read_only(self, users, course_data, stats_tags):
+        """
+        Yields a GradeResult for each of the given users, served from their
+        persisted grades, which are prefetched with a few bulk queries.
+        """
+        users = list(users)
+        PersistentCourseGrade.prefetch(course_data.course_key, users)
+        PersistentSubsectionGrade.prefetch(course_data.course_key, users)
+        zero_if_absent = assume_zero_if_absent(course_data.course_key)
+
+        num_computed = 0
+        try:
+            for user in users:
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                    try:
+                        persistent_grade = PersistentCourseGrade.read(user.id, course_data.course_key)
+                    except PersistentCourseGrade.DoesNotExist:
+                        if not zero_if_absent:
+                            num_computed += 1
+                        result = self._iter_grade_result(user, course_data, force_update=False)
+                    else:
+                        if self._is_outdated(persistent_grade, course_data):
+                            num_computed += 1
+                            result = self._iter_grade_result(user, course_data, force_update=False, recompute=True)
+                        else:
+                            course_grade = self._from_persistent_grade(
+                                ReadOnlyCourseGrade, user, course_data, persistent_grade,
+                            )
+                            result = self.GradeResult(user, course_grade, None)
+                yield result
+        finally:
+            PersistentCourseGrade.clear_prefetched_data(course_data.course_key)
+            PersistentSubsectionGrade.clear_prefetched_data(course_data.course_key)
+
+        computed_ratio = float(num_computed) / len(users) if users else 0.0
+        dog_stats_api.histogram('lms.grades.CourseGradeFactory.iter.computed_ratio', computed_ratio, tags=stats_tags)
+        log.info(
+            u'Grades: IterReadOnly, %s, users: %d, computed: %d (%.1f%%)',
+            unicode(course_data), len(users), num_computed, computed_ratio * 100,
+        )
+
+    @staticmethod
+    def _is_outdated(persistent_grade, course_data):
+        """
+        Returns whether the given persisted course grade was computed
+        with a different grading policy or version of the course
+        content than the given course_data.
+        """
+        if persistent_grade.grading_policy_hash != course_data.grading_policy_hash:
+            return True
+        if course_data.version:
+            return persistent_grade.course_version != unicode(course_data.version)
+        if course_data.edited_on:
+            return (
+                persistent_grade.course_edited_timestamp is None or
+                persistent_grade.course_edited_timestamp < course_data.edited_on
+            )
+        return False
+
+    def _iter_grade_result(self, user, course_data, force_update, recompute=False):
         try:
             kwargs = {
                 'user': user,
@@ -117,7 +189,7 @@ class CourseGradeFactory(object):
             if force_update:
                 kwargs['force_update_subsections'] = True
 
-            method = CourseGradeFactory().update if force_update else CourseGradeFactory().read
+            method = CourseGradeFactory().update if force_update or recompute else CourseGradeFactory().read
             course_grade = method(**kwargs)
             return self.GradeResult(user, course_grade, None)
         except Exception as exc:  # pylint: disable=broad-except
@@ -151,7 +223,14 @@ class CourseGradeFactory(object):
         persistent_grade = PersistentCourseGrade.read(user.id, course_data.course_key)
         log.debug(u'Grades: Read, %s, User: %s, %s', unicode(course_data), user.id, persistent_grade)
 
-        return CourseGrade(
+        return CourseGradeFactory._from_persistent_grade(CourseGrade, user, course_data, persistent_grade)
+
+    @staticmethod
+    def _from_persistent_grade(grade_class, user, course_data, persistent_grade):
+        """
+        Returns a grade_class object for the given persisted course grade.
+        """
+        return grade_class(
             user,
             course_data,
             persistent_grade.percent_grade,
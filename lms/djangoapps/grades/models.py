@@ -296,6 +296,8 @@ class PersistentSubsectionGrade(TimeStampedModel):
     # track which blocks were visible at the time of grade calculation
     visible_blocks = models.ForeignKey(VisibleBlocks, db_column='visible_blocks_hash', to_field='hashed')
 
+    _CACHE_NAMESPACE = u"grades.models.PersistentSubsectionGrade"
+
     @property
     def full_usage_key(self):
         """
@@ -345,17 +347,42 @@ class PersistentSubsectionGrade(TimeStampedModel):
     @classmethod
     def bulk_read_grades(cls, user_id, course_key):
         """
-        Reads all grades for the given user and course.
+        Reads all grades for the given user and course, from the
+        prefetched grades if they were prefetched for the user.
 
         Arguments:
             user_id: The user associated with the desired grades
             course_key: The course identifier for the desired grades
         """
+        prefetched_grades = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_key), {})
+        if user_id in prefetched_grades:
+            return prefetched_grades[user_id]
         return cls.objects.select_related('visible_blocks', 'override').filter(
             user_id=user_id,
             course_id=course_key,
         )
 
+    @classmethod
+    def prefetch(cls, course_key, users):
+        """
+        Prefetches all grades for the given users for the given course,
+        with a single query, for use by bulk_read_grades.
+        """
+        prefetched_grades = {user.id: [] for user in users}
+        for grade in cls.objects.select_related('visible_blocks', 'override').filter(
+                user_id__in=prefetched_grades.keys(),
+                course_id=course_key,
+        ):
+            prefetched_grades[grade.user_id].append(grade)
+        get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(course_key)] = prefetched_grades
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears the grades prefetched for the given course.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
     @classmethod
     def update_or_create_grade(cls, **params):
         """
@@ -380,6 +407,7 @@ class PersistentSubsectionGrade(TimeStampedModel):
             grade.first_attempted = first_attempted
             grade.save()
 
+        cls._clear_prefetched_user_grades(usage_key.course_key, user_id)
         cls._emit_grade_calculated_event(grade)
         return grade
 
@@ -400,10 +428,25 @@ class PersistentSubsectionGrade(TimeStampedModel):
 
         grades = [PersistentSubsectionGrade(**params) for params in grade_params_iter]
         grades = cls.objects.bulk_create(grades)
+        cls._clear_prefetched_user_grades(course_key, user_id)
         for grade in grades:
             cls._emit_grade_calculated_event(grade)
         return grades
 
+    @classmethod
+    def _clear_prefetched_user_grades(cls, course_key, user_id):
+        """
+        Removes the given user's prefetched grades, if any, so the
+        updated grades are read from the database.
+        """
+        prefetched_grades = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_key))
+        if prefetched_grades is not None:
+            prefetched_grades.pop(user_id, None)
+
+    @classmethod
+    def _cache_key(cls, course_key):
+        return u"subsection_grades_cache.{}".format(course_key)
+
     @classmethod
     def _prepare_params(cls, params):
         """
@@ -510,6 +553,13 @@ class PersistentCourseGrade(TimeStampedModel):
             cls.objects.filter(user_id__in=[user.id for user in users], course_id=course_id)
         }
 
+    @classmethod
+    def clear_prefetched_data(cls, course_id):
+        """
+        Clears the grades prefetched for the given course.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_id), None)
+
     @classmethod
     def read(cls, user_id, course_id):
         """
@@ -1,8 +1,10 @@
 """
 Grades related signals.
 """
+from collections import OrderedDict
 from contextlib import contextmanager
 from logging import getLogger
+from threading import local
 
 from courseware.model_data import get_score, set_score
 from django.dispatch import receiver
@@ -30,6 +32,9 @@ from ..tasks import RECALCULATE_GRADE_DELAY_SECONDS, recalculate_subsection_grad
 
 log = getLogger(__name__)
 
+# Subsection updates collected within deferred_subsection_updates.
+_DEFERRED_SUBSECTION_UPDATES = local()
+
 
 @receiver(score_set)
 def submissions_score_set_handler(sender, **kwargs):  # pylint: disable=unused-argument
@@ -208,21 +213,52 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     enqueueing a subsection update operation to occur asynchronously.
     """
     events.grade_updated(**kwargs)
-    recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=unicode(get_event_transaction_id()),
-            event_transaction_type=unicode(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-        ),
-        countdown=RECALCULATE_GRADE_DELAY_SECONDS,
+    task_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=unicode(get_event_transaction_id()),
+        event_transaction_type=unicode(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
     )
+    deferred_updates = getattr(_DEFERRED_SUBSECTION_UPDATES, 'updates', None)
+    if deferred_updates is not None:
+        # Only the latest update of a block for a user needs to be enqueued.
+        deferred_updates.pop((task_kwargs['user_id'], task_kwargs['usage_id']), None)
+        deferred_updates[(task_kwargs['user_id'], task_kwargs['usage_id'])] = task_kwargs
+    else:
+        recalculate_subsection_grade_v3.apply_async(kwargs=task_kwargs, countdown=RECALCULATE_GRADE_DELAY_SECONDS)
+
+
+@contextmanager
+def deferred_subsection_updates():
+    """
+    Collects the subsection updates enqueued by enqueue_subsection_update
+    within the context, and enqueues them once the context exits without
+    an error.
+
+    This is meant to wrap a transaction in which the scores of many
+    problems are written, so that the subsection updates only run once
+    all of those scores are committed, instead of retrying until they are.
+    """
+    if getattr(_DEFERRED_SUBSECTION_UPDATES, 'updates', None) is not None:
+        # already within an outer deferred_subsection_updates
+        yield
+        return
+
+    _DEFERRED_SUBSECTION_UPDATES.updates = OrderedDict()
+    try:
+        yield
+        deferred_updates = _DEFERRED_SUBSECTION_UPDATES.updates
+    finally:
+        _DEFERRED_SUBSECTION_UPDATES.updates = None
+
+    for task_kwargs in deferred_updates.itervalues():
+        recalculate_subsection_grade_v3.apply_async(kwargs=task_kwargs, countdown=RECALCULATE_GRADE_DELAY_SECONDS)
 
 
 @receiver(SUBSECTION_SCORE_CHANGED)
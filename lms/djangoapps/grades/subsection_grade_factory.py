@@ -54,6 +54,15 @@ class SubsectionGradeFactory(object):
                         self._update_saved_subsection_grade(subsection.location, grade_model)
         return subsection_grade
 
+    def read(self, subsection):
+        """
+        Returns the persisted SubsectionGrade for the student and
+        subsection, or a ZeroSubsectionGrade if none was persisted.
+        Never computes the grade from the student's scores.
+        """
+        self._log_event(log.debug, u"read, subsection: {}".format(subsection.location), subsection)
+        return self._get_bulk_cached_grade(subsection) or ZeroSubsectionGrade(subsection, self.course_data)
+
     def bulk_create_unsaved(self):
         """
         Bulk creates all the unsaved subsection_grades to this point.
@@ -1,8 +1,10 @@
 import itertools
+from datetime import datetime
 from nose.plugins.attrib import attr
 
 import ddt
 import django
+import pytz
 from courseware.access import has_access
 from django.conf import settings
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
@@ -15,8 +17,9 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
-from ..course_grade import CourseGrade, ZeroCourseGrade
+from ..course_grade import CourseGrade, ReadOnlyCourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
+from ..models import PersistentCourseGrade, PersistentSubsectionGrade
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
@@ -212,6 +215,56 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         self.assertEqual(mock_update.called, force_update)
 
+    def test_iter_read_only(self):
+        grade_factory = CourseGradeFactory()
+        with mock_get_score(1, 2):
+            grade_factory.update(self.request.user, self.course, force_update_subsections=True)
+        PersistentSubsectionGrade.objects.filter(usage_key=self.sequence2.location).delete()
+        ungraded_user = UserFactory.create()
+
+        with patch.object(CourseGradeFactory, '_update', wraps=CourseGradeFactory._update) as mock_update:
+            with mock_get_score(1, 4):
+                results = list(grade_factory.iter([self.request.user, ungraded_user], self.course, read_only=True))
+
+        # only the user without a persisted grade is graded
+        self.assertEqual([call_args[0][0] for call_args in mock_update.call_args_list], [ungraded_user])
+        course_grade = results[0].course_grade
+        self.assertIsInstance(course_grade, ReadOnlyCourseGrade)
+        self.assertEqual(course_grade.percent, 0.5)
+        self.assertIsInstance(course_grade.subsection_grade(self.sequence.location), ReadSubsectionGrade)
+        self.assertIsInstance(course_grade.subsection_grade(self.sequence2.location), ZeroSubsectionGrade)
+        self.assertEqual(results[1].course_grade.percent, 0.25)
+
+    @ddt.data(
+        {'grading_policy_hash': 'outdated'},
+        {'course_version': 'outdated', 'course_edited_timestamp': datetime(2000, 1, 1, tzinfo=pytz.UTC)},
+    )
+    def test_iter_read_only_stale_grade(self, outdated_fields):
+        grade_factory = CourseGradeFactory()
+        with mock_get_score(1, 2):
+            grade_factory.update(self.request.user, self.course, force_update_subsections=True)
+        PersistentCourseGrade.objects.filter(user_id=self.request.user.id).update(**outdated_fields)
+
+        with patch.object(CourseGradeFactory, '_update', wraps=CourseGradeFactory._update) as mock_update:
+            results = list(grade_factory.iter([self.request.user], self.course, read_only=True))
+
+        self.assertTrue(mock_update.called)
+        self.assertIsInstance(results[0].course_grade, CourseGrade)
+        persistent_grade = PersistentCourseGrade.read(self.request.user.id, self.course.id)
+        for field, outdated_value in outdated_fields.iteritems():
+            self.assertNotEqual(getattr(persistent_grade, field), outdated_value)
+
+    def test_iter_read_only_clears_prefetched_grades(self):
+        grade_factory = CourseGradeFactory()
+        with mock_get_score(1, 2):
+            grade_factory.update(self.request.user, self.course, force_update_subsections=True)
+        list(grade_factory.iter([self.request.user], self.course, read_only=True))
+
+        # grades are read from the database again once the iteration is done
+        PersistentCourseGrade.objects.filter(user_id=self.request.user.id).delete()
+        with self.assertRaises(PersistentCourseGrade.DoesNotExist):
+            PersistentCourseGrade.read(self.request.user.id, self.course.id)
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
@@ -13,7 +13,7 @@ from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.utils.timezone import now
 from freezegun import freeze_time
-from mock import patch
+from mock import Mock, patch
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
 
 from lms.djangoapps.grades.models import (
@@ -254,6 +254,23 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
             self.assertEqual(updated_grade, read_grade)
             self.assertEqual(read_grade.visible_blocks.blocks, self.block_records)
 
+    def test_prefetch(self):
+        grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        ungraded_user_id = self.params["user_id"] + 1
+        users = [Mock(id=self.params["user_id"]), Mock(id=ungraded_user_id)]
+
+        with self.assertNumQueries(1):
+            PersistentSubsectionGrade.prefetch(self.course_key, users)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(PersistentSubsectionGrade.bulk_read_grades(self.params["user_id"], self.course_key)), [grade]
+            )
+            self.assertEqual(list(PersistentSubsectionGrade.bulk_read_grades(ungraded_user_id, self.course_key)), [])
+
+        PersistentSubsectionGrade.clear_prefetched_data(self.course_key)
+        with self.assertNumQueries(1):
+            list(PersistentSubsectionGrade.bulk_read_grades(self.params["user_id"], self.course_key))
+
     def test_unattempted(self):
         self.params['first_attempted'] = None
         self.params['earned_all'] = 0.0
@@ -14,7 +14,9 @@ from util.date_utils import to_timestamp
 
 from ..constants import ScoreDatabaseTableEnum
 from ..signals.handlers import (
+    deferred_subsection_updates,
     disconnect_submissions_signal_receiver,
+    enqueue_subsection_update,
     problem_raw_score_changed_handler,
     submissions_score_reset_handler,
     submissions_score_set_handler,
@@ -250,3 +252,54 @@ class ScoreChangedSignalRelayTest(TestCase):
         with self.assertRaises(ValueError):
             with disconnect_submissions_signal_receiver(PROBLEM_RAW_SCORE_CHANGED):
                 pass
+
+
+@patch('lms.djangoapps.grades.signals.handlers.events.grade_updated', MagicMock())
+@patch('lms.djangoapps.grades.signals.handlers.recalculate_subsection_grade_v3.apply_async')
+class DeferredSubsectionUpdatesTest(TestCase):
+    """
+    Tests for the deferred_subsection_updates context manager.
+    """
+    def send_score_changed(self, user_id, modified=FROZEN_NOW_DATETIME):
+        """
+        Calls the enqueue_subsection_update handler for a score change
+        of the given user.
+        """
+        kwargs = PROBLEM_WEIGHTED_SCORE_CHANGED_KWARGS.copy()
+        kwargs.update(user_id=user_id, modified=modified)
+        enqueue_subsection_update(**kwargs)
+
+    def enqueued_updates(self, apply_async_mock):
+        """
+        Returns the (user_id, expected_modified_time) of the enqueued updates.
+        """
+        return [
+            (call[1]['kwargs']['user_id'], call[1]['kwargs']['expected_modified_time'])
+            for call in apply_async_mock.call_args_list
+        ]
+
+    def test_updates_enqueued_on_exit(self, apply_async_mock):
+        later_datetime = FROZEN_NOW_DATETIME.replace(year=FROZEN_NOW_DATETIME.year + 1)
+        with deferred_subsection_updates():
+            self.send_score_changed(1)
+            self.send_score_changed(2)
+            self.send_score_changed(1, modified=later_datetime)
+            with deferred_subsection_updates():
+                self.send_score_changed(3)
+            apply_async_mock.assert_not_called()
+
+        self.assertEqual(
+            self.enqueued_updates(apply_async_mock),
+            [(2, FROZEN_NOW_TIMESTAMP), (1, to_timestamp(later_datetime)), (3, FROZEN_NOW_TIMESTAMP)],
+        )
+
+        apply_async_mock.reset_mock()
+        self.send_score_changed(4)
+        self.assertEqual(self.enqueued_updates(apply_async_mock), [(4, FROZEN_NOW_TIMESTAMP)])
+
+    def test_updates_dropped_on_error(self, apply_async_mock):
+        with self.assertRaises(ValueError):
+            with deferred_subsection_updates():
+                self.send_score_changed(1)
+                raise ValueError
+        apply_async_mock.assert_not_called()
@@ -8,7 +8,7 @@ a task.
 from config_models.admin import ConfigurationModelAdmin
 from django.contrib import admin
 
-from .config.models import GradeReportSetting
+from .config.models import GradeReportSetting, ProblemRescoreSetting
 from .models import InstructorTask
 
 
@@ -38,3 +38,4 @@ class InstructorTaskAdmin(admin.ModelAdmin):
 
 admin.site.register(InstructorTask, InstructorTaskAdmin)
 admin.site.register(GradeReportSetting, ConfigurationModelAdmin)
+admin.site.register(ProblemRescoreSetting, ConfigurationModelAdmin)
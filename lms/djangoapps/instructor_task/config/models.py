@@ -9,6 +9,17 @@ from django.db.models import IntegerField
 class GradeReportSetting(ConfigurationModel):
     """
     Sets the batch size used when running grade reports
-    with multiple celery workers.
+    with multiple celery workers. When enabled, course grade
+    reports are split into subtasks of batch_size users each.
     """
     batch_size = IntegerField(default=100)
+
+
+class ProblemRescoreSetting(ConfigurationModel):
+    """
+    Sets the batch size used when rescoring a problem for all
+    students with multiple celery workers. When enabled, the
+    submissions to rescore are split into subtasks of batch_size
+    submissions each.
+    """
+    batch_size = IntegerField(default=1000)
@@ -17,12 +17,14 @@ import hashlib
 import json
 import logging
 import os.path
+import shutil
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from opaque_keys.edx.django.models import CourseKeyField
 from six import text_type
@@ -179,12 +181,56 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+# Reports larger than this many bytes are spooled to a temporary file on disk,
+# rather than kept in memory, while they are written.
+REPORT_MAX_IN_MEMORY_SIZE = 5 * 1024 * 1024
+
+
+class ReportCSVFile(object):
+    """
+    A CSV file that report rows can be appended to one at a time, so a report
+    can be written incrementally in constant memory. The file is kept in memory
+    until it grows larger than REPORT_MAX_IN_MEMORY_SIZE, then spooled to disk.
+    """
+    def __init__(self):
+        self.file = SpooledTemporaryFile(max_size=REPORT_MAX_IN_MEMORY_SIZE)
+        self._csvwriter = csv.writer(self.file)
+        self.num_rows = 0
+
+    def writerow(self, row):
+        """
+        Appends the given row, an iterable of unicode strings, to the file.
+        """
+        self._csvwriter.writerow([unicode(item).encode('utf-8') for item in row])
+        self.num_rows += 1
+
+    def writerows(self, rows):
+        """
+        Appends the given rows to the file.
+        """
+        for row in rows:
+            self.writerow(row)
+
+    def append(self, source_file):
+        """
+        Appends the contents of the given file, CSV rows written by another
+        ReportCSVFile, to this file. The rows are copied without being parsed,
+        so they are not counted in num_rows.
+        """
+        shutil.copyfileobj(source_file, self.file)
+
+    def close(self):
+        """
+        Closes the file, deleting it if it was spooled to disk.
+        """
+        self.file.close()
+
+
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Large reports can be written incrementally to a ReportCSVFile
+    and stored with store_file, so the whole dataset is never held in memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -216,15 +262,6 @@ class ReportStore(object):
             )
         return DjangoStorageReportStore.from_config(config_name)
 
-    def _get_utf8_encoded_rows(self, rows):
-        """
-        Given a list of `rows` containing unicode strings, return a
-        new list of rows with those strings encoded as utf-8 for CSV
-        compatibility.
-        """
-        for row in rows:
-            yield [unicode(item).encode('utf-8') for item in row]
-
 
 class DjangoStorageReportStore(ReportStore):
     """
@@ -269,11 +306,24 @@ class DjangoStorageReportStore(ReportStore):
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        csv_file = ReportCSVFile()
+        try:
+            csv_file.writerows(rows)
+            self.store_file(course_id, filename, csv_file)
+        finally:
+            csv_file.close()
+
+    def store_file(self, course_id, filename, csv_file):
+        """
+        Given a course_id, filename, and a ReportCSVFile, write the file to
+        the storage backend. The file is read, and uploaded, in chunks.
+        """
+        content = File(csv_file.file, filename)
+        # The size of a spooled file cannot be read from its (unnamed) file on disk.
+        csv_file.file.seek(0, os.SEEK_END)
+        content.size = csv_file.file.tell()
+        csv_file.file.seek(0)
+        self.store(course_id, filename, content)
 
     def links_for(self, course_id):
         """
@@ -23,10 +23,12 @@ import logging
 from functools import partial
 
 from celery import task
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, check_subtask_is_valid, update_subtask_status
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -46,7 +48,8 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     perform_module_state_update,
     override_score_module_state,
-    rescore_problem_module_state,
+    perform_rescore,
+    rescore_problem_modules_in_range,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -72,15 +75,52 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
+
+    When ProblemRescoreSetting is enabled, the submissions of all students are rescored
+    in shards by rescore_problem_shard subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_rescore, xmodule_instance_args)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def rescore_problem_shard(entry_id, xmodule_instance_args, action_name, first_module_id, last_module_id,
+                          subtask_status_dict):
+    """
+    Rescore the submissions with StudentModule ids between `first_module_id` and
+    `last_module_id`, inclusive, as a subtask of a sharded rescore_problem.
+
+    Submissions rescored before a shard fails unexpectedly are still counted;
+    the remaining submissions of the shard are not rescored.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Task: %s, InstructorTask ID: %s, Rescoring StudentModules %s to %s",
+        current_task_id, entry_id, first_module_id, last_module_id
+    )
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        rescore_problem_modules_in_range(
+            xmodule_instance_args, entry_id, action_name, first_module_id, last_module_id, subtask_status
+        )
+    except Exception:
+        TASK_LOG.exception(
+            u"Task: %s, InstructorTask ID: %s, Rescoring StudentModules %s to %s failed",
+            current_task_id, entry_id, first_module_id, last_module_id
+        )
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def override_problem_score(entry_id, xmodule_instance_args):
     """
@@ -187,6 +227,90 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(
+        entry_id, xmodule_instance_args, action_name, shard_index, user_ids, merge_subtask_id, subtask_status_dict
+):
+    """
+    Grade one shard of the users of a course as a subtask of calculate_grades_csv,
+    storing the results as partial reports.
+
+    The last shard to complete queues merge_grades_csv_shards, with the id
+    `merge_subtask_id`, to combine the partial reports of all shards. Users
+    of a shard that fails unexpectedly are counted as failed and listed in
+    the error report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Task: %s, InstructorTask ID: %s, Grading shard %s of %d users",
+        current_task_id, entry_id, shard_index, len(user_ids)
+    )
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        num_succeeded, num_failed = CourseGradeReport.generate_shard(
+            xmodule_instance_args, entry_id, action_name, shard_index, user_ids
+        )
+    except Exception as exc:
+        TASK_LOG.exception(
+            u"Task: %s, InstructorTask ID: %s, Grading shard %s failed", current_task_id, entry_id, shard_index
+        )
+        try:
+            CourseGradeReport.store_failed_shard(entry_id, shard_index, user_ids, exc)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(
+                u"Task: %s, InstructorTask ID: %s, Recording the users of failed shard %s failed",
+                current_task_id, entry_id, shard_index,
+            )
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+        _update_grades_csv_shard_status(entry_id, xmodule_instance_args, action_name, merge_subtask_id, subtask_status)
+        raise
+
+    subtask_status.increment(succeeded=num_succeeded, failed=num_failed, state=SUCCESS)
+    _update_grades_csv_shard_status(entry_id, xmodule_instance_args, action_name, merge_subtask_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _update_grades_csv_shard_status(entry_id, xmodule_instance_args, action_name, merge_subtask_id, subtask_status):
+    """
+    Records the status of a completed grade report shard, and queues the merge
+    of all shards if it was the last one to complete.
+    """
+    num_remaining = update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+    if num_remaining == 1:
+        # Only the merge subtask itself is left.
+        merge_grades_csv_shards.apply_async(
+            (entry_id, xmodule_instance_args, action_name, SubtaskStatus.create(merge_subtask_id).to_dict()),
+            task_id=merge_subtask_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def merge_grades_csv_shards(entry_id, xmodule_instance_args, action_name, subtask_status_dict):
+    """
+    Merge the partial reports of all shards of a grade report, in order, and
+    push the complete report to an S3 bucket for download. This is the final
+    subtask of calculate_grades_csv, so the task is complete once it is.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        CourseGradeReport.merge_shards(xmodule_instance_args, entry_id, action_name)
+    except Exception:
+        TASK_LOG.exception(u"Task: %s, InstructorTask ID: %s, Merging grade shards failed", current_task_id, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -1,13 +1,18 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
+import os.path
 import re
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count, izip
 from time import time
+from uuid import uuid4
 
+from django.conf import settings
+from django.contrib.auth.models import User
 from lazy import lazy
 from pytz import UTC
 from six import text_type
@@ -16,9 +21,13 @@ from courseware.courses import get_course_by_id
 from instructor_analytics.basic import list_problem_responses
 from instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCertificate, certificate_info_for_user
+from lms.djangoapps.grades.config.waffle import READ_ONLY_GRADE_REPORTS, waffle as grades_waffle
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportCSVFile, ReportStore
+from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -31,7 +40,7 @@ from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import upload_csv_file_to_report_store, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -55,6 +64,33 @@ def _flatten(iterable):
     return list(chain.from_iterable(iterable))
 
 
+def _batch_users(users, batch_size):
+    """
+    Returns a generator of lists of at most batch_size of the given queryset
+    of users, iterating over the queryset without caching its results.
+    """
+    batch = []
+    for user in users.iterator():
+        batch.append(user)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _shard_filename(entry_id, kind=None, shard_index=None):
+    """
+    Returns the name of the partial report of the given kind ('success' or
+    'error') for the given shard of a sharded grade report, or of the
+    directory of all of its partial reports if no kind is given.
+    """
+    shard_dir = u'grade_report_shards_{}'.format(entry_id)
+    if kind is None:
+        return shard_dir
+    return u'{}/{}_{:06d}.csv'.format(shard_dir, kind, shard_index)
+
+
 class _CourseGradeReportContext(object):
     """
     Internal class that provides a common context to use for a single grade
@@ -86,6 +122,14 @@ class _CourseGradeReportContext(object):
     def course_structure(self):
         return get_course_in_cache(self.course_id)
 
+    @lazy
+    def read_only_grades(self):
+        """
+        Returns whether grades are served from the persisted grades,
+        computing only those that are missing or stale.
+        """
+        return grades_waffle().is_enabled(READ_ONLY_GRADE_REPORTS)
+
     @lazy
     def course_experiments(self):
         return get_split_user_partitions(self.course.user_partitions)
@@ -182,7 +226,9 @@ class _CourseGradeBulkContext(object):
         self.enrollments = _EnrollmentBulkContext(context, users)
         bulk_cache_cohorts(context.course_id, users)
         BulkRoleCache.prefetch(users)
-        PersistentCourseGrade.prefetch(context.course_id, users)
+        if not context.read_only_grades:
+            # read-only grades are prefetched by CourseGradeFactory.iter
+            PersistentCourseGrade.prefetch(context.course_id, users)
         BulkCourseTags.prefetch(context.course_id, users)
 
 
@@ -200,8 +246,196 @@ class CourseGradeReport(object):
         """
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+            grade_report_setting = GradeReportSetting.current()
+            if grade_report_setting.enabled:
+                progress = CourseGradeReport()._queue_shards(
+                    context, _xmodule_instance_args, _entry_id, grade_report_setting.batch_size,
+                )
+                if progress is not None:
+                    return progress
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_shard(cls, xmodule_instance_args, entry_id, action_name, shard_index, user_ids):
+        """
+        Public method to generate the part of a sharded grade report for the
+        given users. The rows are stored in partial reports, to be merged by
+        merge_shards once all shards are done.
+
+        Returns the number of users successfully graded and the number of
+        users that could not be graded.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        task_input = json.loads(entry.task_input)
+        with modulestore().bulk_operations(entry.course_id):
+            context = _CourseGradeReportContext(
+                xmodule_instance_args, entry_id, entry.course_id, task_input, action_name,
+            )
+            context.update_status(u'Compiling grades for shard {}'.format(shard_index))
+            return CourseGradeReport()._generate_shard(context, entry_id, shard_index, user_ids)
+
+    @classmethod
+    def store_failed_shard(cls, entry_id, shard_index, user_ids, error):
+        """
+        Public method to list the users of a shard that failed unexpectedly in
+        the partial error report of the shard, replacing any partial reports
+        it stored, so that they are not silently left out of the grade report.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        usernames = dict(User.objects.filter(id__in=user_ids).values_list('id', 'username'))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        success_path = report_store.path_to(entry.course_id, _shard_filename(entry_id, 'success', shard_index))
+        if report_store.storage.exists(success_path):
+            report_store.storage.delete(success_path)
+
+        error_file = ReportCSVFile()
+        try:
+            error_file.writerows(
+                [user_id, usernames.get(user_id, u''), u'Grading failed: {}'.format(text_type(error))]
+                for user_id in user_ids
+            )
+            report_store.store_file(entry.course_id, _shard_filename(entry_id, 'error', shard_index), error_file)
+        finally:
+            error_file.close()
+
+    @classmethod
+    def merge_shards(cls, xmodule_instance_args, entry_id, action_name):
+        """
+        Public method to merge the partial reports of all shards of a grade
+        report, in order, into the complete grade report.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        task_input = json.loads(entry.task_input)
+        with modulestore().bulk_operations(entry.course_id):
+            context = _CourseGradeReportContext(
+                xmodule_instance_args, entry_id, entry.course_id, task_input, action_name,
+            )
+            context.update_status(u'Merging grades')
+            CourseGradeReport()._merge_shards(context, entry_id)
+            context.update_status(u'Completed grades')
+
+    def _queue_shards(self, context, xmodule_instance_args, entry_id, users_per_shard):
+        """
+        Queues subtasks that each grade a range of at most users_per_shard of
+        the enrolled users, followed by a final subtask merging their partial
+        reports. Progress is aggregated across the subtasks in the
+        InstructorTask entry.
+
+        Returns None, without queueing anything, if there are no enrolled
+        users.
+        """
+        # imported here to avoid a circular import, as the tasks module uses this one
+        from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_shard
+
+        users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            return None
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        merge_subtask_id = str(uuid4())
+        shard_indexes = count()
+
+        def _create_shard_subtask(user_list, initial_subtask_status):
+            """
+            Creates a subtask to grade the given users.
+            """
+            return calculate_grades_csv_shard.subtask(
+                (
+                    entry_id,
+                    xmodule_instance_args,
+                    context.action_name,
+                    next(shard_indexes),
+                    [user['pk'] for user in user_list],
+                    merge_subtask_id,
+                    initial_subtask_status.to_dict(),
+                ),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        context.update_status(u'Queueing grade shards')
+        return queue_subtasks_for_query(
+            entry,
+            context.action_name,
+            _create_shard_subtask,
+            [users],
+            [],
+            users_per_shard,
+            total_num_users,
+            final_subtask_id=merge_subtask_id,
+        )
+
+    def _generate_shard(self, context, entry_id, shard_index, user_ids):
+        """
+        Internal method for generating and storing the partial reports of the
+        given users. Returns the number of success and error rows.
+        """
+        users = User.objects.filter(id__in=user_ids).select_related('profile').order_by('id')
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        success_file = ReportCSVFile()
+        error_file = ReportCSVFile()
+        try:
+            for success_rows, error_rows in self._batched_rows(context, users):
+                success_file.writerows(success_rows)
+                error_file.writerows(error_rows)
+
+            report_store.store_file(
+                context.course_id, _shard_filename(entry_id, 'success', shard_index), success_file,
+            )
+            if error_file.num_rows > 0:
+                report_store.store_file(
+                    context.course_id, _shard_filename(entry_id, 'error', shard_index), error_file,
+                )
+            return success_file.num_rows, error_file.num_rows
+        finally:
+            success_file.close()
+            error_file.close()
+
+    def _merge_shards(self, context, entry_id):
+        """
+        Internal method for merging the partial reports of all shards, in
+        shard order, into complete reports and uploading them. The partial
+        reports are deleted once merged.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        shard_dir = _shard_filename(entry_id)
+        _, filenames = report_store.storage.listdir(report_store.path_to(context.course_id, shard_dir))
+        shard_paths = {
+            kind: [
+                report_store.path_to(context.course_id, os.path.join(shard_dir, filename))
+                for filename in sorted(filenames) if filename.startswith(kind + '_')
+            ]
+            for kind in ('success', 'error')
+        }
+
+        date = datetime.now(UTC)
+        self._merge_shard_files(
+            report_store, shard_paths['success'], self._success_headers(context), 'grade_report', context, date,
+        )
+        if shard_paths['error']:
+            self._merge_shard_files(
+                report_store, shard_paths['error'], self._error_headers(), 'grade_report_err', context, date,
+            )
+
+        for path in chain(*shard_paths.values()):
+            report_store.storage.delete(path)
+
+    def _merge_shard_files(self, report_store, shard_paths, headers, csv_name, context, date):
+        """
+        Uploads a report with the given headers followed by the rows of
+        each of the given partial reports, streamed from the report store.
+        """
+        report_file = ReportCSVFile()
+        try:
+            report_file.writerow(headers)
+            for path in shard_paths:
+                with report_store.storage.open(path) as shard_file:
+                    report_file.append(shard_file)
+            upload_csv_file_to_report_store(report_file, csv_name, context.course_id, date)
+        finally:
+            report_file.close()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -240,12 +474,12 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, users=None):
         """
-        A generator of batches of (success_rows, error_rows) for this report.
+        A generator of batches of (success_rows, error_rows) for this report,
+        for the given users or all users enrolled in the course.
         """
-        for users in self._batch_users(context):
-            users = filter(lambda u: u is not None, users)
+        for users in self._batch_users(context, users):
             yield self._rows_for_users(context, users)
 
     def _compile(self, context, batched_rows):
@@ -287,17 +521,15 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, users=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of the given users, or of all users
+        enrolled in the course.
         """
-        def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
-            args = [iter(iterable)] * chunk_size
-            return izip_longest(*args, fillvalue=fillvalue)
-
-        users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
-        users = users.select_related('profile')
-        return grouper(users)
+        if users is None:
+            users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
+            users = users.select_related('profile')
+        return _batch_users(users, self.USER_BATCH_SIZE)
 
     def _user_grades(self, course_grade, context):
         """
@@ -434,6 +666,7 @@ class CourseGradeReport(object):
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
+                read_only=context.read_only_grades,
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -453,11 +686,18 @@ class CourseGradeReport(object):
 
 
 class ProblemGradeReport(object):
+    # Batch size for chunking the list of enrollees in the course.
+    USER_BATCH_SIZE = 100
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
         Generate a CSV containing all students' problem grades within a given
         `course_id`.
+
+        Rows are written to the report file as each student is graded, and
+        students are loaded in batches, so memory use does not grow with the
+        number of students enrolled in the course.
         """
         start_time = time()
         start_date = datetime.now(UTC)
@@ -472,55 +712,71 @@ class ProblemGradeReport(object):
 
         course = get_course_by_id(course_id)
         graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course)
+        # Fetch the collected course structure once, rather than once per batch.
+        course_structure = get_course_in_cache(course_id)
+
+        report_file = ReportCSVFile()
+        error_file = ReportCSVFile()
+        try:
+            # Just generate the static fields for now.
+            report_file.writerow(
+                list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())
+            )
+            error_file.writerow(list(header_row.values()) + ['error_msg'])
+            current_step = {'step': 'Calculating Grades'}
 
-        # Just generate the static fields for now.
-        rows = [list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())]
-        error_rows = [list(header_row.values()) + ['error_msg']]
-        current_step = {'step': 'Calculating Grades'}
-
-        # Bulk fetch and cache enrollment states so we can efficiently determine
-        # whether each user is currently enrolled in the course.
-        CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
-
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
-            student_fields = [getattr(student, field_name) for field_name in header_row]
-            task_progress.attempted += 1
-
-            if not course_grade:
-                err_msg = text_type(error)
-                # There was an error grading this student.
-                if not err_msg:
-                    err_msg = u'Unknown error'
-                error_rows.append(student_fields + [err_msg])
-                task_progress.failed += 1
-                continue
-
-            enrollment_status = _user_enrollment_status(student, course_id)
-
-            earned_possible_values = []
-            for block_location in graded_scorable_blocks:
-                try:
-                    problem_score = course_grade.problem_scores[block_location]
-                except KeyError:
-                    earned_possible_values.append([u'Not Available', u'Not Available'])
-                else:
-                    if problem_score.first_attempted:
-                        earned_possible_values.append([problem_score.earned, problem_score.possible])
-                    else:
-                        earned_possible_values.append([u'Not Attempted', problem_score.possible])
-
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
-
-            task_progress.succeeded += 1
-            if task_progress.attempted % status_interval == 0:
-                task_progress.update_task_state(extra_meta=current_step)
-
-        # Perform the upload if any students have been successfully graded
-        if len(rows) > 1:
-            upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-        # If there are any error rows, write them out as well
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+            for students in _batch_users(enrolled_students, cls.USER_BATCH_SIZE):
+                # Bulk fetch and cache enrollment states so we can efficiently determine
+                # whether each user is currently enrolled in the course.
+                CourseEnrollment.bulk_fetch_enrollment_states(students, course_id)
+
+                grade_results = CourseGradeFactory().iter(
+                    students, course, collected_block_structure=course_structure,
+                )
+                for student, course_grade, error in grade_results:
+                    student_fields = [getattr(student, field_name) for field_name in header_row]
+                    task_progress.attempted += 1
+
+                    if not course_grade:
+                        err_msg = text_type(error)
+                        # There was an error grading this student.
+                        if not err_msg:
+                            err_msg = u'Unknown error'
+                        error_file.writerow(student_fields + [err_msg])
+                        task_progress.failed += 1
+                        continue
+
+                    enrollment_status = _user_enrollment_status(student, course_id)
+
+                    earned_possible_values = []
+                    for block_location in graded_scorable_blocks:
+                        try:
+                            problem_score = course_grade.problem_scores[block_location]
+                        except KeyError:
+                            earned_possible_values.append([u'Not Available', u'Not Available'])
+                        else:
+                            if problem_score.first_attempted:
+                                earned_possible_values.append([problem_score.earned, problem_score.possible])
+                            else:
+                                earned_possible_values.append([u'Not Attempted', problem_score.possible])
+
+                    report_file.writerow(
+                        student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values)
+                    )
+
+                    task_progress.succeeded += 1
+                    if task_progress.attempted % status_interval == 0:
+                        task_progress.update_task_state(extra_meta=current_step)
+
+            # Perform the upload if any students have been successfully graded
+            if report_file.num_rows > 1:
+                upload_csv_file_to_report_store(report_file, 'problem_grade_report', course_id, start_date)
+            # If there are any error rows, write them out as well
+            if error_file.num_rows > 1:
+                upload_csv_file_to_report_store(error_file, 'problem_grade_report_err', course_id, start_date)
+        finally:
+            report_file.close()
+            error_file.close()
 
         return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
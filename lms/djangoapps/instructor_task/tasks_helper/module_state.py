@@ -3,6 +3,8 @@ Instructor Tasks related to module state.
 """
 import json
 import logging
+from functools import partial
+from itertools import islice
 from time import time
 
 from django.contrib.auth.models import User
@@ -16,6 +18,10 @@ from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.models import StudentModule
 from courseware.module_render import get_module_for_descriptor_internal
 from lms.djangoapps.grades.events import GRADES_OVERRIDE_EVENT_TYPE, GRADES_RESCORE_EVENT_TYPE
+from lms.djangoapps.grades.signals.handlers import deferred_subsection_updates
+from lms.djangoapps.instructor_task.config.models import ProblemRescoreSetting
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
 from track.views import task_track
 from util.db import outer_atomic
@@ -29,6 +35,10 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Number of submissions rescored within a single transaction by a shard of
+# a sharded rescore.
+RESCORE_TRANSACTION_SIZE = 50
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -59,26 +69,9 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
     student_identifier = task_input.get('student')
     override_score_task = action_name == ugettext_noop('overridden')
-    problems = {}
-
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[unicode(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
 
     modules_to_update = _get_modules_to_update(
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
@@ -121,69 +114,66 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     Returns True if problem was successfully rescored for the given student, and False
     if problem encountered some kind of error in rescoring.
     '''
-    # unpack the StudentModule:
     course_id = student_module.course_id
-    student = student_module.student
-    usage_key = student_module.module_state_key
-
     with modulestore().bulk_operations(course_id):
         course = get_course_by_id(course_id)
-        # TODO: Here is a call site where we could pass in a loaded course.  I
-        # think we certainly need it since grading is happening here, and field
-        # overrides would be important in handling that correctly
-        instance = _get_module_instance_for_task(
-            course_id,
-            student,
-            module_descriptor,
-            xmodule_instance_args,
-            grade_bucket_type='rescore',
-            course=course
+        return _rescore_problem_module_state(
+            xmodule_instance_args, module_descriptor, student_module, task_input, course
         )
 
-        if instance is None:
-            # Either permissions just changed, or someone is trying to be clever
-            # and load something they shouldn't have access to.
-            msg = "No module {location} for student {student}--access denied?".format(
-                location=usage_key,
-                student=student
-            )
-            TASK_LOG.warning(msg)
-            return UPDATE_STATUS_FAILED
-
-        if not hasattr(instance, 'rescore'):
-            # This should not happen, since it should be already checked in the
-            # caller, but check here to be sure.
-            msg = "Specified module {0} of type {1} does not support rescoring.".format(usage_key, instance.__class__)
-            raise UpdateProblemModuleStateError(msg)
 
-        # We check here to see if the problem has any submissions. If it does not, we don't want to rescore it
-        if not instance.has_submitted_answer():
-            return UPDATE_STATUS_SKIPPED
+def _rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input, course):
+    '''
+    Performs rescoring on the student's problem submission, as described in
+    rescore_problem_module_state, with the already loaded `course`. The caller
+    is responsible for the transaction and the bulk operation around the call.
+    '''
+    # unpack the StudentModule:
+    course_id = student_module.course_id
+    student = student_module.student
+    usage_key = student_module.module_state_key
 
-        # Set the tracking info before this call, because it makes downstream
-        # calls that create events.  We retrieve and store the id here because
-        # the request cache will be erased during downstream calls.
-        create_new_event_transaction_id()
-        set_event_transaction_type(GRADES_RESCORE_EVENT_TYPE)
-
-        # specific events from CAPA are not propagated up the stack. Do we want this?
-        try:
-            instance.rescore(only_if_higher=task_input['only_if_higher'])
-        except (LoncapaProblemError, StudentInputError, ResponseError):
-            TASK_LOG.warning(
-                u"error processing rescore call for course %(course)s, problem %(loc)s "
-                u"and student %(student)s",
-                dict(
-                    course=course_id,
-                    loc=usage_key,
-                    student=student
-                )
-            )
-            return UPDATE_STATUS_FAILED
+    instance = _get_module_instance_for_task(
+        course_id,
+        student,
+        module_descriptor,
+        xmodule_instance_args,
+        grade_bucket_type='rescore',
+        course=course
+    )
 
-        instance.save()
-        TASK_LOG.debug(
-            u"successfully processed rescore call for course %(course)s, problem %(loc)s "
+    if instance is None:
+        # Either permissions just changed, or someone is trying to be clever
+        # and load something they shouldn't have access to.
+        msg = "No module {location} for student {student}--access denied?".format(
+            location=usage_key,
+            student=student
+        )
+        TASK_LOG.warning(msg)
+        return UPDATE_STATUS_FAILED
+
+    if not hasattr(instance, 'rescore'):
+        # This should not happen, since it should be already checked in the
+        # caller, but check here to be sure.
+        msg = "Specified module {0} of type {1} does not support rescoring.".format(usage_key, instance.__class__)
+        raise UpdateProblemModuleStateError(msg)
+
+    # We check here to see if the problem has any submissions. If it does not, we don't want to rescore it
+    if not instance.has_submitted_answer():
+        return UPDATE_STATUS_SKIPPED
+
+    # Set the tracking info before this call, because it makes downstream
+    # calls that create events.  We retrieve and store the id here because
+    # the request cache will be erased during downstream calls.
+    create_new_event_transaction_id()
+    set_event_transaction_type(GRADES_RESCORE_EVENT_TYPE)
+
+    # specific events from CAPA are not propagated up the stack. Do we want this?
+    try:
+        instance.rescore(only_if_higher=task_input['only_if_higher'])
+    except (LoncapaProblemError, StudentInputError, ResponseError):
+        TASK_LOG.warning(
+            u"error processing rescore call for course %(course)s, problem %(loc)s "
             u"and student %(student)s",
             dict(
                 course=course_id,
@@ -191,8 +181,138 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
                 student=student
             )
         )
+        return UPDATE_STATUS_FAILED
+
+    instance.save()
+    TASK_LOG.debug(
+        u"successfully processed rescore call for course %(course)s, problem %(loc)s "
+        u"and student %(student)s",
+        dict(
+            course=course_id,
+            loc=usage_key,
+            student=student
+        )
+    )
 
-        return UPDATE_STATUS_SUCCEEDED
+    return UPDATE_STATUS_SUCCEEDED
+
+
+def perform_rescore(xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Rescores the problem submissions selected by `task_input`.
+
+    When ProblemRescoreSetting is enabled and all students' submissions are
+    to be rescored, the submissions are split by StudentModule id into
+    ranges of at most batch_size submissions, each rescored by a subtask of
+    rescore_problem_shard. Progress is then aggregated across the subtasks
+    in the InstructorTask entry. Otherwise, the submissions are rescored
+    one at a time by perform_module_state_update.
+    """
+    rescore_setting = ProblemRescoreSetting.current()
+    if rescore_setting.enabled and task_input.get('student') is None:
+        progress = _queue_rescore_shards(
+            xmodule_instance_args, entry_id, course_id, task_input, action_name, rescore_setting.batch_size
+        )
+        if progress is not None:
+            return progress
+
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update(update_fcn, None, entry_id, course_id, task_input, action_name)
+
+
+def _queue_rescore_shards(xmodule_instance_args, entry_id, course_id, task_input, action_name, modules_per_shard):
+    """
+    Queues subtasks that each rescore a range of at most modules_per_shard
+    of the StudentModules to rescore, in order of id.
+
+    Returns None, without queueing anything, if there are no StudentModules
+    to rescore.
+    """
+    # imported here to avoid a circular import, as the tasks module uses this one
+    from lms.djangoapps.instructor_task.tasks import rescore_problem_shard
+
+    usage_keys, _ = _get_problems_to_update(course_id, task_input)
+    modules_to_update = _get_modules_to_update(course_id, usage_keys, None, None).order_by('id')
+    total_num_modules = modules_to_update.count()
+    if total_num_modules == 0:
+        return None
+
+    def _create_shard_subtask(module_list, initial_subtask_status):
+        """
+        Creates a subtask to rescore the StudentModules in the id range of
+        the given modules.
+        """
+        return rescore_problem_shard.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                action_name,
+                module_list[0]['pk'],
+                module_list[-1]['pk'],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_shard_subtask,
+        [modules_to_update],
+        [],
+        modules_per_shard,
+        total_num_modules,
+    )
+
+
+def rescore_problem_modules_in_range(
+        xmodule_instance_args, entry_id, action_name, first_module_id, last_module_id, subtask_status
+):
+    """
+    Rescores the StudentModules of a sharded rescore whose ids are between
+    `first_module_id` and `last_module_id`, inclusive, incrementing the
+    counts of `subtask_status` as each one is rescored.
+
+    The course and the problem descriptors are loaded once for the whole
+    range, and the submissions are rescored in transactions of
+    RESCORE_TRANSACTION_SIZE, with the resulting subsection grade updates
+    only enqueued once each transaction is committed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+
+    with modulestore().bulk_operations(course_id):
+        course = get_course_by_id(course_id)
+        usage_keys, problems = _get_problems_to_update(course_id, task_input)
+        modules_to_update = _get_modules_to_update(course_id, usage_keys, None, None).filter(
+            id__gte=first_module_id,
+            id__lte=last_module_id,
+        ).select_related('student').order_by('id').iterator()
+
+        while True:
+            module_batch = list(islice(modules_to_update, RESCORE_TRANSACTION_SIZE))
+            if not module_batch:
+                break
+
+            batch_status_counts = {UPDATE_STATUS_SUCCEEDED: 0, UPDATE_STATUS_FAILED: 0, UPDATE_STATUS_SKIPPED: 0}
+            with deferred_subsection_updates():
+                with outer_atomic():
+                    for module_to_update in module_batch:
+                        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+                        with dog_stats_api.timer(
+                            'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+                        ):
+                            update_status = _rescore_problem_module_state(
+                                xmodule_instance_args, module_descriptor, module_to_update, task_input, course
+                            )
+                        batch_status_counts[update_status] += 1
+
+            # Only count the batch once it is committed.  As in
+            # perform_module_state_update, skipped modules are attempted.
+            subtask_status.increment(**batch_status_counts)
+            subtask_status.attempted += batch_status_counts[UPDATE_STATUS_SKIPPED]
 
 
 @outer_atomic
@@ -387,6 +507,33 @@ def _get_task_id_from_xmodule_args(xmodule_instance_args):
         return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID)
 
 
+def _get_problems_to_update(course_id, task_input):
+    """
+    Returns the usage keys of the problems to update for the given `task_input`,
+    along with a dict of their descriptors keyed by the unicode of their usage keys.
+    """
+    usage_keys = []
+    problems = {}
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[unicode(usage_key)] = problem_descriptor
+
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
 def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn, override_score_task=False):
     """
     Fetches a StudentModule instances for a given `course_id`, `student` object, and `usage_keys`.
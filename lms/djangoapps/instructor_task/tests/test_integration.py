@@ -28,6 +28,7 @@ from lms.djangoapps.instructor_task.api import (
     submit_rescore_problem_for_student,
     submit_reset_problem_attempts_for_all_students
 )
+from lms.djangoapps.instructor_task.config.models import ProblemRescoreSetting
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport
 from lms.djangoapps.instructor_task.tests.test_base import (
@@ -228,6 +229,28 @@ class TestRescoringTask(TestIntegrationTask):
             problem_edit, new_expected_scores, new_expected_max, rescore_if_higher=True,
         )
 
+    @ddt.data((1, 5), (3, 2), (10, 1))
+    @ddt.unpack
+    def test_sharded_rescoring(self, batch_size, expected_num_shards):
+        ProblemRescoreSetting.objects.create(enabled=True, batch_size=batch_size)
+        self.verify_rescore_results(
+            dict(correct_answer=OPTION_2), (0, 1, 1, 2), 2, rescore_if_higher=False,
+        )
+
+        # a student who viewed the problem without submitting an answer is skipped
+        self.create_student('u5')
+        self.render_problem('u5', 'H1P1')
+        self.submit_rescore_all_student_answers('instructor', 'H1P1')
+
+        entry = InstructorTask.objects.filter(task_type='rescore_problem').latest('id')
+        self.assertEqual(entry.task_state, SUCCESS)
+        num_modules = len(self.users) + 1
+        self.assertDictContainsSubset(
+            {'attempted': num_modules, 'succeeded': len(self.users), 'failed': 0, 'skipped': 1, 'total': num_modules},
+            json.loads(entry.task_output),
+        )
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], expected_num_shards)
+
     def test_rescoring_if_higher_scores_equal(self):
         """
         Specifically tests rescore when the previous and new raw scores are equal. In this case, the scores should
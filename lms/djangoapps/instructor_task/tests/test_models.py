@@ -2,18 +2,21 @@
 Tests for instructor_task/models.py.
 """
 import copy
+import csv
 import time
 from cStringIO import StringIO
 
 import boto
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.test import SimpleTestCase, TestCase, override_settings
-from mock import patch
+from mock import Mock, patch
 from opaque_keys.edx.locator import CourseLocator
 
 from common.test.utils import MockS3Mixin
-from lms.djangoapps.instructor_task.models import ReportStore
+from lms.djangoapps.instructor_task.models import ReportCSVFile, ReportStore
 from lms.djangoapps.instructor_task.tests.test_base import TestReportMixin
+from openedx.core.storage import S3ReportStorage
 
 
 class ReportStoreTestMixin(object):
@@ -49,6 +52,24 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    @patch('lms.djangoapps.instructor_task.models.REPORT_MAX_IN_MEMORY_SIZE', 100)
+    def test_store_spooled_file(self):
+        """
+        Test that a ReportCSVFile spooled to disk is stored in full.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'Student ID', u'Username']] + [[unicode(index), u'\xfcser_{}'.format(index)] for index in range(100)]
+
+        csv_file = ReportCSVFile()
+        csv_file.writerows(rows)
+        self.assertTrue(csv_file.file._rolled)  # pylint: disable=protected-access
+        report_store.store_file(self.course_id, 'spooled_file', csv_file)
+        csv_file.close()
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'spooled_file')) as stored_file:
+            stored_rows = [[item.decode('utf-8') for item in row] for row in csv.reader(stored_file)]
+        self.assertEqual(stored_rows, rows)
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -133,3 +154,47 @@ class TestS3ReportStorage(MockS3Mixin, TestCase):
             report_store = ReportStore.from_config(config_name="FINANCIAL_REPORTS")
             # Make sure CUSTOM_DOMAIN from FINANCIAL_REPORTS is used to construct file url
             self.assertIn("edx-financial-reports.s3.amazonaws.com", report_store.storage.url(""))
+
+    def _create_storage_with_multipart_upload(self):
+        """
+        Returns an S3ReportStorage, and a stub of the multipart uploads of
+        its bucket.
+        """
+        boto.connect_s3().create_bucket('edx-grades')
+        storage = S3ReportStorage(bucket='edx-grades')
+        multipart_upload = Mock()
+        patcher = patch.object(storage.bucket, 'initiate_multipart_upload', return_value=multipart_upload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return storage, multipart_upload
+
+    @patch.object(S3ReportStorage, 'MULTIPART_UPLOAD_CHUNK_SIZE', 10)
+    def test_multipart_upload(self):
+        """
+        Test that a report larger than MULTIPART_UPLOAD_CHUNK_SIZE is uploaded
+        in parts of at most that size.
+        """
+        storage, multipart_upload = self._create_storage_with_multipart_upload()
+        storage.save('report.csv', ContentFile('x' * 25))
+
+        part_calls = multipart_upload.upload_part_from_file.call_args_list
+        self.assertEqual(
+            [(part_num, kwargs['size']) for (_, part_num), kwargs in part_calls],
+            [(1, 10), (2, 10), (3, 5)],
+        )
+        multipart_upload.complete_upload.assert_called_once_with()
+        self.assertFalse(multipart_upload.cancel_upload.called)
+
+    @patch.object(S3ReportStorage, 'MULTIPART_UPLOAD_CHUNK_SIZE', 10)
+    def test_multipart_upload_failure(self):
+        """
+        Test that a failed multipart upload is aborted.
+        """
+        storage, multipart_upload = self._create_storage_with_multipart_upload()
+        multipart_upload.upload_part_from_file.side_effect = [None, Exception('Upload failure')]
+        with self.assertRaises(Exception):
+            storage.save('report.csv', ContentFile('x' * 25))
+
+        self.assertEqual(multipart_upload.upload_part_from_file.call_count, 2)
+        self.assertFalse(multipart_upload.complete_upload.called)
+        multipart_upload.cancel_upload.assert_called_once_with()
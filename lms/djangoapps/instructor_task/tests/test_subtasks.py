@@ -1,10 +1,12 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
 from mock import Mock, patch
 
+from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskCourseTestCase
@@ -25,17 +27,20 @@ class TestSubtasks(InstructorTaskCourseTestCase):
             random_id = uuid4().hex[:8]
             self.create_student(username='student{0}'.format(random_id))
 
-    def _queue_subtasks(self, create_subtask_fcn, items_per_task, initial_count, extra_count):
-        """Queue subtasks while enrolling more students into course in the middle of the process."""
-
-        task_id = str(uuid4())
-        instructor_task = InstructorTaskFactory.create(
+    def _create_instructor_task(self):
+        """Create an InstructorTask to queue subtasks for."""
+        return InstructorTaskFactory.create(
             course_id=self.course.id,
-            task_id=task_id,
+            task_id=str(uuid4()),
             task_key='dummy_task_key',
             task_type='bulk_course_email',
         )
 
+    def _queue_subtasks(self, create_subtask_fcn, items_per_task, initial_count, extra_count):
+        """Queue subtasks while enrolling more students into course in the middle of the process."""
+
+        instructor_task = self._create_instructor_task()
+
         self._enroll_students_in_course(self.course.id, initial_count)
         task_querysets = [CourseEnrollment.objects.filter(course_id=self.course.id)]
 
@@ -79,3 +84,31 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def test_queue_subtasks_with_final_subtask(self):
+        """Test queue_subtasks_for_query() counts a final subtask, to be queued by the caller, as a subtask."""
+
+        instructor_task = self._create_instructor_task()
+        self._enroll_students_in_course(self.course.id, 4)
+        final_subtask_id = str(uuid4())
+
+        mock_create_subtask_fcn = Mock()
+        queue_subtasks_for_query(
+            entry=instructor_task,
+            action_name='action_name',
+            create_subtask_fcn=mock_create_subtask_fcn,
+            item_querysets=[CourseEnrollment.objects.filter(course_id=self.course.id)],
+            item_fields=[],
+            items_per_task=3,
+            total_num_items=4,
+            final_subtask_id=final_subtask_id,
+        )
+
+        self.assertEqual(mock_create_subtask_fcn.call_count, 2)
+        subtasks = json.loads(InstructorTask.objects.get(pk=instructor_task.id).subtasks)
+        self.assertEqual(subtasks['total'], 3)
+        self.assertIn(final_subtask_id, subtasks['status'])
+        self.assertNotIn(
+            final_subtask_id,
+            [call_args[0][1].task_id for call_args in mock_create_subtask_fcn.call_args_list],
+        )
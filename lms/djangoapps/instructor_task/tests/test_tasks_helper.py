@@ -8,14 +8,17 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 import ddt
 import unicodecsv
+from celery.states import SUCCESS
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -35,6 +38,8 @@ from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -54,6 +59,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -396,12 +402,89 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
 
         RequestCache.clear_request_cache()
 
-        expected_query_count = 41
+        expected_query_count = 43
         with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
             with check_mongo_calls(mongo_count):
                 with self.assertNumQueries(expected_query_count):
                     CourseGradeReport.generate(None, None, course.id, None, 'graded')
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report(self, _get_current_task):
+        """
+        Verifies that a grade report generated in shards, by subtasks, is
+        the same as one generated by a single task.
+        """
+        num_students = 5
+        for index in range(num_students):
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+        CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        report_path = report_store.path_to(self.course.id, report_store.links_for(self.course.id)[0][0])
+        with report_store.storage.open(report_path) as csv_file:
+            expected_rows = list(unicodecsv.reader(csv_file))
+        report_store.storage.delete(report_path)
+
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()), task_type='grade_course')
+        CourseGradeReport.generate(None, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset(
+            {'attempted': num_students, 'succeeded': num_students, 'failed': 0},
+            json.loads(entry.task_output),
+        )
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 4)  # 3 shards and the merge
+
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with report_store.storage.open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            self.assertEqual(list(unicodecsv.reader(csv_file)), expected_rows)
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report_with_failed_shard(self, _get_current_task):
+        """
+        Verifies that the users of a shard that fails unexpectedly are
+        counted as failed and listed in the error report.
+        """
+        num_students = 5
+        for index in range(num_students):
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        original_generate_shard = CourseGradeReport._generate_shard  # pylint: disable=protected-access
+
+        def _generate_shard(report, context, entry_id, shard_index, user_ids):
+            """ Fails to generate the second shard """
+            if shard_index == 1:
+                raise Exception('Shard failure')
+            return original_generate_shard(report, context, entry_id, shard_index, user_ids)
+
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()), task_type='grade_course')
+        with patch.object(CourseGradeReport, '_generate_shard', _generate_shard):
+            CourseGradeReport.generate(None, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertDictContainsSubset(
+            {'attempted': num_students, 'succeeded': num_students - 2, 'failed': 2},
+            json.loads(entry.task_output),
+        )
+
+        reports = {}
+        for filename, _ in report_store.links_for(self.course.id):
+            with report_store.storage.open(report_store.path_to(self.course.id, filename)) as csv_file:
+                reports['grade_report_err' in filename] = list(unicodecsv.reader(csv_file))
+        self.assertEqual(len(reports[False]), 1 + num_students - 2)
+        self.assertEqual(
+            [row[1:] for row in reports[True]],
+            [
+                ['Username', 'Error'],
+                ['student2', 'Grading failed: Shard failure'],
+                ['student3', 'Grading failed: Shard failure'],
+            ],
+        )
+
     def test_inactive_enrollments(self):
         """
         Test that students with inactive enrollments are included in report.
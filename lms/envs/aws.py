@@ -240,6 +240,8 @@ BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get(
     'BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS',
     BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
 )
+BULK_EMAIL_SEND_CONNECTIONS = ENV_TOKENS.get('BULK_EMAIL_SEND_CONNECTIONS', BULK_EMAIL_SEND_CONNECTIONS)
+BULK_EMAIL_MIN_SEND_INTERVAL = ENV_TOKENS.get('BULK_EMAIL_MIN_SEND_INTERVAL', BULK_EMAIL_MIN_SEND_INTERVAL)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -552,6 +554,7 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+CONTENTSERVER_LOCAL_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_LOCAL_CACHE', {}))
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -745,8 +745,7 @@ EVENT_TRACKING_BACKENDS = {
                 }
             },
             'processors': [
-                {'ENGINE': 'track.shim.LegacyFieldMappingProcessor'},
-                {'ENGINE': 'track.shim.PrefixedEventProcessor'}
+                {'ENGINE': 'track.shim.CompiledEventProcessor'}
             ]
         }
     },
@@ -830,6 +829,24 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+# Local tiers of the cache of course assets served by the contentserver, in front of
+# the "course_assets" cache and the contentstore.  Both tiers are disabled by default.
+CONTENTSERVER_LOCAL_CACHE = {
+    # Total size, in bytes, of the small assets kept in the memory of each process.
+    'MEMORY_SIZE': 0,
+    # Largest asset, in bytes, kept in memory.  Larger ones are spooled to disk.
+    'MEMORY_MAX_ITEM_SIZE': 1024 * 1024,
+    # Directory of the files of spooled assets.  None disables spooling.
+    'SPOOL_DIR': None,
+    # Total size, in bytes, of the spooled assets.
+    'SPOOL_SIZE': 10 * 1024 * 1024 * 1024,
+    # Largest asset, in bytes, spooled to disk.
+    'SPOOL_MAX_ITEM_SIZE': 512 * 1024 * 1024,
+    # Internal location of SPOOL_DIR in nginx, to serve spooled assets with X-Accel-Redirect.
+    # None serves them from the spooled files in Django.
+    'X_ACCEL_REDIRECT_PREFIX': None,
+}
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -882,6 +899,15 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of warm sandbox processes, with the assumed modules already
+    # imported, used to execute code that needs no extra files.
+    'pool': {
+        # Maximum number of sandbox processes per server process.  0 disables the pool.
+        'size': 0,
+        # How many executions before a sandbox process is replaced?
+        'max_executions': 100,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -942,6 +968,10 @@ STATICFILES_DIRS = [
     NODE_MODULES_ROOT / "@edx",
 ]
 
+# Number of seconds the text in which the static urls of course assets were replaced is
+# cached, under the version of the course assets.  0 disables the cache.
+STATIC_REPLACE_CACHE_TIMEOUT = 60 * 60 * 24
+
 FAVICON_PATH = 'images/favicon.ico'
 DEFAULT_COURSE_ABOUT_IMAGE_URL = 'images/pencils.jpg'
 
@@ -1284,6 +1314,7 @@ MIDDLEWARE_CLASSES = [
 
     'django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'util.sandboxing.ConfigureSafeExecPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -1947,6 +1978,12 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum size, in bytes of serialized data, of the process-local
+    # cache of deserialized block structures.  Only used when storage
+    # backing is enabled, since entries are keyed by the versions in
+    # storage.  A value of 0 disables the cache.
+    PROCESS_CACHE_MAX_SIZE_IN_BYTES=0,
 )
 
 ################################ Bulk Email ###################################
@@ -1993,6 +2030,14 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of connections each bulk email task sends its messages over in parallel.
+# With a single connection, messages are sent one at a time as they are rendered.
+BULK_EMAIL_SEND_CONNECTIONS = 1
+
+# Minimum delay in seconds between individual mail messages being sent by each bulk
+# email task, over all of its connections, to stay under the sending rate of the email backend.
+BULK_EMAIL_MIN_SEND_INTERVAL = 0
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
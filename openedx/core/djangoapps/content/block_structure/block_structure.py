@@ -2,6 +2,8 @@
 Module with family of classes for block structures.
     BlockStructure - responsible for block existence and relations.
     BlockStructureBlockData - responsible for block & transformer data.
+    CopyOnWriteBlockStructureBlockData - responsible for mutable views of
+        shared block structures.
     BlockStructureModulestoreData - responsible for xBlock data.
 
 The following internal data structures are implemented:
@@ -764,6 +766,130 @@ class BlockStructureBlockData(BlockStructure):
             return block_data
 
 
+class CopyOnWriteBlockStructureBlockData(BlockStructureBlockData):
+    """
+    Subclass of BlockStructureBlockData that provides a mutable view of
+    another, shared, block structure without copying it upfront.
+
+    The relations and data of a block are copied from the shared block
+    structure only when they are first updated through this view's
+    methods, so the shared block structure is never mutated.  Callers
+    must not mutate BlockData objects returned by __getitem__ directly.
+    """
+    def __init__(self, block_structure):
+        super(CopyOnWriteBlockStructureBlockData, self).__init__(block_structure.root_block_usage_key)
+        self._block_relations = dict(block_structure._block_relations)
+        self._block_data_map = dict(block_structure._block_data_map)
+        self.transformer_data = TransformerDataMap(block_structure.transformer_data.items())
+
+        # Keys of the entries that have already been copied from the
+        # shared block structure and are owned by this view.
+        self._owned_block_relations = set()
+        self._owned_block_data = set()
+        self._owned_transformer_block_data = set()
+        self._owned_transformer_data = set()
+
+    def set_root_block(self, usage_key):
+        self._own_block_relations(usage_key)
+        super(CopyOnWriteBlockStructureBlockData, self).set_root_block(usage_key)
+
+    def override_xblock_field(self, usage_key, field_name, override_data):
+        self._own_block_data(usage_key)
+        super(CopyOnWriteBlockStructureBlockData, self).override_xblock_field(usage_key, field_name, override_data)
+
+    def set_transformer_data(self, transformer, key, value):
+        transformer_name = self.transformer_data._translate_key(transformer)
+        if transformer_name not in self._owned_transformer_data and transformer_name in self.transformer_data:
+            self.transformer_data[transformer_name] = _copy_transformer_data(self.transformer_data[transformer_name])
+        self._owned_transformer_data.add(transformer_name)
+        super(CopyOnWriteBlockStructureBlockData, self).set_transformer_data(transformer, key, value)
+
+    def set_transformer_block_field(self, usage_key, transformer, key, value):
+        self._own_transformer_block_data(usage_key, transformer)
+        super(CopyOnWriteBlockStructureBlockData, self).set_transformer_block_field(usage_key, transformer, key, value)
+
+    def remove_transformer_block_field(self, usage_key, transformer, key):
+        self._own_transformer_block_data(usage_key, transformer)
+        super(CopyOnWriteBlockStructureBlockData, self).remove_transformer_block_field(usage_key, transformer, key)
+
+    def remove_block(self, usage_key, keep_descendants):
+        block_relations = self._block_relations[usage_key]
+        self._own_block_relations(usage_key, *(block_relations.children + block_relations.parents))
+        super(CopyOnWriteBlockStructureBlockData, self).remove_block(usage_key, keep_descendants)
+
+    #--- Internal methods ---#
+    # To be used within the block_structure framework or by tests.
+
+    def _prune_unreachable(self):
+        super(CopyOnWriteBlockStructureBlockData, self)._prune_unreachable()
+        # All relations are newly created when pruning.
+        self._owned_block_relations = set(self._block_relations)
+
+    def _add_relation(self, parent_key, child_key):
+        self._own_block_relations(parent_key, child_key)
+        super(CopyOnWriteBlockStructureBlockData, self)._add_relation(parent_key, child_key)
+
+    def _get_or_create_block(self, usage_key):
+        self._own_block_data(usage_key)
+        return super(CopyOnWriteBlockStructureBlockData, self)._get_or_create_block(usage_key)
+
+    def _own_block_relations(self, *usage_keys):
+        """
+        Copies the relations of the given blocks from the shared block
+        structure, if not already owned.
+        """
+        for usage_key in usage_keys:
+            if usage_key in self._owned_block_relations or usage_key not in self._block_relations:
+                continue
+            shared_relations = self._block_relations[usage_key]
+            block_relations = _BlockRelations()
+            block_relations.parents = list(shared_relations.parents)
+            block_relations.children = list(shared_relations.children)
+            self._block_relations[usage_key] = block_relations
+            self._owned_block_relations.add(usage_key)
+
+    def _own_block_data(self, usage_key):
+        """
+        Copies the BlockData of the given block from the shared block
+        structure, if not already owned.  Its transformer data entries
+        remain shared until they are owned individually.
+        """
+        if usage_key in self._owned_block_data or usage_key not in self._block_data_map:
+            return
+        shared_block_data = self._block_data_map[usage_key]
+        block_data = BlockData(shared_block_data.location)
+        block_data.fields = dict(shared_block_data.fields)
+        block_data.transformer_data = TransformerDataMap(shared_block_data.transformer_data.items())
+        self._block_data_map[usage_key] = block_data
+        self._owned_block_data.add(usage_key)
+
+    def _own_transformer_block_data(self, usage_key, transformer):
+        """
+        Copies the TransformerData of the given transformer for the
+        given block from the shared block structure, if not already
+        owned.
+        """
+        self._own_block_data(usage_key)
+        if usage_key not in self._block_data_map:
+            return
+        transformer_data_map = self._block_data_map[usage_key].transformer_data
+        transformer_name = transformer_data_map._translate_key(transformer)
+        owned_key = (usage_key, transformer_name)
+        if owned_key not in self._owned_transformer_block_data and transformer_name in transformer_data_map:
+            transformer_data_map[transformer_name] = _copy_transformer_data(transformer_data_map[transformer_name])
+        self._owned_transformer_block_data.add(owned_key)
+
+
+def _copy_transformer_data(transformer_data):
+    """
+    Returns a copy of the given TransformerData whose fields can be
+    updated independently.  The field values themselves are not copied.
+    """
+    transformer_data_copy = TransformerData()
+    transformer_data_copy.fields = dict(transformer_data.fields)
+    return transformer_data_copy
+
+
 class BlockStructureModulestoreData(BlockStructureBlockData):
     """
     Subclass of BlockStructureBlockData that is responsible for managing
@@ -0,0 +1,85 @@
+"""
+Command to compare the serialization formats of course blocks.
+"""
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+import openedx.core.djangoapps.content.block_structure.api as api
+from openedx.core.djangoapps.content.block_structure.serialization import deserialize, serialize
+from openedx.core.lib.command_utils import parse_course_keys
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_block_structure_serialization 'edX/DemoX/Demo_Course' --settings=devstack
+        $ ./manage.py lms benchmark_block_structure_serialization 'edX/DemoX/Demo_Course' --iterations 50
+    """
+    args = u'<course_id course_id ...>'
+    help = u'Compares the size and load time of the pickle and columnar formats of course blocks.'
+
+    FORMATS = (
+        (u'pickle', False),
+        (u'columnar', True),
+    )
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help=u'Benchmark the course blocks of the list of courses provided.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times each format is deserialized.',
+            default=10,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        for course_key in parse_course_keys(options['courses']):
+            block_structure = api.get_course_in_cache(course_key)
+            self.stdout.write(u'{}: {} blocks'.format(course_key, len(block_structure)))
+            for format_name, columnar in self.FORMATS:
+                results = self._benchmark(block_structure, columnar, options['iterations'])
+                self.stdout.write(
+                    u'  {format:<10} size: {size:>10} bytes, serialize: {serialize:8.2f} ms, '
+                    u'load: {load:8.2f} ms, load and read all: {load_all:8.2f} ms'.format(
+                        format=format_name, **results
+                    )
+                )
+
+    def _benchmark(self, block_structure, columnar, iterations):
+        """
+        Returns the size of the given block structure serialized in the
+        requested format, along with the average times, in milliseconds,
+        to serialize it, to deserialize it and to deserialize it and
+        read the data of all of its blocks.
+        """
+        root_block_usage_key = block_structure.root_block_usage_key
+
+        start = default_timer()
+        serialized_data = serialize(block_structure, columnar=columnar)
+        serialize_time = default_timer() - start
+
+        start = default_timer()
+        for _ in xrange(iterations):
+            deserialize(serialized_data, root_block_usage_key)
+        load_time = default_timer() - start
+
+        start = default_timer()
+        for _ in xrange(iterations):
+            for block_data in deserialize(serialized_data, root_block_usage_key).itervalues():
+                len(block_data.transformer_data)
+        load_all_time = default_timer() - start
+
+        return dict(
+            size=len(serialized_data),
+            serialize=serialize_time * 1000,
+            load=load_time * 1000 / iterations,
+            load_all=load_all_time * 1000 / iterations,
+        )
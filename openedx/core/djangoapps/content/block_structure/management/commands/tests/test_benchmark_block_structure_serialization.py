@@ -0,0 +1,27 @@
+"""
+Tests for benchmark_block_structure_serialization management command.
+"""
+from django.core.management import call_command
+from six import StringIO
+
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class TestBenchmarkBlockStructureSerialization(ModuleStoreTestCase):
+    """
+    Tests benchmark block structure serialization management command.
+    """
+    def setUp(self):
+        super(TestBenchmarkBlockStructureSerialization, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        ItemFactory.create(parent=chapter, category='sequential')
+
+    def test_reports_both_formats(self):
+        output = StringIO()
+        call_command('benchmark_block_structure_serialization', unicode(self.course.id), iterations=2, stdout=output)
+        report = output.getvalue()
+        self.assertIn(u'{}: 3 blocks'.format(self.course.id), report)
+        self.assertIn(u'pickle', report)
+        self.assertIn(u'columnar', report)
@@ -41,7 +41,10 @@ class BlockStructureManager(object):
         and modulestore, as needed.
 
         Details: Similar to the get_collected method, except the transformers'
-        transform methods are also called.
+        transform methods are also called.  When the chunked cache is
+        enabled and a starting block other than the root is requested,
+        only the chunk of the block structure containing the starting
+        block is loaded.
 
         Arguments:
             transformers (BlockStructureTransformers) - Collection of
@@ -60,7 +63,12 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        if collected_block_structure:
+            block_structure = collected_block_structure.copy()
+        elif starting_block_usage_key and starting_block_usage_key != self.root_block_usage_key:
+            block_structure = self._get_collected_subtree(starting_block_usage_key)
+        else:
+            block_structure = self.get_collected()
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
@@ -105,6 +113,22 @@ class BlockStructureManager(object):
 
         return block_structure
 
+    def _get_collected_subtree(self, starting_block_usage_key):
+        """
+        Returns the collected Block Structure for the root_block_usage_key,
+        containing at least the subtree starting at
+        starting_block_usage_key.  Falls back to the entire collected Block
+        Structure if the subtree's chunks are not available.  Chunks are
+        only cached when the block structure is stored, never from this
+        read path.
+        """
+        try:
+            block_structure = self.store.get_subtree(self.root_block_usage_key, starting_block_usage_key)
+            BlockStructureTransformers.verify_versions(block_structure)
+        except (BlockStructureNotFound, TransformerDataIncompatible):
+            block_structure = self.get_collected()
+        return block_structure
+
     def update_collected_if_needed(self):
         """
         The store is updated with newly collected transformers data from
@@ -117,17 +141,36 @@ class BlockStructureManager(object):
     def _update_collected(self):
         """
         The store is updated with newly collected transformers data from
-        the modulestore.
+        the modulestore, reusing the data of unchanged blocks from the
+        previously collected block structure when incremental collection
+        is enabled.
         """
         with self._bulk_operations():
             block_structure = BlockStructureFactory.create_from_modulestore(
                 self.root_block_usage_key,
                 self.modulestore,
             )
-            BlockStructureTransformers.collect(block_structure)
+            previous_block_structure = self._get_previous_collected()
+            if previous_block_structure is None:
+                BlockStructureTransformers.collect(block_structure)
+            else:
+                BlockStructureTransformers.collect_incrementally(block_structure, previous_block_structure)
             self.store.add(block_structure)
             return block_structure
 
+    def _get_previous_collected(self):
+        """
+        Returns the previously collected Block Structure from the store,
+        if incremental collection is enabled and one is found; returns
+        None otherwise.
+        """
+        if not config.waffle().is_enabled(config.INCREMENTAL_COLLECT):
+            return None
+        try:
+            return self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -0,0 +1,440 @@
+"""
+Module for serializing and deserializing collected BlockStructures.
+
+Two formats are supported:
+
+    * Pickle - The legacy format.  The block structure's relations,
+      transformer data and block data map are pickled and compressed
+      as a single unit.
+
+    * Columnar - A compact, versioned binary format.  Usage keys are
+      stored once in an interned key table, relations are stored as
+      integer adjacency arrays and each transformer's block data is
+      stored in its own compressed column group, which is decoded only
+      when a block's data for that transformer is first accessed.
+
+The format of previously serialized data is detected when it is
+deserialized, so both formats can be read regardless of which one is
+currently being written.
+"""
+import cPickle as pickle
+import struct
+import sys
+import zlib
+from array import array
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .factory import BlockStructureFactory
+
+
+# Leading bytes of data serialized in the columnar format.  Since zlib
+# streams never start with these bytes, data serialized in the pickle
+# format can be distinguished from it.
+COLUMNAR_MAGIC = 'BSCF'
+
+# The latest version of the columnar format.  Incrementally update this
+# value whenever the layout of the format changes.
+COLUMNAR_VERSION = 1
+
+# Header of the columnar format: magic, format version and the length of
+# the table of contents that follows it.
+_HEADER = struct.Struct('!4sHI')
+
+# Typecode of the arrays used to store block indices.
+_INDEX_TYPECODE = 'I'
+
+# Prefix of the section names for per-transformer block data columns.
+_TRANSFORMER_SECTION_PREFIX = 'transformer:'
+
+
+def serialize(block_structure, columnar=False):
+    """
+    Serializes the data for the given block_structure.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            that is to be serialized.
+
+        columnar (bool) - Whether to use the columnar format.  The
+            pickle format is used instead if the block structure
+            cannot be represented in the columnar format.
+    """
+    if columnar:
+        serialized_data = _serialize_columnar(block_structure)
+        if serialized_data is not None:
+            return serialized_data
+
+    return zpickle((
+        block_structure._block_relations,  # pylint: disable=protected-access
+        block_structure.transformer_data,
+        block_structure._block_data_map,  # pylint: disable=protected-access
+    ))
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given data, in either format, and returns the
+    parsed block_structure.
+    """
+    if is_columnar(serialized_data):
+        return _deserialize_columnar(serialized_data, root_block_usage_key)
+
+    block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+    return BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        transformer_data,
+        block_data_map,
+    )
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given data was serialized in the columnar format.
+    """
+    return serialized_data[:len(COLUMNAR_MAGIC)] == COLUMNAR_MAGIC
+
+
+class _LazyTransformerDataMap(TransformerDataMap):
+    """
+    A TransformerDataMap for a single block whose entries are decoded
+    from their transformer's column the first time they are accessed.
+
+    Any operation that needs to see all of the entries, including
+    copying and pickling, decodes all remaining columns first.  Copies
+    are plain TransformerDataMaps.
+    """
+    def __init__(self, columns):
+        super(_LazyTransformerDataMap, self).__init__()
+        self._columns = columns
+
+    def __missing__(self, key):
+        self._columns.load(key)
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._columns.load(self._translate_key(key))
+        return dict.__contains__(self, self._translate_key(key))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __reduce_ex__(self, protocol):
+        self._columns.load_all()
+        return (TransformerDataMap, (), None, None, dict.iteritems(self))
+
+
+def _load_all_before(method_name):
+    """
+    Returns a wrapper of the given dict method that decodes all
+    remaining transformer columns before delegating to it.
+    """
+    dict_method = getattr(dict, method_name)
+
+    def _method(self, *args, **kwargs):
+        self._columns.load_all()  # pylint: disable=protected-access
+        return dict_method(self, *args, **kwargs)
+    _method.__name__ = method_name
+    return _method
+
+
+for _method_name in (
+        '__iter__', '__len__', '__eq__', '__ne__', '__repr__',
+        'keys', 'values', 'items', 'iterkeys', 'itervalues', 'iteritems',
+):
+    setattr(_LazyTransformerDataMap, _method_name, _load_all_before(_method_name))
+
+
+class _TransformerColumns(object):
+    """
+    The not-yet-decoded per-transformer block data columns of a
+    deserialized block structure, shared by the lazy transformer data
+    maps of all of its blocks.
+    """
+    def __init__(self, sections, block_data_by_index):
+        # Map of a transformer's name to its encoded column.
+        # dict {string: string}
+        self._sections = sections
+
+        # Map of a block's index in the key table to its BlockData.
+        # dict {int: BlockData}
+        self._block_data_by_index = block_data_by_index
+
+    def load(self, transformer_name):
+        """
+        Decodes the column for the given transformer, if it has not
+        already been decoded, into the transformer data maps of the
+        blocks.
+        """
+        section = self._sections.pop(transformer_name, None)
+        if section is None:
+            return
+
+        present_indices, field_columns = zunpickle(section)
+        for block_index in _decode_indices(present_indices):
+            dict.__setitem__(
+                self._block_data_by_index[block_index].transformer_data,
+                transformer_name,
+                TransformerData(),
+            )
+        for field_name, (block_indices, values) in field_columns.iteritems():
+            for block_index, value in zip(_decode_indices(block_indices), values):
+                transformer_data = dict.__getitem__(
+                    self._block_data_by_index[block_index].transformer_data,
+                    transformer_name,
+                )
+                transformer_data.fields[field_name] = value
+
+    def load_all(self):
+        """
+        Decodes all remaining columns.
+        """
+        for transformer_name in self._sections.keys():
+            self.load(transformer_name)
+
+
+def _serialize_columnar(block_structure):
+    """
+    Returns the given block_structure serialized in the columnar format,
+    or None if any of its keys are not usage keys that can be
+    reconstructed from their course key, block type and block id.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    block_keys = list(block_relations)
+    block_keys.extend(key for key in block_data_map if key not in block_relations)
+    key_table = _encode_key_table(block_keys)
+    if key_table is None:
+        return None
+    block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    sections = [
+        ('keys', key_table),
+        ('relations', _encode_relations(block_keys, block_indices, block_relations)),
+        ('transformer_data', zpickle(block_structure.transformer_data)),
+    ]
+
+    block_data_indices = []
+    xblock_field_columns = {}
+    transformer_columns = {}
+    for block_key, block_data in block_data_map.iteritems():
+        block_index = block_indices[block_key]
+        block_data_indices.append(block_index)
+        _add_to_field_columns(xblock_field_columns, block_index, block_data.fields)
+        for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+            present_indices, field_columns = transformer_columns.setdefault(transformer_name, ([], {}))
+            present_indices.append(block_index)
+            _add_to_field_columns(field_columns, block_index, transformer_data.fields)
+
+    sections.append(('block_data', zpickle((
+        _encode_indices(block_data_indices),
+        _encode_field_columns(xblock_field_columns),
+    ))))
+    for transformer_name, (present_indices, field_columns) in transformer_columns.iteritems():
+        sections.append((
+            _TRANSFORMER_SECTION_PREFIX + transformer_name,
+            zpickle((_encode_indices(present_indices), _encode_field_columns(field_columns))),
+        ))
+
+    table_of_contents = pickle.dumps(
+        [(name, len(section)) for name, section in sections],
+        pickle.HIGHEST_PROTOCOL,
+    )
+    return ''.join(
+        [_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(table_of_contents)), table_of_contents] +
+        [section for _, section in sections]
+    )
+
+
+def _deserialize_columnar(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given data, serialized in the columnar format, and
+    returns the parsed block_structure.
+    """
+    sections = _split_sections(serialized_data)
+
+    block_keys = _decode_key_table(sections.pop('keys'))
+    block_relations = _decode_relations(block_keys, sections.pop('relations'))
+    transformer_data = zunpickle(sections.pop('transformer_data'))
+
+    transformer_sections = {
+        name[len(_TRANSFORMER_SECTION_PREFIX):]: section
+        for name, section in sections.iteritems()
+        if name.startswith(_TRANSFORMER_SECTION_PREFIX)
+    }
+    block_data_by_index = {}
+    columns = _TransformerColumns(transformer_sections, block_data_by_index)
+
+    block_data_indices, xblock_field_columns = zunpickle(sections['block_data'])
+    for block_index in _decode_indices(block_data_indices):
+        block_data = BlockData(block_keys[block_index])
+        block_data.transformer_data = _LazyTransformerDataMap(columns)
+        block_data_by_index[block_index] = block_data
+    for field_name, (block_indices, values) in xblock_field_columns.iteritems():
+        for block_index, value in zip(_decode_indices(block_indices), values):
+            block_data_by_index[block_index].fields[field_name] = value
+
+    return BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        transformer_data,
+        {block_data.location: block_data for block_data in block_data_by_index.itervalues()},
+    )
+
+
+def _split_sections(serialized_data):
+    """
+    Returns a map of section name to the section's (still encoded)
+    content for the given columnar data.
+    """
+    _, version, toc_length = _HEADER.unpack_from(serialized_data)
+    if version != COLUMNAR_VERSION:
+        raise ValueError('Unsupported columnar block structure format version: {}'.format(version))
+
+    offset = _HEADER.size + toc_length
+    sections = {}
+    for name, length in pickle.loads(serialized_data[_HEADER.size:offset]):
+        sections[name] = serialized_data[offset:offset + length]
+        offset += length
+    return sections
+
+
+def _encode_key_table(block_keys):
+    """
+    Returns the interned key table for the given block keys, or None if
+    any of the keys cannot be reconstructed from it.
+    """
+    course_keys, course_key_indices = [], {}
+    block_types, block_type_indices = [], {}
+    encoded_course_keys, encoded_block_types, block_ids = [], [], []
+    for block_key in block_keys:
+        try:
+            course_key, block_type, block_id = block_key.course_key, block_key.block_type, block_key.block_id
+            if course_key.make_usage_key(block_type, block_id) != block_key:
+                return None
+        except AttributeError:
+            return None
+
+        if course_key not in course_key_indices:
+            course_key_indices[course_key] = len(course_keys)
+            course_keys.append(course_key)
+        if block_type not in block_type_indices:
+            block_type_indices[block_type] = len(block_types)
+            block_types.append(block_type)
+        encoded_course_keys.append(course_key_indices[course_key])
+        encoded_block_types.append(block_type_indices[block_type])
+        block_ids.append(block_id)
+
+    return zpickle((
+        course_keys,
+        block_types,
+        _encode_indices(encoded_course_keys),
+        _encode_indices(encoded_block_types),
+        block_ids,
+    ))
+
+
+def _decode_key_table(section):
+    """
+    Returns the list of block keys in the given key table.
+    """
+    course_keys, block_types, encoded_course_keys, encoded_block_types, block_ids = zunpickle(section)
+    return [
+        course_keys[course_key_index].make_usage_key(block_types[block_type_index], block_id)
+        for course_key_index, block_type_index, block_id in zip(
+            _decode_indices(encoded_course_keys),
+            _decode_indices(encoded_block_types),
+            block_ids,
+        )
+    ]
+
+
+def _encode_relations(block_keys, block_indices, block_relations):
+    """
+    Returns the adjacency arrays, of both children and parents, for the
+    given block relations.
+    """
+    encoded = []
+    for relation in ('children', 'parents'):
+        offsets, indices = [0], []
+        for block_key in block_keys:
+            relations = getattr(block_relations[block_key], relation) if block_key in block_relations else []
+            indices.extend(block_indices[related_key] for related_key in relations)
+            offsets.append(len(indices))
+        encoded.extend([_encode_indices(offsets), _encode_indices(indices)])
+    return zpickle(tuple(encoded))
+
+
+def _decode_relations(block_keys, section):
+    """
+    Returns the map of block key to _BlockRelations for the given
+    adjacency arrays.
+    """
+    children_offsets, children_indices, parents_offsets, parents_indices = [
+        _decode_indices(encoded) for encoded in zunpickle(section)
+    ]
+
+    block_relations = {}
+    for block_index in xrange(len(children_offsets) - 1):
+        relations = _BlockRelations()
+        relations.children = [
+            block_keys[child_index]
+            for child_index in children_indices[children_offsets[block_index]:children_offsets[block_index + 1]]
+        ]
+        relations.parents = [
+            block_keys[parent_index]
+            for parent_index in parents_indices[parents_offsets[block_index]:parents_offsets[block_index + 1]]
+        ]
+        block_relations[block_keys[block_index]] = relations
+    return block_relations
+
+
+def _add_to_field_columns(field_columns, block_index, fields):
+    """
+    Adds the given block's fields to the given map of field name to
+    its (block indices, values) column.
+    """
+    for field_name, value in fields.iteritems():
+        block_indices, values = field_columns.setdefault(field_name, ([], []))
+        block_indices.append(block_index)
+        values.append(value)
+
+
+def _encode_field_columns(field_columns):
+    """
+    Returns the given field columns with their block indices encoded.
+    """
+    return {
+        field_name: (_encode_indices(block_indices), values)
+        for field_name, (block_indices, values) in field_columns.iteritems()
+    }
+
+
+def _encode_indices(indices):
+    """
+    Returns the given list of integers as a little-endian byte string.
+    """
+    encoded = array(_INDEX_TYPECODE, indices)
+    if sys.byteorder != 'little':
+        encoded.byteswap()
+    return encoded.tostring()
+
+
+def _decode_indices(encoded):
+    """
+    Returns the array of integers in the given little-endian byte string.
+    """
+    decoded = array(_INDEX_TYPECODE)
+    decoded.fromstring(encoded)
+    if sys.byteorder != 'little':
+        decoded.byteswap()
+    return decoded
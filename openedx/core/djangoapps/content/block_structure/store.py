@@ -3,14 +3,18 @@ Module for the Storage of BlockStructure objects.
 """
 # pylint: disable=protected-access
 from logging import getLogger
+from uuid import uuid4
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from django.conf import settings
+
+from openedx.core.djangoapps import monitoring_utils
+from openedx.core.lib.cache_utils import SizeBoundedLRUCache, memoized, zpickle, zunpickle
 
 from . import config
-from .block_structure import BlockStructureBlockData
+from .block_structure import BlockStructureBlockData, CopyOnWriteBlockStructureBlockData
 from .exceptions import BlockStructureNotFound
-from .factory import BlockStructureFactory
 from .models import BlockStructureModel
+from .serialization import deserialize, serialize
 from .transformer_registry import TransformerRegistry
 
 
@@ -65,12 +69,74 @@ class BlockStructureStore(object):
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        if _is_chunked_cache_enabled():
+            self._add_chunks_to_cache(block_structure, bs_model)
+
+    def get_subtree(self, root_block_usage_key, starting_block_usage_key):
+        """
+        Deserializes and returns the part of the block structure starting
+        at root_block_usage_key that is needed to transform the subtree
+        starting at starting_block_usage_key, if its chunks are found in
+        the cache.
+
+        The returned block structure contains the root block, its
+        children and all of the structure-level transformer data, along
+        with all the blocks of the chunk that contains
+        starting_block_usage_key.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the
+                root of the block structure.
+
+            starting_block_usage_key (UsageKey) - The usage_key for the
+                root of the requested subtree.
+
+        Raises:
+            BlockStructureNotFound if the chunked cache is disabled, or
+            the chunks are not found in the cache.
+        """
+        if not _is_chunked_cache_enabled():
+            raise BlockStructureNotFound(root_block_usage_key)
+
+        bs_model = self._get_model(root_block_usage_key)
+        root_cache_key = self._encode_root_cache_key(bs_model)
+        serialized_root_chunk = self._cache.get(_chunk_cache_key(root_cache_key, u'root'))
+        if not serialized_root_chunk:
+            logger.info("BlockStructure: Chunks not found in cache; %s.", bs_model)
+            raise BlockStructureNotFound(bs_model.data_usage_key)
+
+        chunks_version, chunk_index, serialized_root_structure = zunpickle(serialized_root_chunk)
+        block_structure = self._deserialize(serialized_root_structure, root_block_usage_key)
+        chunk_root_id = chunk_index.get(unicode(starting_block_usage_key))
+        if chunk_root_id is None:
+            return block_structure
+
+        serialized_chunk = self._cache.get(_chunk_cache_key(root_cache_key, chunks_version, chunk_root_id))
+        if not serialized_chunk:
+            logger.info("BlockStructure: Chunk not found in cache; %s, chunk: %s.", bs_model, chunk_root_id)
+            raise BlockStructureNotFound(bs_model.data_usage_key)
+
+        logger.info(
+            "BlockStructure: Read chunk from cache; %s, chunk: %s, size: %d",
+            bs_model, chunk_root_id, len(serialized_chunk),
+        )
+        chunk_root_key = next(
+            child_key for child_key in block_structure.get_children(root_block_usage_key)
+            if unicode(child_key) == chunk_root_id
+        )
+        _merge_chunk(block_structure, self._deserialize(serialized_chunk, chunk_root_key))
+        return block_structure
 
     def get(self, root_block_usage_key):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key, if found in the cache or storage.
 
+        When storage backing is enabled, deserialized block structures
+        are also kept in a process-local cache keyed by their versions,
+        in which case a copy-on-write view of the cached block structure
+        is returned.
+
         The given root_block_usage_key must equate the
         root_block_usage_key previously passed to the `add` method.
 
@@ -89,13 +155,20 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
 
+        block_structure = self._get_from_process_cache(bs_model)
+        if block_structure is not None:
+            return CopyOnWriteBlockStructureBlockData(block_structure)
+
         try:
             serialized_data = self._get_from_cache(bs_model)
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if self._add_to_process_cache(block_structure, serialized_data, bs_model):
+            return CopyOnWriteBlockStructureBlockData(block_structure)
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -107,7 +180,11 @@ class BlockStructureStore(object):
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
+        if _is_storage_backing_enabled():
+            get_process_cache().delete(self._encode_root_cache_key(bs_model))
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        if _is_chunked_cache_enabled():
+            self._cache.delete(_chunk_cache_key(self._encode_root_cache_key(bs_model), u'root'))
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -177,6 +254,78 @@ class BlockStructureStore(object):
             logger.info("BlockStructure: Read from cache; %s, size: %d", bs_model, len(serialized_data))
         return serialized_data
 
+    def _add_chunks_to_cache(self, block_structure, bs_model):
+        """
+        Adds the chunks of the given block_structure for the given
+        BlockStructureModel to the cache.
+
+        Chunk cache keys include a version that is unique to this call,
+        so that chunks of different versions of the block structure are
+        never combined.
+        """
+        root_cache_key = self._encode_root_cache_key(bs_model)
+        chunks_version = uuid4().hex
+        timeout = config.cache_timeout_in_seconds()
+
+        chunk_index = {}
+        root_key = block_structure.root_block_usage_key
+        for chunk_root_key in block_structure.get_children(root_key):
+            chunk_structure = _create_chunk(block_structure, chunk_root_key)
+            for block_key in chunk_structure:
+                chunk_index.setdefault(unicode(block_key), unicode(chunk_root_key))
+            self._cache.set(
+                _chunk_cache_key(root_cache_key, chunks_version, unicode(chunk_root_key)),
+                self._serialize(chunk_structure),
+                timeout=timeout,
+            )
+
+        # The root chunk is added last, so that it never refers to
+        # chunks that have not yet been added.
+        serialized_root_chunk = zpickle((
+            chunks_version,
+            chunk_index,
+            self._serialize(_create_root_chunk(block_structure)),
+        ))
+        self._cache.set(_chunk_cache_key(root_cache_key, u'root'), serialized_root_chunk, timeout=timeout)
+        logger.info(
+            "BlockStructure: Added chunks to cache; %s, chunks: %d, root chunk size: %d",
+            bs_model, len(block_structure.get_children(root_key)), len(serialized_root_chunk),
+        )
+
+    def _get_from_process_cache(self, bs_model):
+        """
+        Returns the deserialized block structure for the given
+        BlockStructureModel from the process-local cache, or None if
+        not found.
+        """
+        process_cache = get_process_cache()
+        if not _is_storage_backing_enabled() or not process_cache.max_size_in_bytes:
+            return None
+
+        block_structure = process_cache.get(self._encode_root_cache_key(bs_model))
+        if block_structure is None:
+            monitoring_utils.increment('block_structure.process_cache.miss')
+        else:
+            monitoring_utils.increment('block_structure.process_cache.hit')
+            logger.info("BlockStructure: Read from process cache; %s, stats: %s", bs_model, process_cache.stats())
+        return block_structure
+
+    def _add_to_process_cache(self, block_structure, serialized_data, bs_model):
+        """
+        Adds the given deserialized block_structure for the given
+        BlockStructureModel to the process-local cache, approximating
+        its size by the size of its serialized_data.
+
+        Returns whether the block structure was cached.
+        """
+        process_cache = get_process_cache()
+        if not _is_storage_backing_enabled() or not process_cache.max_size_in_bytes:
+            return False
+
+        cache_key = self._encode_root_cache_key(bs_model)
+        process_cache.set(cache_key, block_structure, len(serialized_data))
+        return cache_key in process_cache
+
     def _get_from_store(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -193,24 +342,13 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        return zpickle(data_to_cache)
+        return serialize(block_structure, columnar=_is_columnar_serialization_enabled())
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
         """
-        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
-        return BlockStructureFactory.create_new(
-            root_block_usage_key,
-            block_relations,
-            transformer_data,
-            block_data_map,
-        )
+        return deserialize(serialized_data, root_block_usage_key)
 
     @staticmethod
     def _encode_root_cache_key(bs_model):
@@ -251,8 +389,92 @@ class BlockStructureStore(object):
         }
 
 
+def _create_chunk(block_structure, chunk_root_key):
+    """
+    Returns a new block structure, starting at chunk_root_key, with the
+    relations and block data of the given block_structure's subtree for
+    that block.  Block data is shared with the given block_structure.
+    """
+    # pylint: disable=protected-access
+    chunk_structure = BlockStructureBlockData(chunk_root_key)
+    for block_key in block_structure.topological_traversal(start_node=chunk_root_key):
+        for child_key in block_structure.get_children(block_key):
+            chunk_structure._add_relation(block_key, child_key)
+    for block_key in chunk_structure:
+        if block_key in block_structure._block_data_map:
+            chunk_structure._block_data_map[block_key] = block_structure[block_key]
+    return chunk_structure
+
+
+def _create_root_chunk(block_structure):
+    """
+    Returns a new block structure with the root block of the given
+    block_structure, its children and all of its structure-level
+    transformer data.
+    """
+    # pylint: disable=protected-access
+    root_key = block_structure.root_block_usage_key
+    root_chunk = BlockStructureBlockData(root_key)
+    root_chunk.transformer_data = block_structure.transformer_data
+    for child_key in block_structure.get_children(root_key):
+        root_chunk._add_relation(root_key, child_key)
+    for block_key in root_chunk:
+        if block_key in block_structure._block_data_map:
+            root_chunk._block_data_map[block_key] = block_structure[block_key]
+    return root_chunk
+
+
+def _merge_chunk(block_structure, chunk_structure):
+    """
+    Merges the relations and block data of the given chunk_structure
+    into the given block_structure, deserialized from a root chunk.
+    """
+    # pylint: disable=protected-access
+    chunk_root_key = chunk_structure.root_block_usage_key
+    for block_key in chunk_structure:
+        if block_key == chunk_root_key:
+            block_structure._block_relations[block_key].children = chunk_structure.get_children(block_key)
+        else:
+            block_structure._block_relations[block_key] = chunk_structure._block_relations[block_key]
+    block_structure._block_data_map.update(chunk_structure._block_data_map)
+
+
+def _chunk_cache_key(root_cache_key, *parts):
+    """
+    Returns the cache key of the chunk identified by the given parts
+    for the block structure with the given root cache key.
+    """
+    return u'.'.join((root_cache_key, u'chunk') + parts)
+
+
+@memoized
+def get_process_cache():
+    """
+    Returns the process-local cache of deserialized block structures,
+    bounded by the PROCESS_CACHE_MAX_SIZE_IN_BYTES block structures
+    setting.  Its stats() can be used to tune the size against the
+    memory available to each worker.
+    """
+    return SizeBoundedLRUCache(settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_MAX_SIZE_IN_BYTES', 0))
+
+
 def _is_storage_backing_enabled():
     """
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_columnar_serialization_enabled():
+    """
+    Returns whether Block Structures are to be serialized in the
+    columnar format.
+    """
+    return config.waffle().is_enabled(config.COLUMNAR_SERIALIZATION)
+
+
+def _is_chunked_cache_enabled():
+    """
+    Returns whether Block Structures are also cached in chunks.
+    """
+    return config.waffle().is_enabled(config.CHUNKED_CACHE)
@@ -12,7 +12,7 @@ from unittest import TestCase
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData
+from ..block_structure import BlockStructure, BlockStructureModulestoreData, CopyOnWriteBlockStructureBlockData
 from ..exceptions import TransformerException
 from .helpers import MockXBlock, MockTransformer, ChildrenMapTestMixin
 
@@ -308,3 +308,36 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEquals(_get_value(block_structure), 'edit1')
         self.assertEquals(_get_value(new_copy), 'edit2')
+
+    def test_copy_on_write(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure._get_or_create_block(block).display_name = 'original_value'
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', 'original_value')
+        block_structure.set_transformer_data('transformer', 'test_key', 'original_value')
+
+        view = CopyOnWriteBlockStructureBlockData(block_structure)
+        view.set_root_block(1)
+        view.remove_block(3, keep_descendants=True)
+        view.override_xblock_field(4, 'display_name', 'edit')
+        view.set_transformer_block_field(4, 'transformer', 'test_key', 'edit')
+        view.remove_transformer_block_field(1, 'transformer', 'test_key')
+        view.set_transformer_data('transformer', 'test_key', 'edit')
+        view._prune_unreachable()
+
+        # verify edits to the view
+        self.assert_block_structure(view, [[], [4], [], [], []], missing_blocks=[0, 2, 3])
+        self.assertEquals(view.get_xblock_field(4, 'display_name'), 'edit')
+        self.assertEquals(view.get_transformer_block_field(4, 'transformer', 'test_key'), 'edit')
+        self.assertIsNone(view.get_transformer_block_field(1, 'transformer', 'test_key'))
+        self.assertEquals(view.get_transformer_data('transformer', 'test_key'), 'edit')
+
+        # verify the shared block structure is unchanged
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            self.assertEquals(block_structure.get_xblock_field(block, 'display_name'), 'original_value')
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block, 'transformer', 'test_key'),
+                'original_value',
+            )
+        self.assertEquals(block_structure.get_transformer_data('transformer', 'test_key'), 'original_value')
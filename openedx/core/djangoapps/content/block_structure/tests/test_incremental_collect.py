@@ -0,0 +1,170 @@
+"""
+Tests for incremental collection in transformers.py
+
+The tests compare the results of incremental and full collects of the
+same modified block structures.
+"""
+# pylint: disable=protected-access
+import ddt
+from mock import patch
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from ..factory import BlockStructureFactory
+from ..transformers import BlockStructureTransformers, UPDATE_VERSION_FIELD
+from .helpers import ChildrenMapTestMixin, MockModulestoreFactory, MockTransformer, mock_registered_transformers
+
+
+class MockIncrementalTransformer(MockTransformer):
+    """
+    A mock transformer that supports incremental collection, percolating
+    a field down from each block's ancestors.
+    """
+    SUPPORTS_INCREMENTAL_COLLECT = True
+    collected_block_keys = []
+
+    @classmethod
+    def collect(cls, block_structure):
+        block_structure.request_xblock_fields('value')
+        block_structure.set_transformer_data(cls, 'root_value', block_structure.get_xblock(0).value)
+        for block_key in block_structure.topological_traversal():
+            cls.collected_block_keys.append(block_key)
+            merged_value = block_structure.get_xblock(block_key).value + sum(
+                block_structure.get_transformer_block_field(parent_key, cls, 'merged_value')
+                for parent_key in block_structure.get_parents(block_key)
+            )
+            block_structure.set_transformer_block_field(block_key, cls, 'merged_value', merged_value)
+
+
+class MockAggregatingTransformer(MockTransformer):
+    """
+    A mock transformer that does not support incremental collection,
+    aggregating a field up from each block's descendants.
+    """
+    @classmethod
+    def collect(cls, block_structure):
+        for block_key in block_structure.post_order_traversal():
+            num_descendants = sum(
+                block_structure.get_transformer_block_field(child_key, cls, 'num_descendants') + 1
+                for child_key in block_structure.get_children(block_key)
+            )
+            block_structure.set_transformer_block_field(block_key, cls, 'num_descendants', num_descendants)
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestIncrementalCollect(ChildrenMapTestMixin, TestCase):
+    """
+    Correctness harness comparing incremental and full collects.
+    """
+    TRANSFORMERS = [MockIncrementalTransformer, MockAggregatingTransformer]
+
+    def setUp(self):
+        super(TestIncrementalCollect, self).setUp()
+        MockIncrementalTransformer.collected_block_keys = []
+
+    def create_modulestore(self, children_map):
+        """
+        Returns a mock modulestore for the given children_map, with a
+        value and an update_version set for each block.
+        """
+        modulestore = MockModulestoreFactory.create(children_map, self.block_key_factory)
+        for block_key, xblock in modulestore.blocks.iteritems():
+            xblock.field_map.update(value=block_key, update_version=0)
+        return modulestore
+
+    def collect(self, modulestore, previous_block_structure=None):
+        """
+        Collects and returns the block structure in the given modulestore,
+        incrementally if a previous_block_structure is given.
+        """
+        block_structure = BlockStructureFactory.create_from_modulestore(0, modulestore)
+        with mock_registered_transformers(self.TRANSFORMERS):
+            if previous_block_structure is None:
+                BlockStructureTransformers.collect(block_structure)
+            else:
+                BlockStructureTransformers.collect_incrementally(block_structure, previous_block_structure)
+        return block_structure
+
+    def assert_equivalent(self, incremental_block_structure, full_block_structure):
+        """
+        Verifies that the given block structures contain the same
+        collected data.
+        """
+        self.assertEquals(set(incremental_block_structure), set(full_block_structure))
+        for transformer in self.TRANSFORMERS:
+            self.assertEquals(
+                incremental_block_structure.transformer_data[transformer].fields,
+                full_block_structure.transformer_data[transformer].fields,
+            )
+        for block_key in full_block_structure:
+            self.assertEquals(incremental_block_structure[block_key].fields, full_block_structure[block_key].fields)
+            for transformer in self.TRANSFORMERS:
+                self.assertEquals(
+                    incremental_block_structure.get_transformer_block_data(block_key, transformer).fields,
+                    full_block_structure.get_transformer_block_data(block_key, transformer).fields,
+                )
+
+    def update_block(self, modulestore, block_key, **fields):
+        """
+        Updates the given fields of the given block in the modulestore,
+        along with its update_version.
+        """
+        field_map = modulestore.blocks[block_key].field_map
+        field_map.update(fields)
+        field_map[UPDATE_VERSION_FIELD] += 1
+
+    @ddt.data(
+        # (children_map, changed block, expected re-collected blocks)
+        (ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, 4, {0, 1, 4}),
+        (ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, 1, {0, 1, 3, 4}),
+        (ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, 0, {0, 1, 2, 3, 4}),
+        (ChildrenMapTestMixin.DAG_CHILDREN_MAP, 2, {0, 1, 2, 3, 4, 5, 6}),
+        (ChildrenMapTestMixin.DAG_CHILDREN_MAP, 5, {0, 1, 2, 3, 5}),
+    )
+    @ddt.unpack
+    def test_changed_field(self, children_map, changed_block, expected_collected_blocks):
+        modulestore = self.create_modulestore(children_map)
+        previous_block_structure = self.collect(modulestore)
+
+        self.update_block(modulestore, changed_block, value=100)
+        MockIncrementalTransformer.collected_block_keys = []
+        incremental_block_structure = self.collect(modulestore, previous_block_structure)
+        self.assertEquals(set(MockIncrementalTransformer.collected_block_keys), expected_collected_blocks)
+
+        self.assert_equivalent(incremental_block_structure, self.collect(modulestore))
+
+    def test_moved_block(self):
+        modulestore = self.create_modulestore(self.SIMPLE_CHILDREN_MAP)
+        previous_block_structure = self.collect(modulestore)
+
+        # move block 4 from block 1 to block 2
+        modulestore.blocks[1].children.remove(4)
+        modulestore.blocks[2].children.append(4)
+        self.update_block(modulestore, 1)
+        self.update_block(modulestore, 2)
+
+        self.assert_equivalent(self.collect(modulestore, previous_block_structure), self.collect(modulestore))
+
+    def test_unknown_update_version(self):
+        modulestore = self.create_modulestore(self.SIMPLE_CHILDREN_MAP)
+        previous_block_structure = self.collect(modulestore)
+
+        del modulestore.blocks[3].field_map[UPDATE_VERSION_FIELD]
+        modulestore.blocks[3].field_map['value'] = 100
+        MockIncrementalTransformer.collected_block_keys = []
+        incremental_block_structure = self.collect(modulestore, previous_block_structure)
+        self.assertEquals(set(MockIncrementalTransformer.collected_block_keys), {0, 1, 3})
+
+        self.assert_equivalent(incremental_block_structure, self.collect(modulestore))
+
+    def test_outdated_transformer_version(self):
+        modulestore = self.create_modulestore(self.SIMPLE_CHILDREN_MAP)
+        previous_block_structure = self.collect(modulestore)
+
+        MockIncrementalTransformer.collected_block_keys = []
+        with patch.object(MockIncrementalTransformer, 'WRITE_VERSION', MockIncrementalTransformer.WRITE_VERSION + 1):
+            incremental_block_structure = self.collect(modulestore, previous_block_structure)
+            full_block_structure = self.collect(modulestore)
+        self.assertEquals(set(MockIncrementalTransformer.collected_block_keys), {0, 1, 2, 3, 4})
+        self.assert_equivalent(incremental_block_structure, full_block_structure)
@@ -6,7 +6,7 @@ from django.test import TestCase
 from nose.plugins.attrib import attr
 
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import CHUNKED_CACHE, RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
 from ..exceptions import UsageKeyNotInBlockStructure, BlockStructureNotFound
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
@@ -143,6 +143,62 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
+    @ddt.data(True, False)
+    def test_get_transformed_from_chunks(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(CHUNKED_CACHE, active=True):
+                with mock_registered_transformers(self.registered_transformers):
+                    self.bs_manager.get_collected()
+
+                    # remove the entire block structure from the cache,
+                    # leaving only its chunks
+                    store = self.bs_manager.store
+                    full_cache_key = store._encode_root_cache_key(  # pylint: disable=protected-access
+                        store._get_model(self.block_key_factory(0))  # pylint: disable=protected-access
+                    )
+                    self.cache.delete(full_cache_key)
+                    self.modulestore.get_items_call_count = 0
+
+                    block_structure = self.bs_manager.get_transformed(
+                        self.transformers,
+                        starting_block_usage_key=self.block_key_factory(1),
+                    )
+
+        self.assertEquals(self.modulestore.get_items_call_count, 0)
+        self.assertNotIn(full_cache_key, self.cache.map)
+        substructure_of_children_map = [[], [3, 4], [], [], []]
+        self.assert_block_structure(block_structure, substructure_of_children_map, missing_blocks=[0, 2])
+        TestTransformer1.assert_collected(block_structure)
+        TestTransformer1.assert_transformed(block_structure)
+
+    def test_get_transformed_without_chunks(self):
+        with waffle().override(CHUNKED_CACHE, active=True):
+            with mock_registered_transformers(self.registered_transformers):
+                self.bs_manager.get_collected()
+
+                # remove the chunks from the cache, leaving only the
+                # entire block structure
+                chunk_keys = [key for key in self.cache.map if u'.chunk.' in key]
+                self.assertTrue(chunk_keys)
+                for key in chunk_keys:
+                    self.cache.delete(key)
+                self.modulestore.get_items_call_count = 0
+                self.cache.set_call_count = 0
+
+                block_structure = self.bs_manager.get_transformed(
+                    self.transformers,
+                    starting_block_usage_key=self.block_key_factory(1),
+                )
+
+        # the read path falls back to the entire block structure
+        # without caching its chunks again
+        self.assertEquals(self.modulestore.get_items_call_count, 0)
+        self.assertEquals(self.cache.set_call_count, 0)
+        self.assertFalse([key for key in self.cache.map if u'.chunk.' in key])
+        substructure_of_children_map = [[], [3, 4], [], [], []]
+        self.assert_block_structure(block_structure, substructure_of_children_map, missing_blocks=[0, 2])
+        TestTransformer1.assert_transformed(block_structure)
+
     def test_get_transformed_with_collected(self):
         with mock_registered_transformers(self.registered_transformers):
             collected_block_structure = self.bs_manager.get_collected()
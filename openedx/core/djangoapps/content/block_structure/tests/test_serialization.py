@@ -0,0 +1,119 @@
+"""
+Tests for block_structure/serialization.py
+"""
+# pylint: disable=protected-access
+import cPickle as pickle
+
+import ddt
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from ..block_structure import BlockStructureBlockData, TransformerDataMap
+from ..serialization import deserialize, is_columnar, serialize
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+class MockOtherTransformer(MockTransformer):
+    """
+    A second mock transformer, with its own column of block data.
+    """
+    pass
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestColumnarSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar serialization format.
+    """
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map, with
+        mock xBlock fields and transformer data collected for each block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_structure._get_or_create_block(block_key).display_name = u'Block {}'.format(block_id)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'index', block_id)
+            if block_id % 2:
+                block_structure.set_transformer_block_field(block_key, MockOtherTransformer, 'odd', True)
+        return block_structure
+
+    def assert_collected_data(self, block_structure, children_map):
+        """
+        Verifies the data set by create_collected_structure.
+        """
+        self.assertEquals(block_structure._get_transformer_data_version(MockTransformer), MockTransformer.WRITE_VERSION)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_id))
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'index'),
+                block_id,
+            )
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block_key, MockOtherTransformer, 'odd', False),
+                bool(block_id % 2),
+            )
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_structure(children_map)
+        serialized_data = serialize(block_structure, columnar=True)
+        self.assertTrue(is_columnar(serialized_data))
+
+        deserialized = deserialize(serialized_data, block_structure.root_block_usage_key)
+        self.assert_block_structure(deserialized, children_map)
+        self.assert_collected_data(deserialized, children_map)
+        for block_key in block_structure:
+            self.assertEquals(deserialized.get_children(block_key), block_structure.get_children(block_key))
+            self.assertEquals(deserialized.get_parents(block_key), block_structure.get_parents(block_key))
+
+    def test_lazy_transformer_columns(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = deserialize(serialize(block_structure, columnar=True), block_structure.root_block_usage_key)
+
+        columns = deserialized[self.block_key_factory(0)].transformer_data._columns
+        self.assertItemsEqual(columns._sections, [MockTransformer.name(), MockOtherTransformer.name()])
+        deserialized.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'index')
+        self.assertItemsEqual(columns._sections, [MockOtherTransformer.name()])
+
+    def test_copy_and_pickle(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = deserialize(serialize(block_structure, columnar=True), block_structure.root_block_usage_key)
+
+        copied = deserialized.copy()
+        self.assertIs(type(copied[self.block_key_factory(1)].transformer_data), TransformerDataMap)
+        self.assert_collected_data(copied, self.SIMPLE_CHILDREN_MAP)
+
+        unpickled_block_data_map = pickle.loads(pickle.dumps(deserialized._block_data_map))
+        self.assertTrue(unpickled_block_data_map[self.block_key_factory(1)].transformer_data[MockOtherTransformer].odd)
+
+    def test_pickle_format(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = serialize(block_structure)
+        self.assertFalse(is_columnar(serialized_data))
+
+        deserialized = deserialize(serialized_data, block_structure.root_block_usage_key)
+        self.assert_block_structure(deserialized, self.SIMPLE_CHILDREN_MAP)
+        self.assert_collected_data(deserialized, self.SIMPLE_CHILDREN_MAP)
+
+
+@attr(shard=2)
+class TestColumnarSerializationFallback(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for block structures that cannot be serialized in the
+    columnar format.
+    """
+    def test_non_usage_keys(self):
+        # block keys in this test case are integers
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP, BlockStructureBlockData)
+        serialized_data = serialize(block_structure, columnar=True)
+        self.assertFalse(is_columnar(serialized_data))
+        self.assert_block_structure(deserialize(serialized_data, 0), self.SIMPLE_CHILDREN_MAP)
@@ -1,15 +1,20 @@
 """
 Tests for block_structure/cache.py
 """
+import itertools
+
 import ddt
+from django.conf import settings
+from django.test.utils import override_settings
 from nose.plugins.attrib import attr
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import CHUNKED_CACHE, COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..block_structure import CopyOnWriteBlockStructureBlockData
+from ..store import BlockStructureStore, get_process_cache
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
 
@@ -51,13 +56,19 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             with self.assertRaises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
-    @ddt.data(True, False)
-    def test_add_and_get(self, with_storage_backing):
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_add_and_get(self, with_storage_backing, with_columnar_serialization):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
-            self.store.add(self.block_structure)
-            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            with waffle().override(COLUMNAR_SERIALIZATION, active=with_columnar_serialization):
+                self.store.add(self.block_structure)
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
             self.assertIsNotNone(stored_value)
             self.assert_block_structure(stored_value, self.children_map)
+            self.assertEquals(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                '{} val'.format(MockTransformer.name()),
+            )
 
     @ddt.data(True, False)
     def test_delete(self, with_storage_backing):
@@ -90,3 +101,58 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.assertEquals(self.mock_cache.timeout_from_last_call, 0)
         self.store.add(self.block_structure)
         self.assertEquals(self.mock_cache.timeout_from_last_call, timeout)
+
+    @ddt.data(True, False)
+    def test_process_cache(self, with_storage_backing):
+        get_process_cache.cache.clear()
+        self.addCleanup(get_process_cache.cache.clear)
+        block_settings = dict(settings.BLOCK_STRUCTURES_SETTINGS, PROCESS_CACHE_MAX_SIZE_IN_BYTES=1024 * 1024)
+        with override_settings(BLOCK_STRUCTURES_SETTINGS=block_settings):
+            with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.mock_cache.map.clear()
+                if with_storage_backing:
+                    second_value = self.store.get(self.block_structure.root_block_usage_key)
+                    self.assertIsInstance(second_value, CopyOnWriteBlockStructureBlockData)
+                    self.assert_block_structure(second_value, self.children_map)
+
+                    first_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+                    third_value = self.store.get(self.block_structure.root_block_usage_key)
+                    self.assert_block_structure(third_value, self.children_map)
+                    self.assertEquals(get_process_cache().stats()['hits'], 2)
+
+                    self.store.delete(self.block_structure.root_block_usage_key)
+                    self.assertEquals(len(get_process_cache()), 0)
+                else:
+                    self.assertNotIsInstance(first_value, CopyOnWriteBlockStructureBlockData)
+                    self.assertEquals(len(get_process_cache()), 0)
+
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_get_subtree(self, with_storage_backing, with_columnar_serialization):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COLUMNAR_SERIALIZATION, active=with_columnar_serialization):
+                with waffle().override(CHUNKED_CACHE, active=True):
+                    self.store.add(self.block_structure)
+                    subtree = self.store.get_subtree(self.block_key_factory(0), self.block_key_factory(3))
+
+        # only the root, its children and the chunk of block 1 are loaded
+        self.assert_block_structure(subtree, [[1, 2], [3, 4], [], [], []])
+        self.assertEquals(
+            subtree.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+            '{} val'.format(MockTransformer.name()),
+        )
+        self.assertEquals(
+            subtree._get_transformer_data_version(MockTransformer),  # pylint: disable=protected-access
+            MockTransformer.WRITE_VERSION,
+        )
+
+    def test_get_subtree_not_found(self):
+        self.store.add(self.block_structure)
+        with self.assertRaises(BlockStructureNotFound):
+            self.store.get_subtree(self.block_key_factory(0), self.block_key_factory(3))
+
+        with waffle().override(CHUNKED_CACHE, active=True):
+            with self.assertRaises(BlockStructureNotFound):
+                self.store.get_subtree(self.block_key_factory(0), self.block_key_factory(3))
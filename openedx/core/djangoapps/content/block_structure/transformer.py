@@ -55,6 +55,21 @@ class BlockStructureTransformer(object):
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # A transformer can set SUPPORTS_INCREMENTAL_COLLECT to True if the
+    # data it collects for a block depends only on that block and its
+    # ancestors, and its structure-level data depends only on the root
+    # block.  For example, data that is percolated down from ancestors
+    # qualifies, while data that is aggregated up from descendants does
+    # not.
+    #
+    # When a published course is re-collected incrementally, such a
+    # transformer's collect method is called with a block structure that
+    # contains only the changed blocks, their descendants and all of
+    # their ancestors.  Collected data for the remaining blocks is
+    # reused from the previously collected block structure.
+    #
+    SUPPORTS_INCREMENTAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
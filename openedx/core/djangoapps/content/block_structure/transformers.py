@@ -4,6 +4,7 @@ Module for a collection of BlockStructureTransformers.
 import functools
 from logging import getLogger
 
+from .block_structure import BlockStructureModulestoreData
 from .exceptions import TransformerException, TransformerDataIncompatible
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
@@ -12,6 +13,13 @@ from .transformer_registry import TransformerRegistry
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+# The name of the xBlock field that holds the version of the course
+# structure in which a block was last updated.  It is collected for
+# every block so changed blocks can be found when re-collecting
+# incrementally.
+UPDATE_VERSION_FIELD = 'update_version'
+
+
 class BlockStructureTransformers(object):
     """
     The BlockStructureTransformers class encapsulates an ordered list of block
@@ -80,8 +88,129 @@ class BlockStructureTransformers(object):
             transformer.collect(block_structure)
 
         # Collect all fields that were requested by the transformers.
+        block_structure.request_xblock_fields(UPDATE_VERSION_FIELD)
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def collect_incrementally(cls, block_structure, previous_block_structure):
+        """
+        Collects data for each registered transformer, reusing data from
+        the given previously collected block structure for blocks that
+        have not changed since it was collected.
+
+        Only transformers that support incremental collection and whose
+        data in the previous block structure is of their current
+        WRITE_VERSION are collected incrementally.  All other
+        transformers are collected on the entire block structure.
+
+        Blocks are considered changed if their update_version, parents or
+        children differ from the previous block structure, or if their
+        update_version is unknown.  Data is re-collected for all changed
+        blocks and their descendants.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - The block
+                structure to collect data for.
+
+            previous_block_structure (BlockStructureBlockData) - The block
+                structure previously collected for the same root block.
+        """
+        # pylint: disable=protected-access
+        changed_block_keys = cls._find_changed_blocks(block_structure, previous_block_structure)
+        dirty_block_keys = cls._with_descendants(block_structure, changed_block_keys)
+        substructure = cls._create_substructure(block_structure, dirty_block_keys)
+        logger.info(
+            'BlockStructure: Collecting incrementally; %s, changed blocks: %d, re-collected blocks: %d, total: %d.',
+            block_structure.root_block_usage_key,
+            len(changed_block_keys),
+            len(dirty_block_keys),
+            len(block_structure),
+        )
+
+        for transformer in TransformerRegistry.get_registered_transformers():
+            block_structure._add_transformer(transformer)
+            if (
+                    not transformer.SUPPORTS_INCREMENTAL_COLLECT or
+                    previous_block_structure._get_transformer_data_version(transformer) != transformer.WRITE_VERSION
+            ):
+                transformer.collect(block_structure)
+                continue
+
+            substructure._add_transformer(transformer)
+            transformer.collect(substructure)
+            block_structure.transformer_data[transformer] = substructure.transformer_data[transformer]
+            for block_key in block_structure:
+                source = substructure if block_key in dirty_block_keys else previous_block_structure
+                try:
+                    transformer_block_data = source.get_transformer_block_data(block_key, transformer)
+                except KeyError:
+                    continue
+                block_structure._get_or_create_block(block_key).transformer_data[transformer] = transformer_block_data
+
+        # Collect all fields that were requested by the transformers.
+        block_structure.request_xblock_fields(UPDATE_VERSION_FIELD, *substructure._requested_xblock_fields)
+        block_structure._collect_requested_xblock_fields()
+
+    @staticmethod
+    def _find_changed_blocks(block_structure, previous_block_structure):
+        """
+        Returns the set of keys of the blocks in the given block_structure
+        that have changed since the previous_block_structure was
+        collected.
+        """
+        changed_block_keys = set()
+        for block_key in block_structure:
+            update_version = getattr(block_structure.get_xblock(block_key), UPDATE_VERSION_FIELD, None)
+            if (
+                    update_version is None or
+                    block_key not in previous_block_structure or
+                    previous_block_structure.get_xblock_field(block_key, UPDATE_VERSION_FIELD) != update_version or
+                    previous_block_structure.get_children(block_key) != block_structure.get_children(block_key) or
+                    previous_block_structure.get_parents(block_key) != block_structure.get_parents(block_key)
+            ):
+                changed_block_keys.add(block_key)
+        return changed_block_keys
+
+    @staticmethod
+    def _with_descendants(block_structure, block_keys):
+        """
+        Returns the set of the given block keys along with the keys of
+        all of their descendants in the given block_structure.
+        """
+        result = set()
+        stack = list(block_keys)
+        while stack:
+            block_key = stack.pop()
+            if block_key not in result:
+                result.add(block_key)
+                stack.extend(block_structure.get_children(block_key))
+        return result
+
+    @staticmethod
+    def _create_substructure(block_structure, block_keys):
+        """
+        Returns a new BlockStructureModulestoreData, with the same root
+        and xBlocks as the given block_structure, that contains only the
+        blocks with the given keys and all of their ancestors, including
+        the root block.
+        """
+        # pylint: disable=protected-access
+        included = set()
+        stack = list(block_keys) + [block_structure.root_block_usage_key]
+        while stack:
+            block_key = stack.pop()
+            if block_key not in included:
+                included.add(block_key)
+                stack.extend(block_structure.get_parents(block_key))
+
+        substructure = BlockStructureModulestoreData(block_structure.root_block_usage_key)
+        for block_key in included:
+            substructure._add_xblock(block_key, block_structure.get_xblock(block_key))
+            for child_key in block_structure.get_children(block_key):
+                if child_key in included:
+                    substructure._add_relation(block_key, child_key)
+        return substructure
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -5,15 +5,20 @@ from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContent
+from xmodule.contentstore.versioning import get_course_assets_version
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
+# The versions of the course assets are kept in the same cache.
 CONTENT_CACHE = caches['default']
 try:
     CONTENT_CACHE = caches['course_assets']
 except InvalidCacheBackendError:
     pass
 
+# Seconds for which content which was not found is remembered.
+NOT_FOUND_CACHE_TIMEOUT = 60
+
 
 def set_cached_content(content):
     """
@@ -29,10 +34,74 @@ def get_cached_content(location):
     return CONTENT_CACHE.get(unicode(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
 
 
+def _versioned_key(location, name):
+    """
+    Returns the cache key of the named value about the content at the given location,
+    under the current version of the assets of its course, or None if versions are not
+    available. The assets of a course get a new version on every change made to them
+    through the contentstore, so values cached under an older version are never used.
+    """
+    version = get_course_assets_version(location.course_key)
+    if version is None:
+        return None
+    return u'{}#{}.{}'.format(unicode(location), name, version).encode("utf-8")
+
+
+def set_cached_content_metadata(content):
+    """
+    Stores the metadata of the given piece of content, without its data, in the cache,
+    under its location and the version of the assets of its course.
+    """
+    key = _versioned_key(content.location, 'metadata')
+    if key is None:
+        return
+    metadata = StaticContent(
+        content.location, content.name, content.content_type, None,
+        last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+        import_path=content.import_path, length=content.length, locked=content.locked,
+        content_digest=content.content_digest,
+    )
+    CONTENT_CACHE.set(key, metadata, version=STATIC_CONTENT_VERSION)
+
+
+def get_cached_content_metadata(location):
+    """
+    Retrieves the metadata of the given piece of content by its location if cached
+    for the current version of the assets of its course, as a StaticContent without data.
+    """
+    key = _versioned_key(location, 'metadata')
+    if key is None:
+        return None
+    return CONTENT_CACHE.get(key, version=STATIC_CONTENT_VERSION)
+
+
+def set_cached_content_not_found(location):
+    """
+    Records for a short while that there is no content at the given location, in the
+    current version of the assets of its course.
+    """
+    key = _versioned_key(location, 'not_found')
+    if key is not None:
+        CONTENT_CACHE.set(key, True, NOT_FOUND_CACHE_TIMEOUT, version=STATIC_CONTENT_VERSION)
+
+
+def is_cached_content_not_found(location):
+    """
+    Returns whether it was recently recorded that there is no content at the given
+    location, in the current version of the assets of its course.
+    """
+    key = _versioned_key(location, 'not_found')
+    if key is None:
+        return False
+    return CONTENT_CACHE.get(key, False, version=STATIC_CONTENT_VERSION)
+
+
 def del_cached_content(location):
     """
     Delete content for the given location, as well versions of the content without a run.
 
+    Its metadata is cached under the version of the course assets, which changes with it.
+
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
     """
@@ -0,0 +1,337 @@
+"""
+Local tiers of the cache of course assets, in front of the "course_assets"
+cache and the contentstore.
+
+Small assets are kept in the memory of each process, up to a total size.
+Larger assets are spooled to a directory on the local disk, in the background
+while their first response is streamed from the contentstore, and are then
+served from there without being read into memory. Both tiers are keyed by the
+digest of the contents of the assets, so they never serve outdated contents:
+the other metadata of an asset, including its current digest, comes from the
+"course_assets" cache, which is invalidated when the asset changes.
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'MEMORY_SIZE': 0,
+    'MEMORY_MAX_ITEM_SIZE': 1024 * 1024,
+    'SPOOL_DIR': None,
+    'SPOOL_SIZE': 10 * 1024 * 1024 * 1024,
+    'SPOOL_MAX_ITEM_SIZE': 512 * 1024 * 1024,
+    'X_ACCEL_REDIRECT_PREFIX': None,
+}
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class SpooledStaticContent(StaticContentStream):
+    """
+    An asset served from the file it was spooled to.
+    """
+    def __init__(self, metadata, path, stream):
+        super(SpooledStaticContent, self).__init__(
+            metadata.location, metadata.name, metadata.content_type, stream,
+            last_modified_at=metadata.last_modified_at, thumbnail_location=metadata.thumbnail_location,
+            import_path=metadata.import_path, length=metadata.length, locked=metadata.locked,
+            content_digest=metadata.content_digest,
+        )
+        self.path = path
+        self.spooled_file = stream
+
+
+class MemoryAssetCache(object):
+    """
+    The contents of the most recently used assets, up to `max_size` bytes in
+    total, by digest.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        """
+        Returns the contents with the given digest, or None.
+        """
+        with self._lock:
+            data = self._data.pop(digest, None)
+            if data is not None:
+                self._data[digest] = data
+            return data
+
+    def set(self, digest, data):
+        """
+        Stores the contents with the given digest, evicting the least recently
+        used ones as needed.
+        """
+        if len(data) > self.max_size:
+            return
+        with self._lock:
+            previous = self._data.pop(digest, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._data[digest] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class DiskAssetCache(object):
+    """
+    Files with the contents of the most recently used assets, up to `max_size`
+    bytes in total, named after their digests. The directory can be shared by
+    several processes.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self._stored_since_eviction = 0
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get_path(self, digest):
+        """
+        Returns the path of the file of the contents with the given digest.
+        """
+        return os.path.join(self.directory, digest)
+
+    def open(self, digest, length):
+        """
+        Returns the opened file of the contents with the given digest and
+        length, or None.
+        """
+        path = self.get_path(digest)
+        try:
+            spooled_file = open(path, 'rb')
+        except IOError:
+            return None
+        if os.fstat(spooled_file.fileno()).st_size != length:
+            spooled_file.close()
+            return None
+        # Mark the file as recently used, for eviction.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return spooled_file
+
+    def store(self, digest, chunks):
+        """
+        Writes the given chunks of the contents with the given digest to their
+        file, and returns its path, or None if they could not be written.
+        """
+        path = self.get_path(digest)
+        size = 0
+        try:
+            temp_file = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.', delete=False)
+        except (IOError, OSError):
+            log.exception(u'Could not spool the asset with digest %s', digest)
+            return None
+        try:
+            with temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            # Renaming is atomic, so other processes never see a partial file.
+            os.rename(temp_file.name, path)
+        except (IOError, OSError):
+            log.exception(u'Could not spool the asset with digest %s', digest)
+            try:
+                os.remove(temp_file.name)
+            except OSError:
+                pass
+            return None
+
+        with self._lock:
+            self._stored_since_eviction += size
+            evict = self._stored_since_eviction > self.max_size / 10
+            if evict:
+                self._stored_since_eviction = 0
+        if evict:
+            self.evict()
+        return path
+
+    def evict(self):
+        """
+        Removes the least recently used files until their total size is under
+        `max_size` bytes.
+        """
+        files = []
+        for filename in os.listdir(self.directory):
+            if not DIGEST_RE.match(filename):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, filename))
+
+        total_size = sum(size for _, size, _ in files)
+        for _, size, filename in sorted(files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+            total_size -= size
+
+
+class LocalAssetCache(object):
+    """
+    The memory and disk tiers, as configured by the CONTENTSERVER_LOCAL_CACHE setting.
+    """
+    def __init__(self, config):
+        self.config = dict(DEFAULT_SETTINGS, **config)
+        self.memory = None
+        if self.config['MEMORY_SIZE'] > 0:
+            self.memory = MemoryAssetCache(self.config['MEMORY_SIZE'])
+        self.disk = None
+        if self.config['SPOOL_DIR']:
+            self.disk = DiskAssetCache(self.config['SPOOL_DIR'], self.config['SPOOL_SIZE'])
+        # The threads spooling assets, by digest.
+        self._spooling = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """
+        Returns whether any of the tiers is enabled.
+        """
+        return self.memory is not None or self.disk is not None
+
+    @property
+    def x_accel_redirect_prefix(self):
+        """
+        Returns the internal location of the spool directory in the front-end
+        server, to which serving spooled assets is delegated, or None.
+        """
+        return self.config['X_ACCEL_REDIRECT_PREFIX']
+
+    def get(self, metadata):
+        """
+        Returns the tier and the asset with the given metadata, with its
+        contents from the tier that has them, or (None, None).
+        """
+        digest = metadata.content_digest
+        if not digest or not DIGEST_RE.match(digest) or metadata.length is None:
+            return None, None
+
+        if self.memory is not None and metadata.length <= self.config['MEMORY_MAX_ITEM_SIZE']:
+            data = self.memory.get(digest)
+            if data is not None:
+                return 'memory', _with_data(metadata, data)
+
+        if self.disk is not None and metadata.length > self.config['MEMORY_MAX_ITEM_SIZE']:
+            spooled_file = self.disk.open(digest, metadata.length)
+            if spooled_file is not None:
+                return 'disk', SpooledStaticContent(metadata, self.disk.get_path(digest), spooled_file)
+
+        return None, None
+
+    def add(self, content):
+        """
+        Stores the given asset in the tier for its size, and returns the asset
+        to serve. Assets for the disk tier are spooled in the background, by a
+        single thread per asset, while the given asset is served.
+        """
+        digest = content.content_digest
+        if not digest or not DIGEST_RE.match(digest) or content.length is None:
+            return content
+
+        if content.length <= self.config['MEMORY_MAX_ITEM_SIZE']:
+            if self.memory is not None:
+                data = content.data
+                if data is None:
+                    content = content.copy_to_in_mem()
+                    data = content.data
+                self.memory.set(digest, data)
+        elif self.disk is not None and content.length <= self.config['SPOOL_MAX_ITEM_SIZE']:
+            with self._lock:
+                if digest in self._spooling:
+                    return content
+                thread = threading.Thread(target=self._spool, args=(content,), name='contentserver.local_cache')
+                thread.daemon = True
+                self._spooling[digest] = thread
+            thread.start()
+        return content
+
+    def wait(self, timeout=None):
+        """
+        Waits for the assets being spooled to be stored, for up to `timeout`
+        seconds each.
+        """
+        with self._lock:
+            threads = self._spooling.values()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _spool(self, content):
+        """
+        Stores the contents of the given asset in the disk tier, reading them
+        from their own stream from the contentstore, as the given asset is
+        being served.
+        """
+        digest = content.content_digest
+        try:
+            spooled_file = self.disk.open(digest, content.length)
+            if spooled_file is not None:
+                # Already spooled by another process.
+                spooled_file.close()
+            elif content.data is not None:
+                self.disk.store(digest, [content.data])
+            else:
+                stream = AssetManager.find(content.location, as_stream=True)
+                try:
+                    if stream.content_digest == digest:
+                        self.disk.store(digest, stream.stream_data())
+                finally:
+                    stream.close()
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Could not spool the asset with digest %s', digest)
+        finally:
+            with self._lock:
+                del self._spooling[digest]
+
+
+def _with_data(metadata, data):
+    """
+    Returns the asset with the given metadata and contents.
+    """
+    return StaticContent(
+        metadata.location, metadata.name, metadata.content_type, data,
+        last_modified_at=metadata.last_modified_at, thumbnail_location=metadata.thumbnail_location,
+        import_path=metadata.import_path, length=metadata.length, locked=metadata.locked,
+        content_digest=metadata.content_digest,
+    )
+
+
+_LOCAL_CACHE = None
+_LOCAL_CACHE_LOCK = threading.Lock()
+
+
+def get_local_asset_cache():
+    """
+    Returns the LocalAssetCache for the current settings.
+    """
+    global _LOCAL_CACHE  # pylint: disable=global-statement
+    config = getattr(settings, 'CONTENTSERVER_LOCAL_CACHE', {})
+    with _LOCAL_CACHE_LOCK:
+        if _LOCAL_CACHE is None or _LOCAL_CACHE.config != dict(DEFAULT_SETTINGS, **config):
+            _LOCAL_CACHE = LocalAssetCache(config)
+        return _LOCAL_CACHE
@@ -9,19 +9,25 @@ try:
     import newrelic.agent
 except ImportError:
     newrelic = None  # pylint: disable=invalid-name
+from dogapi import dog_stats_api
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
     HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
 from six import text_type
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
+from xmodule.contentstore.manifest import get_course_asset_manifest
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    get_cached_content, get_cached_content_metadata, is_cached_content_not_found, set_cached_content,
+    set_cached_content_metadata, set_cached_content_not_found
+)
+from .local_cache import SpooledStaticContent, get_local_asset_cache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -68,12 +74,13 @@ class StaticContentServer(object):
             except (InvalidLocationError, InvalidKeyError):
                 return HttpResponseBadRequest()
 
-            # Attempt to load the asset to make sure it exists, and grab the asset digest
-            # if we're able to load it.
+            # Attempt to load the metadata of the asset to make sure it exists, and grab
+            # the asset digest if we're able to load it.  The asset bytes are only read
+            # once we know we have to send them.
             actual_digest = None
             try:
-                content = self.load_asset_from_location(loc)
-                actual_digest = getattr(content, "content_digest", None)
+                metadata = self.load_asset_metadata(loc)
+                actual_digest = getattr(metadata, "content_digest", None)
             except (ItemNotFoundError, NotFoundError):
                 return HttpResponseNotFound()
 
@@ -100,21 +107,27 @@ class StaticContentServer(object):
                 newrelic.agent.add_custom_parameter('contentserver.from_cdn', is_from_cdn)
 
                 # Check if this content is locked or not.
-                locked = self.is_content_locked(content)
+                locked = self.is_content_locked(metadata)
                 newrelic.agent.add_custom_parameter('contentserver.locked', locked)
 
             # Check that user has access to the content.
-            if not self.is_user_authorized(request, content, loc):
+            if not self.is_user_authorized(request, metadata, loc):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+            last_modified_at_str = metadata.last_modified_at.strftime(HTTP_DATE_FORMAT)
             if 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # We're sending a body, so load the asset itself.
+            try:
+                content = self.load_asset_from_location(loc, metadata)
+            except (ItemNotFoundError, NotFoundError):
+                return HttpResponseNotFound()
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
@@ -124,7 +137,7 @@ class StaticContentServer(object):
             response = None
             if request.META.get('HTTP_RANGE'):
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
+                if not isinstance(content, StaticContentStream):
                     content = AssetManager.find(loc, as_stream=True)
 
                 header_value = request.META['HTTP_RANGE']
@@ -169,8 +182,13 @@ class StaticContentServer(object):
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
-                response['Content-Length'] = content.length
+                if isinstance(content, SpooledStaticContent):
+                    response = self.spooled_file_response(content)
+                else:
+                    response = HttpResponse(content.stream_data())
+                    response['Content-Length'] = content.length
+            elif isinstance(content, SpooledStaticContent):
+                content.close()
 
             if newrelic:
                 newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
@@ -267,19 +285,85 @@ class StaticContentServer(object):
 
         return True
 
-    def load_asset_from_location(self, location):
+    def spooled_file_response(self, content):
+        """
+        Returns a response serving the file of the given spooled asset, without
+        reading it into memory: either delegated to the front-end server with
+        X-Accel-Redirect, if configured, or streamed from the file.
+        """
+        x_accel_redirect_prefix = get_local_asset_cache().x_accel_redirect_prefix
+        if x_accel_redirect_prefix:
+            content.close()
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = '{}/{}'.format(x_accel_redirect_prefix.rstrip('/'), content.content_digest)
+        else:
+            response = FileResponse(content.spooled_file)
+            response['Content-Length'] = content.length
+        return response
+
+    def load_asset_metadata(self, location):
+        """
+        Loads the metadata of an asset based on its location, as a StaticContent
+        without data, either retrieving it from the cache or reading it from the
+        contentstore without reading the asset bytes.
+        """
+        metadata = get_cached_content_metadata(location)
+        if metadata is not None:
+            dog_stats_api.increment('contentserver.metadata_load', tags=[u'source:cache'])
+            return metadata
+
+        # Repeated requests for assets which are not in the manifest of the course
+        # assets, if available, are answered without querying the contentstore. The
+        # manifest may be out of date, e.g. if the version of the course assets was
+        # evicted from the cache, so it is checked against the contentstore first,
+        # and the assets it misses are only remembered as not found for a short while.
+        manifest = get_course_asset_manifest(location.course_key)
+        missing_from_manifest = manifest is not None and manifest.get(location) is None
+        if missing_from_manifest and is_cached_content_not_found(location):
+            dog_stats_api.increment('contentserver.metadata_load', tags=[u'source:manifest'])
+            self.record_asset_load('not_found')
+            raise NotFoundError(location)
+
+        try:
+            metadata = AssetManager.find_metadata(location)
+        except (ItemNotFoundError, NotFoundError):
+            if missing_from_manifest:
+                set_cached_content_not_found(location)
+            self.record_asset_load('not_found')
+            raise
+        dog_stats_api.increment('contentserver.metadata_load', tags=[u'source:contentstore'])
+        set_cached_content_metadata(metadata)
+        return metadata
+
+    def load_asset_from_location(self, location, metadata=None):
         """
         Loads an asset based on its location, either retrieving it from a cache
         or loading it directly from the contentstore.
+
+        `metadata` is the current metadata of the asset, if already loaded.
         """
+        local_cache = get_local_asset_cache()
+
+        # See if the local cache has the current contents of this item.
+        if local_cache.enabled:
+            if metadata is None:
+                metadata = get_cached_content_metadata(location)
+            if metadata is not None:
+                tier, content = local_cache.get(metadata)
+                if content is not None:
+                    self.record_asset_load(tier)
+                    return content
 
         # See if we can load this item from cache.
+        tier = 'cache'
         content = get_cached_content(location)
         if content is None:
             # Not in cache, so just try and load it from the asset manager.
+            tier = 'contentstore'
             try:
                 content = AssetManager.find(location, as_stream=True)
             except (ItemNotFoundError, NotFoundError):
+                self.record_asset_load('not_found')
                 raise
 
             # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
@@ -289,7 +373,20 @@ class StaticContentServer(object):
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
 
-        return content
+        self.record_asset_load(tier)
+        if not local_cache.enabled:
+            return content
+        if metadata is None:
+            set_cached_content_metadata(content)
+        return local_cache.add(content)
+
+    def record_asset_load(self, tier):
+        """
+        Records which cache tier, if any, an asset was loaded from.
+        """
+        if newrelic:
+            newrelic.agent.add_custom_parameter('contentserver.tier', tier)
+        dog_stats_api.increment('contentserver.asset_load', tags=[u'tier:{}'.format(tier)])
 
 
 def parse_range_header(header_value, content_length):
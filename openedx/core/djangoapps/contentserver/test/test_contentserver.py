@@ -6,10 +6,13 @@ import copy
 import datetime
 import ddt
 import logging
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -17,6 +20,8 @@ from mock import patch
 
 from xmodule.contentstore.django import contentstore
 from xmodule.contentstore.content import StaticContent, VERSIONED_ASSETS_PREFIX
+from xmodule.contentstore.manifest import CourseAssetManifest
+from xmodule.contentstore.versioning import update_course_assets_version
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_course_from_xml
@@ -27,6 +32,8 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
+from .. import caching
+from ..local_cache import get_local_asset_cache
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -402,6 +409,157 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         is_from_cdn = StaticContentServer.is_cdn_request(browser_request)
         self.assertEqual(is_from_cdn, True)
 
+    def test_not_modified_does_not_read_asset(self):
+        """
+        Test that conditional requests for unchanged assets are answered from
+        the metadata of the asset, without reading the asset itself.
+        """
+        resp = self.client.get(self.url_unlocked)
+        with patch.object(AssetManager, 'find') as mock_find:
+            resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(mock_find.called)
+
+    def test_unauthorized_does_not_read_asset(self):
+        """
+        Test that requests for locked assets by unauthorized users are refused
+        without reading the asset itself.
+        """
+        self.client.logout()
+        with patch.object(AssetManager, 'find') as mock_find:
+            resp = self.client.get(self.url_locked)
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(mock_find.called)
+
+    def use_content_cache(self):
+        """
+        Sets up an actual asset cache, in which the versions of the course assets
+        are kept too.
+        """
+        content_cache = LocMemCache('content_cache_test', {})
+        content_cache.clear()
+        for patcher in (
+            patch('xmodule.contentstore.versioning.get_cache', return_value=content_cache),
+            patch.object(caching, 'CONTENT_CACHE', content_cache),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_metadata_follows_asset_changes(self):
+        """
+        Test that the cached metadata of an asset is not used once the asset
+        changes, e.g. when it gets locked.
+        """
+        self.use_content_cache()
+        self.client.logout()
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+
+        self.contentstore.set_attr(self.unlocked_asset, 'locked', True)
+        self.addCleanup(self.contentstore.set_attr, self.unlocked_asset, 'locked', False)
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 403)
+
+    def test_missing_asset_answered_from_manifest(self):
+        """
+        Test that repeated requests for assets which don't exist are answered
+        from the manifest of the course assets, without querying the contentstore.
+        """
+        self.use_content_cache()
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+
+        missing_url = unicode(self.course_key.make_asset_key('asset', 'no_such_file.txt'))
+        resp = self.client.get(missing_url)
+        self.assertEqual(resp.status_code, 404)
+        with patch.object(AssetManager, 'find_metadata') as mock_find_metadata:
+            resp = self.client.get(missing_url)
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(mock_find_metadata.called)
+
+    def test_asset_missing_from_stale_manifest(self):
+        """
+        Test that assets which are missing from an out of date manifest of the
+        course assets are looked up in the contentstore.
+        """
+        self.use_content_cache()
+        with patch('openedx.core.djangoapps.contentserver.middleware.get_course_asset_manifest') as mock_manifest:
+            mock_manifest.return_value = CourseAssetManifest({})
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+
+    def use_local_asset_cache(self):
+        """
+        Sets up a spool directory and an actual shared asset cache, and returns
+        the spool directory and the contents of the unlocked asset.
+        """
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        self.use_content_cache()
+        return spool_dir, self.contentstore.find(self.unlocked_asset).data
+
+    def get_with_tiers(self, url, **kwargs):
+        """
+        Returns the response to the request of the given asset url, and the
+        tiers the asset was loaded from.
+        """
+        with patch.object(StaticContentServer, 'record_asset_load') as mock_record_asset_load:
+            resp = self.client.get(url, **kwargs)
+        return resp, [call_args[0][0] for call_args in mock_record_asset_load.call_args_list]
+
+    def test_memory_tier(self):
+        _, contents = self.use_local_asset_cache()
+        with self.settings(CONTENTSERVER_LOCAL_CACHE={'MEMORY_SIZE': 1024 * 1024}):
+            resp, tiers = self.get_with_tiers(self.url_unlocked)
+            self.assertEqual(tiers, ['contentstore'])
+            resp, tiers = self.get_with_tiers(self.url_unlocked)
+            self.assertEqual(tiers, ['memory'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, contents)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+    def test_local_tiers_follow_invalidation(self):
+        self.use_local_asset_cache()
+        with self.settings(CONTENTSERVER_LOCAL_CACHE={'MEMORY_SIZE': 1024 * 1024}):
+            self.get_with_tiers(self.url_unlocked)
+            # As done by the contentstore when the asset is saved again.
+            update_course_assets_version(self.course_key)
+            _, tiers = self.get_with_tiers(self.url_unlocked)
+        self.assertEqual(tiers, ['contentstore'])
+
+    def test_disk_tier(self):
+        spool_dir, contents = self.use_local_asset_cache()
+        with self.settings(CONTENTSERVER_LOCAL_CACHE={'MEMORY_MAX_ITEM_SIZE': 0, 'SPOOL_DIR': spool_dir}):
+            resp, tiers = self.get_with_tiers(self.url_unlocked)
+            self.assertEqual(tiers, ['contentstore'])
+            self.assertEqual(''.join(resp.streaming_content), contents)
+            get_local_asset_cache().wait()
+
+            resp, tiers = self.get_with_tiers(self.url_unlocked)
+            self.assertEqual(tiers, ['disk'])
+            self.assertEqual(''.join(resp.streaming_content), contents)
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+            resp, tiers = self.get_with_tiers(self.url_unlocked, HTTP_RANGE='bytes=1-4')
+            self.assertEqual(tiers, ['disk'])
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, contents[1:5])
+
+    def test_x_accel_redirect(self):
+        spool_dir, _ = self.use_local_asset_cache()
+        local_cache_settings = {
+            'MEMORY_MAX_ITEM_SIZE': 0,
+            'SPOOL_DIR': spool_dir,
+            'X_ACCEL_REDIRECT_PREFIX': '/spooled-assets/',
+        }
+        with self.settings(CONTENTSERVER_LOCAL_CACHE=local_cache_settings):
+            self.client.get(self.url_unlocked)
+            get_local_asset_cache().wait()
+            resp = self.client.get(self.url_unlocked)
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        self.assertEqual(resp['X-Accel-Redirect'], '/spooled-assets/{}'.format(digest))
+        self.assertEqual(resp.content, '')
+
 
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
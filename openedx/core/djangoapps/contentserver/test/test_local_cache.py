@@ -0,0 +1,153 @@
+"""
+Tests for the local tiers of the asset cache.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from StringIO import StringIO
+
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+from ..local_cache import DiskAssetCache, LocalAssetCache, MemoryAssetCache, SpooledStaticContent
+
+DIGEST_A = 'a' * 32
+DIGEST_B = 'b' * 32
+DIGEST_C = 'c' * 32
+
+
+class MemoryAssetCacheTest(unittest.TestCase):
+    """
+    Tests for MemoryAssetCache.
+    """
+    def test_evicts_least_recently_used(self):
+        cache = MemoryAssetCache(10)
+        cache.set(DIGEST_A, 'aaaa')
+        cache.set(DIGEST_B, 'bbbb')
+        self.assertEqual(cache.get(DIGEST_A), 'aaaa')
+
+        cache.set(DIGEST_C, 'cccc')
+        self.assertIsNone(cache.get(DIGEST_B))
+        self.assertEqual(cache.get(DIGEST_A), 'aaaa')
+        self.assertEqual(cache.get(DIGEST_C), 'cccc')
+        self.assertEqual(cache.size, 8)
+
+    def test_too_large(self):
+        cache = MemoryAssetCache(10)
+        cache.set(DIGEST_A, 'a' * 11)
+        self.assertIsNone(cache.get(DIGEST_A))
+        self.assertEqual(cache.size, 0)
+
+
+class DiskAssetCacheTest(unittest.TestCase):
+    """
+    Tests for DiskAssetCache.
+    """
+    def setUp(self):
+        super(DiskAssetCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_store_and_open(self):
+        cache = DiskAssetCache(self.directory, 100)
+        self.assertIsNone(cache.open(DIGEST_A, 6))
+        path = cache.store(DIGEST_A, ['abc', 'def'])
+        self.assertEqual(path, os.path.join(self.directory, DIGEST_A))
+        with cache.open(DIGEST_A, 6) as spooled_file:
+            self.assertEqual(spooled_file.read(), 'abcdef')
+        # A file of the wrong length is ignored.
+        self.assertIsNone(cache.open(DIGEST_A, 7))
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskAssetCache(self.directory, 10)
+        cache.store(DIGEST_A, ['aaaa'])
+        os.utime(cache.get_path(DIGEST_A), (1, 1))
+        cache.store(DIGEST_B, ['bbbb'])
+        cache.store(DIGEST_C, ['cccc'])
+        self.assertIsNone(cache.open(DIGEST_A, 4))
+        self.assertIsNotNone(cache.open(DIGEST_B, 4))
+        self.assertIsNotNone(cache.open(DIGEST_C, 4))
+
+
+class LocalAssetCacheTest(unittest.TestCase):
+    """
+    Tests for LocalAssetCache.
+    """
+    def setUp(self):
+        super(LocalAssetCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = LocalAssetCache({'MEMORY_SIZE': 100, 'MEMORY_MAX_ITEM_SIZE': 10, 'SPOOL_DIR': self.directory})
+        self.location = CourseLocator('org', 'course', 'run').make_asset_key('asset', 'file.txt')
+
+    def create_content(self, data, digest, as_stream=False):
+        """
+        Returns an asset with the given contents and digest.
+        """
+        if as_stream:
+            return StaticContentStream(
+                self.location, 'file.txt', 'text/plain', StringIO(data), length=len(data), content_digest=digest
+            )
+        return StaticContent(self.location, 'file.txt', 'text/plain', data, length=len(data), content_digest=digest)
+
+    def create_metadata(self, length, digest):
+        """
+        Returns the metadata of an asset of the given length and digest, as
+        cached in the "course_assets" cache.
+        """
+        return StaticContent(self.location, 'file.txt', 'text/plain', None, length=length, content_digest=digest)
+
+    def test_small_asset(self):
+        content = self.create_content('small', DIGEST_A, as_stream=True)
+        self.assertEqual(self.cache.get(content), (None, None))
+        self.assertEqual(self.cache.add(content).data, 'small')
+
+        tier, cached_content = self.cache.get(self.create_metadata(5, DIGEST_A))
+        self.assertEqual(tier, 'memory')
+        self.assertEqual(cached_content.data, 'small')
+        self.assertEqual(cached_content.location, self.location)
+
+    def test_large_asset(self):
+        content = self.create_content('large asset', DIGEST_A, as_stream=True)
+        stream = self.create_content('large asset', DIGEST_A, as_stream=True)
+        with patch.object(AssetManager, 'find', return_value=stream) as mock_find:
+            # The asset is served from the contentstore while it is spooled.
+            self.assertIs(self.cache.add(content), content)
+            self.cache.wait()
+        mock_find.assert_called_once_with(self.location, as_stream=True)
+        self.assertEqual(''.join(content.stream_data()), 'large asset')
+
+        tier, cached_content = self.cache.get(self.create_metadata(11, DIGEST_A))
+        self.assertIsInstance(cached_content, SpooledStaticContent)
+        self.assertEqual(tier, 'disk')
+        self.assertEqual(''.join(cached_content.stream_data_in_range(6, 10)), 'asset')
+        cached_content.close()
+
+    def test_large_asset_spooled_once(self):
+        spooling = threading.Event()
+        release = threading.Event()
+
+        def find(location, as_stream):  # pylint: disable=unused-argument
+            """Blocks until released, as a slow read of the contentstore."""
+            spooling.set()
+            release.wait(5)
+            return self.create_content('large asset', DIGEST_A, as_stream=True)
+
+        with patch.object(AssetManager, 'find', side_effect=find) as mock_find:
+            self.cache.add(self.create_content('large asset', DIGEST_A, as_stream=True))
+            self.assertTrue(spooling.wait(5))
+            self.cache.add(self.create_content('large asset', DIGEST_A, as_stream=True))
+            release.set()
+            self.cache.wait()
+        self.assertEqual(mock_find.call_count, 1)
+        self.assertEqual(self.cache.get(self.create_metadata(11, DIGEST_A))[0], 'disk')
+
+    def test_without_digest(self):
+        content = self.create_content('small', None)
+        self.assertIs(self.cache.add(content), content)
+        self.assertEqual(self.cache.get(content), (None, None))
@@ -4,6 +4,7 @@ Utilities related to caching.
 import collections
 import cPickle as pickle
 import functools
+import threading
 import zlib
 
 from xblock.core import XBlock
@@ -84,6 +85,99 @@ class memoized(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class SizeBoundedLRUCache(object):
+    """
+    A process-local, least-recently-used cache whose entries are bounded
+    by the sum of their approximate sizes in bytes, as given by the
+    caller when each entry is set.
+
+    WARNING: Only cache values that are immutable or that are never
+    mutated by their readers, since the same object is returned to all
+    readers within the process.
+    """
+    def __init__(self, max_size_in_bytes):
+        """
+        Arguments:
+            max_size_in_bytes (int) - The maximum total size of all
+                entries.  A value of 0 disables the cache.
+        """
+        self.max_size_in_bytes = max_size_in_bytes
+        self.size_in_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value associated with the given key, marking it as
+        most recently used; returns default if not found.
+        """
+        with self._lock:
+            try:
+                value, size_in_bytes = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries[key] = (value, size_in_bytes)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size_in_bytes):
+        """
+        Associates the given key with the given value of the given
+        approximate size, evicting the least recently used entries as
+        needed.  Values larger than the cache itself are not cached.
+        """
+        with self._lock:
+            self.delete(key)
+            if size_in_bytes > self.max_size_in_bytes:
+                return
+            while self.size_in_bytes + size_in_bytes > self.max_size_in_bytes:
+                _, (_, evicted_size_in_bytes) = self._entries.popitem(last=False)
+                self.size_in_bytes -= evicted_size_in_bytes
+                self.evictions += 1
+            self._entries[key] = (value, size_in_bytes)
+            self.size_in_bytes += size_in_bytes
+
+    def delete(self, key):
+        """
+        Removes the given key from the cache, if present.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size_in_bytes -= entry[1]
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size_in_bytes = self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Returns a dict of the cache's counters and current size.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            size_in_bytes=self.size_in_bytes,
+            max_size_in_bytes=self.max_size_in_bytes,
+        )
+
+
 def hashvalue(arg):
     """
     If arg is an xblock, use its location. otherwise just turn it into a string
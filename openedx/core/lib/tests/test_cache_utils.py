@@ -6,7 +6,7 @@ from unittest import TestCase
 import ddt
 from mock import MagicMock
 
-from openedx.core.lib.cache_utils import memoize_in_request_cache
+from openedx.core.lib.cache_utils import SizeBoundedLRUCache, memoize_in_request_cache
 
 
 @ddt.ddt
@@ -63,3 +63,49 @@ class TestMemoizeInRequestCache(TestCase):
                 func_to_memoize(*arg_list2)
 
             self.assertEquals(self.func_to_count.call_count, 2)
+
+
+class TestSizeBoundedLRUCache(TestCase):
+    """
+    Test the SizeBoundedLRUCache class.
+    """
+    def setUp(self):
+        super(TestSizeBoundedLRUCache, self).setUp()
+        self.cache = SizeBoundedLRUCache(max_size_in_bytes=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', 'value', 4)
+        self.assertEquals(self.cache.get('key'), 'value')
+        self.assertEquals(self.cache.stats()['hits'], 1)
+        self.assertEquals(self.cache.stats()['misses'], 1)
+        self.assertEquals(self.cache.size_in_bytes, 4)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('first', 1, 4)
+        self.cache.set('second', 2, 4)
+        self.cache.get('first')
+        self.cache.set('third', 3, 4)
+        self.assertIn('first', self.cache)
+        self.assertNotIn('second', self.cache)
+        self.assertIn('third', self.cache)
+        self.assertEquals(self.cache.evictions, 1)
+        self.assertEquals(self.cache.size_in_bytes, 8)
+
+    def test_replace_and_delete(self):
+        self.cache.set('key', 1, 4)
+        self.cache.set('key', 2, 6)
+        self.assertEquals(self.cache.size_in_bytes, 6)
+        self.cache.delete('key')
+        self.assertNotIn('key', self.cache)
+        self.assertEquals(self.cache.size_in_bytes, 0)
+
+    def test_too_large(self):
+        self.cache.set('key', 'value', 11)
+        self.assertNotIn('key', self.cache)
+        self.assertEquals(len(self.cache), 0)
+
+    def test_disabled(self):
+        cache = SizeBoundedLRUCache(max_size_in_bytes=0)
+        cache.set('key', 'value', 1)
+        self.assertNotIn('key', cache)
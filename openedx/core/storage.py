@@ -59,6 +59,10 @@ class S3ReportStorage(S3BotoStorage):  # pylint: disable=abstract-method
     """
     Storage for reports.
     """
+    # Size of the parts that large reports are uploaded in. S3 requires all
+    # parts but the last to be at least 5MB.
+    MULTIPART_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
     def __init__(self, acl=None, bucket=None, custom_domain=None, **settings):
         """
         init method for S3ReportStorage, Note that we have added an extra key-word
@@ -77,6 +81,38 @@ class S3ReportStorage(S3BotoStorage):  # pylint: disable=abstract-method
             self.custom_domain = custom_domain
         super(S3ReportStorage, self).__init__(acl=acl, bucket=bucket, **settings)
 
+    def _save_content(self, key, content, headers):
+        """
+        Uploads reports larger than MULTIPART_UPLOAD_CHUNK_SIZE in parts, so
+        that a large report is never read into memory at once.
+        """
+        if content.size <= self.MULTIPART_UPLOAD_CHUNK_SIZE:
+            return super(S3ReportStorage, self)._save_content(key, content, headers)
+
+        kwargs = {}
+        if self.encryption:
+            kwargs['encrypt_key'] = self.encryption
+        multipart_upload = self.bucket.initiate_multipart_upload(
+            key.name,
+            headers=headers,
+            reduced_redundancy=self.reduced_redundancy,
+            policy=self.default_acl,
+            **kwargs
+        )
+        try:
+            content.seek(0)
+            remaining_size = content.size
+            part_num = 1
+            while remaining_size > 0:
+                part_size = min(self.MULTIPART_UPLOAD_CHUNK_SIZE, remaining_size)
+                multipart_upload.upload_part_from_file(content, part_num, size=part_size)
+                remaining_size -= part_size
+                part_num += 1
+            multipart_upload.complete_upload()
+        except Exception:
+            multipart_upload.cancel_upload()
+            raise
+
 
 @lru_cache()
 def get_storage(storage_class=None, **kwargs):